@@ -0,0 +1,107 @@
+"""
+Shared helpers for the benchmark drivers: load generation, latency statistics,
+JSON result files and baseline comparison.
+"""
+import json
+import math
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, wall_time, errors=0, **extra):
+    values = sorted(latencies)
+    count = len(values)
+    summary = {
+        "count": count,
+        "errors": errors,
+        "throughput_rps": round(count / wall_time, 3) if wall_time > 0 else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+    summary.update(extra)
+    return summary
+
+
+def run_load(fn, requests, concurrency):
+    """
+    Calls `fn(i)` for i in range(requests) using `concurrency` threads.
+    Returns the summary dict; exceptions are counted as errors.
+    """
+    latencies = []
+    errors = 0
+
+    def _one(i):
+        start = time.perf_counter()
+        try:
+            fn(i)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for latency in pool.map(_one, range(requests)):
+            if latency is None:
+                errors += 1
+            else:
+                latencies.append(latency)
+    wall_time = time.perf_counter() - wall_start
+
+    return summarize(latencies, wall_time, errors=errors, concurrency=concurrency)
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2, metric="p95_ms"):
+    """
+    Returns a list of regressions: scenario/concurrency pairs whose `metric`
+    grew more than `tolerance` (as a fraction) over the baseline run.
+    """
+    regressions = []
+    for scenario, levels in results.get("results", {}).items():
+        base_levels = baseline.get("results", {}).get(scenario, {})
+        for level, summary in levels.items():
+            base = base_levels.get(level)
+            if not base or not base.get(metric):
+                continue
+            ratio = summary[metric] / base[metric]
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    "scenario": scenario,
+                    "concurrency": level,
+                    "metric": metric,
+                    "baseline": base[metric],
+                    "current": summary[metric],
+                    "ratio": round(ratio, 3),
+                })
+    return regressions
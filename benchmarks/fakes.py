@@ -0,0 +1,99 @@
+"""
+Deterministic stand-ins for the LLM and the embedding model, so benchmarks
+measure the pipeline around them rather than model speed.
+"""
+import hashlib
+import math
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+
+TABLE_PATTERN = re.compile(r"\b([a-z]+_\d{3})\b")
+
+
+class ScriptedReActLLM(LLM):
+    """
+    Emits a fixed ReAct trace: inspect the schema, run one COUNT query, answer.
+    The step is derived from the number of observations already in the prompt,
+    so the same prompt always produces the same completion. Single-shot SQL
+    prompts (ending in "SQL:") get the COUNT query at once.
+    """
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-react"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        question_at = prompt.rfind("Question:")
+        if question_at != -1 and prompt.rstrip().endswith("SQL:"):
+            # Single-shot generation: answer with the query directly
+            tables = TABLE_PATTERN.findall(prompt[question_at:])
+            return f"SELECT COUNT(*) FROM {tables[0] if tables else 'unknown_000'}"
+        if question_at == -1 or "Action" not in prompt:
+            # Direct prompts: report formatting and the fallback answer
+            return "| result |\n|---|\n| ok |"
+
+        scratchpad = prompt[question_at:]
+        tables = TABLE_PATTERN.findall(scratchpad)
+        table = tables[0] if tables else "unknown_000"
+        step = scratchpad.count("Observation:")
+
+        if step == 0:
+            return (
+                "Thought: I should look at the schema of the table.\n"
+                "Action: sql_db_schema\n"
+                f"Action Input: {table}"
+            )
+        if step == 1:
+            return (
+                "Thought: I can count the rows now.\n"
+                "Action: sql_db_query\n"
+                f"Action Input: SELECT COUNT(*) FROM {table}"
+            )
+
+        counts = re.findall(r"\[\((\d+),\)\]", scratchpad)
+        total = counts[-1] if counts else "an unknown number of"
+        return f"Thought: I have the answer\nFinal Answer: There are {total} rows in {table}."
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words feature hashing into a fixed-size unit vector."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            digest = hashlib.md5(token.encode()).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class FakeLLMManager:
+    """Duck-types LLMManager for OracleBot, returning the scripted LLM."""
+
+    def __init__(self, latency=0.0, llm_type="llamacpp"):
+        self.llm_type = llm_type
+        self.model_name = "scripted-react"
+        self.llm = ScriptedReActLLM(latency=latency)
+
+    def get_llm(self):
+        return self.llm
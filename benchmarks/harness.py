@@ -0,0 +1,87 @@
+"""
+Wires an OracleBot against a synthetic SQLite database, the scripted LLM and
+(optionally) hashing embeddings, isolated in a scratch directory.
+"""
+import os
+import socket
+import threading
+import time
+
+from benchmarks.fakes import FakeLLMManager, HashingEmbeddings
+from benchmarks.synthetic_db import build_schema
+from src.config import Config
+
+REPORT_ID = "BM1001"
+
+
+def build_bot(workdir, tables=20, columns=8, rows=1000, llm_latency=0.0, real_embeddings=False):
+    """Returns (bot, table_names). All state lives under `workdir`."""
+    from src.db_manager import DBManager
+    from src.oracle_bot import OracleBot
+    from src.vector_manager import VectorManager
+
+    os.makedirs(workdir, exist_ok=True)
+    db_path = os.path.join(workdir, "bench.db")
+    table_names = build_schema(db_path, tables=tables, columns=columns, rows=rows)
+
+    Config.DB_TYPE = "sqlite"
+    Config.SQLITE_PATH = db_path
+    Config.REQUEST_LOG_PATH = os.path.join(workdir, "requests.jsonl")
+    # Every request is measured on its own: identical concurrent questions are not merged
+    # and no completion is answered from the persistent LLM cache
+    Config.COALESCE_REQUESTS = False
+    Config.LLM_CACHE_PATH = ""
+
+    db_manager = DBManager(db_type="sqlite")
+    embeddings = None if real_embeddings else HashingEmbeddings()
+    vector_manager = VectorManager(
+        db_manager,
+        embeddings=embeddings,
+        persist_directory=os.path.join(workdir, "chroma_db")
+    )
+    bot = OracleBot(db_manager, FakeLLMManager(latency=llm_latency), vector_manager=vector_manager)
+
+    bot.reports_manager.reports = {
+        REPORT_ID: {
+            "name": "Benchmark Rows",
+            "description": f"Rows of {table_names[0]} up to an id",
+            "query": f"SELECT * FROM {table_names[0]} WHERE id <= :value;"
+        }
+    }
+    return bot, table_names
+
+
+def agent_question(table_names, i):
+    return f"How many rows are in {table_names[i % len(table_names)]}?"
+
+
+def report_question(i):
+    return f"Run {REPORT_ID} for {10 + i % 50}"
+
+
+def semantic_report_question(i):
+    """The report's description in other words, without its ID."""
+    return f"Benchmark rows up to id {10 + i % 50}"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api_server(bot):
+    """Serves src.api with the given bot on a background thread. Returns (base_url, server)."""
+    import uvicorn
+    from src import api
+
+    api.bot = bot
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 30
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
@@ -0,0 +1,72 @@
+"""
+Generation throughput of the local Hugging Face backend, batched vs. unbatched.
+
+    python -m benchmarks.hf_throughput --concurrency 1,4,16 --requests 32
+    python -m benchmarks.hf_throughput --no-batching
+
+Reports generated tokens/s and request latency percentiles per concurrency
+level. Uses HF_MODEL_ID and the HF_* settings from the environment.
+"""
+import argparse
+import sys
+import threading
+
+from benchmarks.common import environment, run_load, write_results
+from src.config import Config
+
+PROMPTS = [
+    "Write a SQL query that counts the students in each class.",
+    "Explain what a LEFT JOIN does in one sentence.",
+    "List three columns an attendance table usually has.",
+    "Write a SQL query that returns the top 5 customers by total order amount.",
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tokens/s of the local Hugging Face backend")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--no-batching", action="store_true")
+    parser.add_argument("--output", default="benchmarks/results/latest_hf_throughput.json")
+    args = parser.parse_args(argv)
+
+    Config.HF_BATCHING = not args.no_batching
+    Config.MODEL_SERVER_ADDRESS = None
+
+    from transformers import AutoTokenizer
+    from src.llm_manager import LLMManager
+
+    llm = LLMManager(llm_type="huggingface").get_llm()
+    tokenizer = AutoTokenizer.from_pretrained(Config.HF_MODEL_ID, token=Config.HF_TOKEN, trust_remote_code=True)
+
+    generated = [0]
+    lock = threading.Lock()
+
+    def one(i):
+        text = llm.invoke(PROMPTS[i % len(PROMPTS)])
+        text = text.content if hasattr(text, "content") else str(text)
+        tokens = len(tokenizer.encode(text, add_special_tokens=False))
+        with lock:
+            generated[0] += tokens
+
+    one(0)  # warm-up
+    results = {}
+    for level in [int(c) for c in args.concurrency.split(",") if c]:
+        generated[0] = 0
+        summary = run_load(one, args.requests, level)
+        wall = summary["count"] / summary["throughput_rps"] if summary["throughput_rps"] else 0
+        summary["generated_tokens"] = generated[0]
+        summary["tokens_per_s"] = round(generated[0] / wall, 3) if wall else 0.0
+        results[str(level)] = summary
+        print(f"c={level:<3} tokens/s={summary['tokens_per_s']} p95={summary['p95_ms']}ms")
+
+    write_results(args.output, {
+        "meta": {**environment(), "model": Config.HF_MODEL_ID, "batching": Config.HF_BATCHING},
+        "results": {"hf_generate": results},
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Report prompt size: every row as text vs. the local digest.
+
+    python -m benchmarks.result_digest --rows 1000,10000,100000
+
+Synthetic attendance-style rows are formatted the way the report path builds
+its prompt. Reports prompt characters (and a ~4 characters/token estimate)
+and the time to build the prompt for both variants at each result size.
+"""
+import argparse
+import datetime
+import sys
+import time
+
+from benchmarks.common import environment, write_results
+from src.result_summarizer import render_digest, summarize
+
+COLUMNS = ["id", "student", "class_name", "status", "attendance_date", "amount_paid"]
+STATUSES = ["Present", "Absent", "Leave"]
+
+
+def _rows(n):
+    start = datetime.date(2024, 1, 1)
+    return [
+        (i, f"student {i % 5000}", f"class {i % 12}", STATUSES[i % 7 % 3],
+         start + datetime.timedelta(days=i % 180), round((i * 37) % 1000 / 10, 1))
+        for i in range(n)
+    ]
+
+
+def _measure(build, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        prompt = build()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {"prompt_chars": len(prompt), "est_prompt_tokens": len(prompt) // 4, "build_ms": round(best * 1000, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prompt size of full rows vs. the result digest")
+    parser.add_argument("--rows", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmarks/results/latest_result_digest.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for n in [int(r) for r in args.rows.split(",") if r]:
+        rows = _rows(n)
+        full = _measure(lambda: f"Convert this into clean Markdown table only:\n{rows}", args.repeat)
+        digest = _measure(lambda: render_digest(summarize(COLUMNS, rows)), args.repeat)
+        results[str(n)] = {"full_rows": full, "digest": digest}
+        print(f"rows={n:<7} full: {full['est_prompt_tokens']:>9} tokens {full['build_ms']:>9}ms   "
+              f"digest: {digest['est_prompt_tokens']:>5} tokens {digest['build_ms']:>8}ms")
+
+    write_results(args.output, {
+        "meta": {**environment(), "repeat": args.repeat},
+        "results": {"result_digest": results},
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
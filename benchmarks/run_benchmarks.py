@@ -0,0 +1,166 @@
+"""
+Load-test driver for the ask pipeline.
+
+    python -m benchmarks.run_benchmarks --tables 50 --rows 2000 --concurrency 1,4,16 \
+        --output benchmarks/results/latest.json --baseline benchmarks/results/baseline.json
+
+Scenarios: `ask_agent` (full ReAct loop with the scripted LLM), `ask_single_shot`
+(one SQL generation with the pruned schema, plus the final answer), `ask_report`
+(predefined report fast-path), `ask_report_semantic` (the same report asked for
+without its ID; reports the fast-path hit rate), `retrieval` (embedding + table search),
+`refresh_schema` (serial only) and `http_ask` (`/ask` over HTTP, with --http).
+Exits non-zero when a baseline is given and any p95 regresses past --tolerance.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks import harness
+from benchmarks.common import compare_to_baseline, environment, run_load, summarize, write_results
+
+SCENARIOS = ["ask_agent", "ask_single_shot", "ask_report", "ask_report_semantic", "retrieval", "refresh_schema", "http_ask"]
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OracleBot ask pipeline")
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--scenarios", default="ask_agent,ask_single_shot,ask_report,ask_report_semantic,retrieval,refresh_schema")
+    parser.add_argument("--http", action="store_true", help="Also run the http_ask scenario")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--real-embeddings", action="store_true", help="Use the sentence-transformers model")
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: a temp dir)")
+    parser.add_argument("--output", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    return parser.parse_args(argv)
+
+
+def run(args):
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    if args.http and "http_ask" not in scenarios:
+        scenarios.append("http_ask")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="dbllm-bench-")
+    bot, tables = harness.build_bot(
+        workdir,
+        tables=args.tables,
+        columns=args.columns,
+        rows=args.rows,
+        llm_latency=args.llm_latency,
+        real_embeddings=args.real_embeddings
+    )
+
+    vectors = [bot.vector_manager.get_embedding(harness.agent_question(tables, i)) for i in range(len(tables))]
+
+    def ask_agent(i):
+        result = bot.ask(harness.agent_question(tables, i), session_id=f"bench-{i % 8}")
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+
+    def ask_report(i):
+        result = bot.ask(harness.report_question(i), session_id=f"bench-{i % 8}")
+        if result.get("report_id") != harness.REPORT_ID:
+            raise RuntimeError(result.get("answer"))
+
+    def ask_report_semantic(i):
+        result = bot.ask(harness.semantic_report_question(i), session_id=f"bench-{i % 8}")
+        if result.get("report_id") != harness.REPORT_ID:
+            raise RuntimeError("missed the report fast-path")
+
+    def retrieval(i):
+        bot.vector_manager.get_relevant_tables_by_vector(vectors[i % len(vectors)])
+
+    http_session = None
+    base_url = None
+    server = None
+    if "http_ask" in scenarios:
+        import requests
+        base_url, server = harness.start_api_server(bot)
+        http_session = requests.Session()
+
+    def http_ask(i):
+        response = http_session.post(
+            f"{base_url}/ask",
+            json={"question": harness.agent_question(tables, i), "session_id": f"bench-{i % 8}"},
+            timeout=120
+        )
+        response.raise_for_status()
+
+    runners = {"ask_agent": ask_agent, "ask_single_shot": ask_agent, "ask_report": ask_report,
+               "ask_report_semantic": ask_report_semantic, "retrieval": retrieval, "http_ask": http_ask}
+
+    results = {}
+    try:
+        for scenario in scenarios:
+            results[scenario] = {}
+            if scenario == "refresh_schema":
+                latencies = []
+                start = time.perf_counter()
+                for _ in range(max(1, args.requests // 10)):
+                    t0 = time.perf_counter()
+                    bot.vector_manager.refresh_schema()
+                    latencies.append(time.perf_counter() - t0)
+                results[scenario]["1"] = summarize(latencies, time.perf_counter() - start, concurrency=1)
+                continue
+
+            bot.sql_generation_mode = "single_shot" if scenario == "ask_single_shot" else "agent"
+            fn = runners[scenario]
+            fn(0)  # warm-up
+            for level in levels:
+                calls_before = bot.llm.calls
+                summary = run_load(fn, args.requests, level)
+                summary["llm_calls_per_request"] = round((bot.llm.calls - calls_before) / args.requests, 3)
+                if scenario == "ask_report_semantic":
+                    summary["fast_path_hit_rate"] = round(1 - summary["errors"] / args.requests, 4)
+                results[scenario][str(level)] = summary
+                print(f"{scenario:>15} c={level:<3} p50={summary['p50_ms']:.1f}ms "
+                      f"p95={summary['p95_ms']:.1f}ms rps={summary['throughput_rps']}")
+    finally:
+        if server is not None:
+            server.should_exit = True
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            **environment(),
+            "tables": args.tables,
+            "columns": args.columns,
+            "rows": args.rows,
+            "requests": args.requests,
+            "llm_latency": args.llm_latency,
+            "real_embeddings": args.real_embeddings,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    results = run(args)
+    write_results(args.output, results)
+    print(f"Results written to {args.output}")
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, tolerance=args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['scenario']} c={r['concurrency']}: "
+                  f"{r['metric']} {r['baseline']} -> {r['current']} (x{r['ratio']})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Schema retrieval micro-benchmark: Chroma HNSW query vs. the in-memory NumPy index.
+
+    python -m benchmarks.schema_retrieval --tables 100,1000,5000 --queries 500 --batch 32
+
+Both stores hold the same hashing embeddings of synthetic table descriptions.
+Reports per-query latency percentiles, batched throughput of the index and
+how often the Chroma top-k agrees with the exact top-k.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.common import environment, summarize, write_results
+from benchmarks.fakes import HashingEmbeddings
+from benchmarks.synthetic_db import COLUMN_TYPES, TABLE_WORDS, table_name
+
+
+def _documents(n):
+    docs = []
+    for i in range(n):
+        columns = ", ".join(f"{COLUMN_TYPES[(i + j) % len(COLUMN_TYPES)][0]} {COLUMN_TYPES[(i + j) % len(COLUMN_TYPES)][1]}"
+                            for j in range(4))
+        docs.append((table_name(i), f"CREATE TABLE {table_name(i)} (id INTEGER, {columns})"))
+    return docs
+
+
+def _time(fn, items):
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start
+
+
+def run_size(n, queries, k, batch):
+    from langchain_chroma import Chroma
+    from langchain_core.documents import Document
+    from src.schema_index import SchemaVectorIndex
+
+    embeddings = HashingEmbeddings()
+    docs = _documents(n)
+    names = [name for name, _ in docs]
+    vectors = embeddings.embed_documents([text for _, text in docs])
+    question_vectors = embeddings.embed_documents(
+        [f"total amount of {TABLE_WORDS[i % len(TABLE_WORDS)]} by region" for i in range(queries)]
+    )
+
+    workdir = tempfile.mkdtemp(prefix="dbllm-schema-bench-")
+    try:
+        store = Chroma(collection_name="db_schema", embedding_function=embeddings, persist_directory=workdir)
+        for i in range(0, n, 1000):
+            store.add_documents(
+                [Document(page_content=text, metadata={"table_name": name}) for name, text in docs[i:i + 1000]],
+                ids=names[i:i + 1000]
+            )
+        index = SchemaVectorIndex()
+        index.load(names, vectors)
+
+        chroma_hits = {}
+
+        def chroma_query(i):
+            results = store.similarity_search_by_vector(question_vectors[i], k=k)
+            chroma_hits[i] = [r.metadata["table_name"] for r in results]
+
+        exact_hits = {}
+
+        def index_query(i):
+            exact_hits[i] = [name for name, _ in index.search(question_vectors[i], k=k)]
+
+        ids = list(range(queries))
+        chroma_lat, chroma_wall = _time(chroma_query, ids)
+        index_lat, index_wall = _time(index_query, ids)
+
+        batches = [question_vectors[i:i + batch] for i in range(0, queries, batch)]
+        batch_lat, batch_wall = _time(lambda vs: index.search_batch(vs, k=k), batches)
+
+        overlap = sum(len(set(chroma_hits[i]) & set(exact_hits[i])) for i in ids) / (queries * k)
+        return {
+            "chroma": summarize(chroma_lat, chroma_wall),
+            "numpy_index": summarize(index_lat, index_wall),
+            "numpy_index_batched": summarize(batch_lat, batch_wall, batch_size=batch,
+                                             queries_per_s=round(queries / batch_wall, 3)),
+            "chroma_recall_at_k": round(overlap, 4),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chroma vs. in-memory schema retrieval")
+    parser.add_argument("--tables", default="100,1000,5000")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--output", default="benchmarks/results/latest_schema_retrieval.json")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for n in [int(t) for t in args.tables.split(",") if t]:
+        results[str(n)] = run_size(n, args.queries, args.k, args.batch)
+        r = results[str(n)]
+        print(f"tables={n:<5} chroma p50={r['chroma']['p50_ms']}ms  numpy p50={r['numpy_index']['p50_ms']}ms  "
+              f"batched={r['numpy_index_batched']['queries_per_s']} q/s  chroma recall={r['chroma_recall_at_k']}")
+
+    write_results(args.output, {
+        "meta": {**environment(), "queries": args.queries, "k": args.k},
+        "results": {"schema_retrieval": results},
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
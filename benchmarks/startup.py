@@ -0,0 +1,92 @@
+"""
+Startup-time benchmark: import time, bot construction, warm-up and
+time-to-first-answer, measured in a fresh interpreter for each LLM backend.
+
+    python -m benchmarks.startup --backends openai,huggingface_api,huggingface,llamacpp \
+        --question "How many students are there?" --output benchmarks/results/latest_startup.json
+
+Backends that cannot load here (missing credentials, model files) are still
+reported, with the error and the stages that completed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import environment, write_results
+
+
+def _child(question):
+    """Runs inside the fresh interpreter; prints one JSON line with stage timings."""
+    timings = {}
+    t0 = time.perf_counter()
+    try:
+        import src.api  # noqa: F401 (what uvicorn imports on cold start)
+        timings["import_api_s"] = time.perf_counter() - t0
+
+        from src.config import Config
+        from src.db_manager import DBManager
+        from src.llm_manager import LLMManager
+        from src.oracle_bot import OracleBot
+
+        t = time.perf_counter()
+        bot = OracleBot(
+            DBManager(db_type=Config.DB_TYPE, include_tables=Config.INCLUDE_TABLES),
+            LLMManager(llm_type=Config.LLM_TYPE)
+        )
+        timings["construct_bot_s"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        bot.warm_up()
+        timings["warm_up_s"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        bot.ask(question)
+        timings["first_answer_s"] = time.perf_counter() - t
+    except Exception as e:
+        timings["error"] = f"{type(e).__name__}: {e}"
+    timings["time_to_first_answer_s"] = time.perf_counter() - t0
+    print(json.dumps({k: round(v, 4) if isinstance(v, float) else v for k, v in timings.items()}))
+
+
+def measure(backend, question, timeout):
+    env = dict(os.environ, LLM_TYPE=backend)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", "--question", question],
+        env=env, capture_output=True, text=True, timeout=timeout
+    )
+    wall = time.perf_counter() - start
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    result = json.loads(lines[-1]) if lines else {"error": proc.stderr.strip()[-500:]}
+    result["process_wall_s"] = round(wall, 4)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start cost per LLM backend")
+    parser.add_argument("--backends", default="openai,huggingface_api,huggingface,llamacpp")
+    parser.add_argument("--question", default="How many tables are there?")
+    parser.add_argument("--timeout", type=float, default=1800)
+    parser.add_argument("--output", default="benchmarks/results/latest_startup.json")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.question)
+        return 0
+
+    results = {}
+    for backend in [b for b in args.backends.split(",") if b]:
+        results[backend] = measure(backend, args.question, args.timeout)
+        print(f"{backend:>16}: {results[backend]}")
+
+    write_results(args.output, {"meta": environment(), "results": results})
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
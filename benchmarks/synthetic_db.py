@@ -0,0 +1,92 @@
+"""
+Builds a configurable synthetic SQLite schema (tables x columns x rows) for benchmarks.
+
+Tables are named `<word>_<nnn>` (e.g. `orders_007`) and each table after the first
+has a `parent_id` foreign key to the previous one, so join-heavy questions and
+FK-aware retrieval have something realistic to work with.
+"""
+import os
+import random
+import sqlite3
+
+TABLE_WORDS = [
+    "customers", "orders", "invoices", "payments", "products", "suppliers",
+    "students", "classes", "teachers", "attendance", "employees", "sales",
+    "accounts", "shipments", "tickets", "devices",
+]
+
+COLUMN_TYPES = [
+    ("name", "TEXT"), ("status", "TEXT"), ("amount", "REAL"), ("created_on", "DATE"),
+    ("category", "TEXT"), ("score", "INTEGER"), ("region", "TEXT"), ("quantity", "INTEGER"),
+    ("price", "REAL"), ("updated_on", "DATE"), ("code", "TEXT"), ("level", "INTEGER"),
+]
+
+STATUSES = ["Active", "Inactive", "Pending", "Closed"]
+REGIONS = ["North", "South", "East", "West"]
+CATEGORIES = ["A", "B", "C", "D", "E"]
+
+
+def table_name(index):
+    return f"{TABLE_WORDS[index % len(TABLE_WORDS)]}_{index:03d}"
+
+
+def _columns(count):
+    columns = []
+    for i in range(count):
+        base, col_type = COLUMN_TYPES[i % len(COLUMN_TYPES)]
+        suffix = "" if i < len(COLUMN_TYPES) else f"_{i // len(COLUMN_TYPES)}"
+        columns.append((f"{base}{suffix}", col_type))
+    return columns
+
+
+def _value(rng, column, col_type, row_id):
+    if column.startswith("status"):
+        return rng.choice(STATUSES)
+    if column.startswith("region"):
+        return rng.choice(REGIONS)
+    if column.startswith("category"):
+        return rng.choice(CATEGORIES)
+    if col_type == "TEXT":
+        return f"{column}-{row_id}"
+    if col_type == "INTEGER":
+        return rng.randint(0, 1000)
+    if col_type == "REAL":
+        return round(rng.uniform(0, 10000), 2)
+    return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def build_schema(path, tables=20, columns=8, rows=1000, seed=42):
+    """Creates (or recreates) the database at `path` and returns the table names."""
+    if os.path.exists(path):
+        os.remove(path)
+
+    rng = random.Random(seed)
+    column_defs = _columns(columns)
+    names = [table_name(i) for i in range(tables)]
+
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.cursor()
+        for index, name in enumerate(names):
+            ddl = ["id INTEGER PRIMARY KEY"]
+            if index > 0:
+                ddl.append("parent_id INTEGER")
+            ddl.extend(f"{col} {col_type}" for col, col_type in column_defs)
+            if index > 0:
+                ddl.append(f"FOREIGN KEY (parent_id) REFERENCES {names[index - 1]}(id)")
+            cursor.execute(f"CREATE TABLE {name} ({', '.join(ddl)})")
+
+            placeholders = ", ".join(["?"] * (len(column_defs) + (2 if index > 0 else 1)))
+            batch = []
+            for row_id in range(1, rows + 1):
+                values = [row_id]
+                if index > 0:
+                    values.append(rng.randint(1, rows))
+                values.extend(_value(rng, col, col_type, row_id) for col, col_type in column_defs)
+                batch.append(values)
+            cursor.executemany(f"INSERT INTO {name} VALUES ({placeholders})", batch)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return names
@@ -0,0 +1,144 @@
+"""
+Table retrieval recall: vector-only top-k vs. hybrid BM25 + vector with
+foreign-key join expansion.
+
+    python -m benchmarks.table_recall --filler-tables 200
+    python -m benchmarks.table_recall --real-embeddings
+
+A small school schema with a bridge table is added to synthetic filler
+tables, and each labelled question is checked against the tables it needs.
+Every needed table that retrieval misses costs the agent at least one extra
+iteration (`sql_db_list_tables` / `sql_db_schema`), so the difference in
+missing tables is reported as the estimated agent iterations saved; the
+`agent_iterations` field of the request log gives the measured number.
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from benchmarks.common import environment, write_results
+from benchmarks.fakes import HashingEmbeddings
+from benchmarks.synthetic_db import build_schema
+from src.config import Config
+
+SCHOOL_SCHEMA = [
+    "CREATE TABLE teachers (id INTEGER PRIMARY KEY, full_name TEXT, subject TEXT, hire_date DATE)",
+    "CREATE TABLE classes (id INTEGER PRIMARY KEY, title TEXT, room_number TEXT, "
+    "teacher_id INTEGER REFERENCES teachers(id))",
+    "CREATE TABLE students (id INTEGER PRIMARY KEY, full_name TEXT, birth_date DATE, guardian_phone TEXT)",
+    "CREATE TABLE student_attendance (id INTEGER PRIMARY KEY, student_id INTEGER REFERENCES students(id), "
+    "class_id INTEGER REFERENCES classes(id), attendance_date DATE, status TEXT)",
+    "CREATE TABLE fee_payments (id INTEGER PRIMARY KEY, student_id INTEGER REFERENCES students(id), "
+    "amount_paid REAL, paid_on DATE, payment_method TEXT)",
+]
+
+QUESTIONS = [
+    ("How many students are there?", {"students"}),
+    ("List teachers and the subject they teach", {"teachers"}),
+    ("Show the room_number of every class", {"classes"}),
+    ("Total amount_paid by payment_method", {"fee_payments"}),
+    ("Which classes does each teacher teach?", {"classes", "teachers"}),
+    ("Which students were absent in class 7B on 2024-01-05?", {"students", "classes", "student_attendance"}),
+    ("Attendance status of each student in class 9A", {"students", "classes", "student_attendance"}),
+    ("How much did each student pay in fees?", {"students", "fee_payments"}),
+    ("Guardian phone numbers of students with unpaid fees", {"students", "fee_payments"}),
+    ("Students taught by teacher Jones", {"students", "student_attendance", "classes", "teachers"}),
+]
+
+
+def build_vector_manager(workdir, filler_tables, real_embeddings):
+    from src.db_manager import DBManager
+    from src.vector_manager import VectorManager
+
+    db_path = os.path.join(workdir, "recall.db")
+    build_schema(db_path, tables=filler_tables, columns=6, rows=5)
+    conn = sqlite3.connect(db_path)
+    try:
+        for ddl in SCHOOL_SCHEMA:
+            conn.execute(ddl)
+        conn.commit()
+    finally:
+        conn.close()
+
+    Config.DB_TYPE = "sqlite"
+    Config.SQLITE_PATH = db_path
+    vector_manager = VectorManager(
+        DBManager(db_type="sqlite"),
+        embeddings=None if real_embeddings else HashingEmbeddings(),
+        persist_directory=os.path.join(workdir, "chroma_db")
+    )
+    vector_manager.warm_up()
+    return vector_manager
+
+
+def evaluate(vector_manager, k):
+    rows = []
+    for question, gold in QUESTIONS:
+        vector = vector_manager.get_embedding(question)
+        vector_only = [name for name, _ in vector_manager.schema_index.search(vector, k=k)]
+        hybrid = vector_manager.get_relevant_tables_by_vector(vector, k=k, question=question)
+        rows.append({
+            "question": question,
+            "gold": sorted(gold),
+            "vector": vector_only,
+            "hybrid": hybrid,
+            "vector_missing": len(gold - set(vector_only)),
+            "hybrid_missing": len(gold - set(hybrid)),
+        })
+    return rows
+
+
+def summarize_recall(rows, key):
+    recall = [1 - r[f"{key}_missing"] / len(r["gold"]) for r in rows]
+    tables = [len(r[key]) for r in rows]
+    return {
+        "recall": round(sum(recall) / len(recall), 4),
+        "full_recall_rate": round(sum(1 for r in rows if r[f"{key}_missing"] == 0) / len(rows), 4),
+        "mean_tables": round(sum(tables) / len(tables), 3),
+        "missing_tables": sum(r[f"{key}_missing"] for r in rows),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall of vector-only vs. hybrid table retrieval")
+    parser.add_argument("--filler-tables", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3, help="k of the vector-only baseline")
+    parser.add_argument("--real-embeddings", action="store_true")
+    parser.add_argument("--output", default="benchmarks/results/latest_table_recall.json")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="dbllm-recall-")
+    try:
+        vector_manager = build_vector_manager(workdir, args.filler_tables, args.real_embeddings)
+        rows = evaluate(vector_manager, args.k)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    vector = summarize_recall(rows, "vector")
+    hybrid = summarize_recall(rows, "hybrid")
+    saved = vector["missing_tables"] - hybrid["missing_tables"]
+    for r in rows:
+        print(f"{r['question'][:55]:<55} vector missing={r['vector_missing']} hybrid missing={r['hybrid_missing']}")
+    print(f"recall vector={vector['recall']} hybrid={hybrid['recall']} "
+          f"(mean tables {vector['mean_tables']} vs {hybrid['mean_tables']}); "
+          f"estimated agent iterations saved: {saved} over {len(rows)} questions")
+
+    write_results(args.output, {
+        "meta": {**environment(), "filler_tables": args.filler_tables, "k": args.k,
+                 "real_embeddings": args.real_embeddings},
+        "results": {
+            "vector_only": vector,
+            "hybrid": hybrid,
+            "estimated_agent_iterations_saved": saved,
+            "questions": rows,
+        },
+    })
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
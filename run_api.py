@@ -1,12 +1,56 @@
+import argparse
 import uvicorn
 import os
+import secrets
+import subprocess
 import sys
 
 # Add the current directory to sys.path to ensure src can be imported
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-if __name__ == "__main__":
+from src.config import Config
+
+
+def start_model_server(address):
+    """Starts the shared model/vector store sidecar and waits until it accepts connections."""
+    from src.model_server import ModelServerClient
+
+    env = dict(os.environ, MODEL_SERVER_ADDRESS=address)
+    proc = subprocess.Popen([sys.executable, "-m", "src.model_server", "--address", address], env=env)
+    ModelServerClient(address).wait_until_ready(timeout=120)
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the DB-LLM API server")
+    parser.add_argument("--workers", type=int, default=Config.API_WORKERS,
+                        help="API worker processes; more than 1 starts the shared model server")
+    parser.add_argument("--model-server-address", default=Config.MODEL_SERVER_ADDRESS or "/tmp/dbllm-models.sock")
+    args = parser.parse_args()
+
     print("Starting DB-LLM Server...")
     print("Backend API: http://localhost:8000")
     print("Frontend Web: http://localhost:8000")
-    uvicorn.run("src.api:app", host="0.0.0.0", port=8000, reload=True)
+
+    if args.workers <= 1:
+        uvicorn.run("src.api:app", host="0.0.0.0", port=8000, reload=True)
+        return
+
+    # Workers inherit these through the environment and forward model calls to the sidecar
+    os.environ["MODEL_SERVER_ADDRESS"] = args.model_server_address
+    os.environ.setdefault("MODEL_SERVER_AUTHKEY", secrets.token_hex(16))
+    Config.MODEL_SERVER_ADDRESS = args.model_server_address
+    Config.MODEL_SERVER_AUTHKEY = os.environ["MODEL_SERVER_AUTHKEY"]
+
+    print(f"Starting shared model server at {args.model_server_address}...")
+    model_server = start_model_server(args.model_server_address)
+    try:
+        print(f"Starting {args.workers} API workers...")
+        uvicorn.run("src.api:app", host="0.0.0.0", port=8000, workers=args.workers)
+    finally:
+        model_server.terminate()
+        model_server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Admission control for the API.
+
+Each route group gets its own lane with a concurrency limit and a bounded
+wait queue. Requests wait on the event loop (not in the threadpool), and are
+shed with a 429 up front when the queue is full, when the estimated wait
+from the lane's recent service time exceeds its budget, or when one session
+already has too many requests running. Routes without a lane (health,
+readiness, metrics) are never queued.
+"""
+import asyncio
+import contextlib
+import time
+from collections import defaultdict
+
+from src import metrics
+
+ACTIVE = metrics.REGISTRY.gauge(
+    "dbllm_admission_active", "Requests running per lane", ("lane",)
+)
+QUEUED = metrics.REGISTRY.gauge(
+    "dbllm_admission_queued", "Requests waiting for admission per lane", ("lane",)
+)
+WAIT_SECONDS = metrics.REGISTRY.histogram(
+    "dbllm_admission_wait_seconds", "Time requests waited for admission", ("lane",)
+)
+SHED = metrics.REGISTRY.counter(
+    "dbllm_admission_shed_total", "Requests rejected by admission control", ("lane", "reason")
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; maps to HTTP 429."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Lane:
+    def __init__(self, name, max_concurrent, max_queue, max_wait_seconds, initial_service_seconds=1.0):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.avg_service = initial_service_seconds
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = None
+
+    @property
+    def semaphore(self):
+        # Created on first use so it belongs to the serving event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def estimated_wait(self):
+        if self.active < self.max_concurrent and not self.waiting:
+            return 0.0
+        return (self.waiting // self.max_concurrent + 1) * self.avg_service
+
+
+class AdmissionController:
+    def __init__(self, lanes, session_limit=2):
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.session_limit = session_limit
+        self._sessions = defaultdict(int)
+
+    def _shed(self, lane, reason, message, retry_after):
+        SHED.inc(lane=lane.name, reason=reason)
+        raise AdmissionRejected(message, retry_after=max(retry_after, 1.0))
+
+    @contextlib.asynccontextmanager
+    async def slot(self, lane_name, session_id=None):
+        lane = self.lanes[lane_name]
+        session_key = (lane_name, session_id) if session_id is not None and self.session_limit else None
+
+        if session_key is not None and self._sessions[session_key] >= self.session_limit:
+            self._shed(lane, "session_limit",
+                       f"Session '{session_id}' already has {self.session_limit} requests running", lane.avg_service)
+        if lane.active >= lane.max_concurrent or lane.waiting:
+            if lane.waiting >= lane.max_queue:
+                self._shed(lane, "queue_full", f"The {lane.name} queue is full", lane.estimated_wait())
+            estimate = lane.estimated_wait()
+            if estimate > lane.max_wait_seconds:
+                self._shed(lane, "latency",
+                           f"Estimated wait {estimate:.1f}s exceeds {lane.max_wait_seconds:.0f}s", estimate)
+
+        if session_key is not None:
+            self._sessions[session_key] += 1
+        lane.waiting += 1
+        QUEUED.set(lane.waiting, lane=lane.name)
+        enqueued = time.perf_counter()
+        try:
+            try:
+                await asyncio.wait_for(lane.semaphore.acquire(), timeout=lane.max_wait_seconds)
+            except asyncio.TimeoutError:
+                self._shed(lane, "timeout", f"Waited {lane.max_wait_seconds:.0f}s for the {lane.name} lane",
+                           lane.estimated_wait())
+            finally:
+                lane.waiting -= 1
+                QUEUED.set(lane.waiting, lane=lane.name)
+            WAIT_SECONDS.observe(time.perf_counter() - enqueued, lane=lane.name)
+
+            lane.active += 1
+            ACTIVE.set(lane.active, lane=lane.name)
+            started = time.perf_counter()
+            try:
+                yield
+            finally:
+                lane.active -= 1
+                lane.semaphore.release()
+                ACTIVE.set(lane.active, lane=lane.name)
+                # Exponentially weighted service time drives the wait estimate
+                lane.avg_service = 0.8 * lane.avg_service + 0.2 * (time.perf_counter() - started)
+        finally:
+            if session_key is not None:
+                self._sessions[session_key] -= 1
+                if not self._sessions[session_key]:
+                    del self._sessions[session_key]
+
+    def stats(self):
+        return {
+            name: {
+                "active": lane.active,
+                "queued": lane.waiting,
+                "max_concurrent": lane.max_concurrent,
+                "avg_service_seconds": round(lane.avg_service, 3),
+            }
+            for name, lane in self.lanes.items()
+        }
@@ -1,14 +1,25 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException, Body, Depends, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from src.db_manager import DBManager
 from src.llm_manager import LLMManager
 from src.oracle_bot import OracleBot
+from src.inference_scheduler import SchedulerRejected
+from src.admission import AdmissionController, AdmissionRejected, Lane
+from src.result_store import ResultSetNotFound
+from src.index_advisor import IndexAdvisor
+from src.tenant_registry import TenantRegistry, UnknownDatabase
 from src.config import Config
+from src import metrics
+from src.logger import get_logger
 import uvicorn
+import contextlib
+import math
 import os
+import threading
+import time
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="DB-LLM RAG API", description="API to interact with databases using natural language")
@@ -22,60 +33,294 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global instances
+logger = get_logger("api")
+
+# Global instances: the bot of the default database and the registry of the others
 bot = None
+registry = None
+
+warmup_state = {"status": "pending", "error": None, "seconds": None}
+
+# Separate lanes keep slow /ask traffic from starving /reports; health routes have no lane
+admission = AdmissionController(
+    [
+        Lane("ask", Config.ASK_MAX_CONCURRENT, Config.ASK_MAX_QUEUE, Config.ASK_MAX_WAIT_SECONDS,
+             initial_service_seconds=5.0),
+        Lane("reports", Config.REPORTS_MAX_CONCURRENT, Config.REPORTS_MAX_QUEUE, Config.REPORTS_MAX_WAIT_SECONDS),
+    ],
+    session_limit=Config.SESSION_MAX_CONCURRENT
+)
+
+def _too_many_requests(e):
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, int(math.ceil(e.retry_after))))}
+    )
+
+@contextlib.asynccontextmanager
+async def _admitted(lane, session_id=None):
+    if not Config.ADMISSION_CONTROL:
+        yield
+        return
+    try:
+        async with admission.slot(lane, session_id=session_id):
+            yield
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+
+async def ask_lane(request: Request):
+    """Admission for /ask, limited globally and per session_id. Waits on the event loop, not in the threadpool."""
+    try:
+        session_id = (await request.json()).get("session_id")
+    except Exception:
+        session_id = None
+    # Anonymous requests all share "default", so only explicit sessions get a per-session limit
+    if session_id in ("", "default"):
+        session_id = None
+    async with _admitted("ask", session_id):
+        yield
+
+async def reports_lane():
+    async with _admitted("reports"):
+        yield
+
+@contextlib.contextmanager
+def _bot_for(database=None):
+    """Holds the bot answering for `database` (None or the default name: the default bot) for one request."""
+    if bot is None:
+        raise HTTPException(status_code=503, detail="Bot not initialized")
+    if not database or database == Config.DEFAULT_DATABASE:
+        yield bot
+        return
+    if registry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown database '{database}'")
+    with contextlib.ExitStack() as stack:
+        try:
+            target = stack.enter_context(registry.acquire(database))
+        except UnknownDatabase:
+            raise HTTPException(status_code=404, detail=f"Unknown database '{database}'")
+        yield target
+
+def _warm_up_bot():
+    """Loads models and opens the vector store off the event loop."""
+    start = time.perf_counter()
+    warmup_state["status"] = "loading"
+    try:
+        bot.warm_up()
+        warmup_state["status"] = "ready"
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+    warmup_state["seconds"] = round(time.perf_counter() - start, 3)
 
 @app.on_event("startup")
 async def startup_event():
-    global bot
+    global bot, registry
+    if bot is not None:
+        # Already provided by an embedding process (e.g. the benchmark driver)
+        return
     db_manager = DBManager(db_type=Config.DB_TYPE, include_tables=Config.INCLUDE_TABLES)
     llm_manager = LLMManager(llm_type=Config.LLM_TYPE)
-    bot = OracleBot(db_manager, llm_manager)
-    print("Bot initialized and ready for API requests.")
+    bot = OracleBot(db_manager, llm_manager, database=Config.DEFAULT_DATABASE)
+    registry = TenantRegistry(
+        bot, Config.DATABASES,
+        default_name=Config.DEFAULT_DATABASE,
+        max_loaded=Config.DATABASES_MAX_LOADED,
+        idle_seconds=Config.DATABASE_IDLE_SECONDS
+    )
+    registry.start()
+    logger.info("Bot initialized and ready for API requests.")
+
+    if Config.WARMUP_ON_STARTUP:
+        threading.Thread(target=_warm_up_bot, name="bot-warmup", daemon=True).start()
+    if Config.REPORT_PRECOMPUTE:
+        bot.start_report_scheduler()
+    if Config.VALUE_INDEX:
+        bot.start_value_index()
 
 class QueryRequest(BaseModel):
     question: str
     format_instruction: Optional[str] = None
     session_id: Optional[str] = "default"
+    include_timings: Optional[bool] = False
+    database: Optional[str] = None
 
 class QueryResponse(BaseModel):
     answer: str
     sql_queries: List[str]
     report_id: Optional[str] = None
+    report_ids: Optional[List[str]] = None
     error: Optional[str] = None
+    snapshot: Optional[Dict[str, Any]] = None
+    result_set: Optional[Dict[str, Any]] = None
+    result_sets: Optional[Dict[str, Dict[str, Any]]] = None
+    timings: Optional[Dict[str, Any]] = None
 
-@app.post("/ask", response_model=QueryResponse)
+@app.post("/ask", response_model=QueryResponse, dependencies=[Depends(ask_lane)])
 def ask(request: QueryRequest):
     """
     Handles natural language queries.
     Defined as 'def' (not 'async def') to run in a threadpool,
     allowing multiple concurrent requests without blocking the event loop.
     """
+    with _bot_for(request.database) as target:
+        try:
+            result = target.ask(
+                request.question,
+                request.format_instruction,
+                session_id=request.session_id,
+                include_timings=bool(request.include_timings)
+            )
+            return result
+        except SchedulerRejected as e:
+            raise _too_many_requests(e)
+        except Exception as e:
+            logger.exception("Unhandled error while answering question")
+            raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/reports", dependencies=[Depends(reports_lane)])
+def list_reports(database: Optional[str] = None):
+    with _bot_for(database) as target:
+        return target.reports_manager.reports
+
+@app.get("/databases")
+def list_databases():
+    """The hosted databases and whether each is loaded right now."""
+    if bot is None:
+        raise HTTPException(status_code=503, detail="Bot not initialized")
+    if registry is None:
+        return {"databases": [{"name": Config.DEFAULT_DATABASE, "loaded": True, "last_used": None}]}
+    return {"databases": registry.status()}
+
+class ReportRun(BaseModel):
+    id: str
+    params: Optional[Dict[str, Any]] = None
+
+class ReportsRunRequest(BaseModel):
+    reports: List[ReportRun]
+    max_parallel: Optional[int] = None
+    database: Optional[str] = None
+
+@app.post("/reports/run", dependencies=[Depends(reports_lane)])
+def run_reports(request: ReportsRunRequest):
+    """
+    Runs several predefined reports with explicit parameters, concurrently and
+    each on its own pooled connection; results come back in request order.
+    """
+    with _bot_for(request.database) as target:
+        if not request.reports:
+            raise HTTPException(status_code=400, detail="No reports requested")
+        if len(request.reports) > Config.REPORT_RUN_MAX_REPORTS:
+            raise HTTPException(status_code=400,
+                                detail=f"At most {Config.REPORT_RUN_MAX_REPORTS} reports per request")
+        if request.max_parallel is not None and request.max_parallel < 1:
+            raise HTTPException(status_code=400, detail="max_parallel must be at least 1")
+
+        results = target.run_reports([(r.id, r.params) for r in request.reports], max_parallel=request.max_parallel)
+        return {"results": results}
+
+@app.get("/results/{result_id}")
+def get_result_page(result_id: str, offset: int = 0, limit: Optional[int] = None, format: str = "json"):
+    """Pages through a server-side result set without re-running SQL or calling the LLM."""
     if bot is None:
         raise HTTPException(status_code=503, detail="Bot not initialized")
+    limit = Config.RESULT_SET_PAGE_SIZE if limit is None else limit
+    if offset < 0 or not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit between 1 and 1000")
+    try:
+        page = bot.result_store.page(result_id, offset=offset, limit=limit)
+        body = bot.result_store.render(page, format)
+    except ResultSetNotFound:
+        raise HTTPException(status_code=404, detail="Result set not found or expired")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if format == "csv":
+        return PlainTextResponse(body, media_type="text/csv")
+    if format == "markdown":
+        return PlainTextResponse(body, media_type="text/markdown")
+    return body
 
+@app.get("/results/{result_id}/download")
+def download_result(result_id: str):
+    """The full result set as CSV, streamed in chunks."""
+    if bot is None:
+        raise HTTPException(status_code=503, detail="Bot not initialized")
     try:
-        result = bot.ask(
-            request.question,
-            request.format_instruction,
-            session_id=request.session_id
-        )
-        return result
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        chunks = bot.result_store.iter_csv(result_id)
+        first = next(chunks)
+    except ResultSetNotFound:
+        raise HTTPException(status_code=404, detail="Result set not found or expired")
+
+    def stream():
+        yield first
+        yield from chunks
 
-@app.get("/reports")
-async def list_reports():
+    return StreamingResponse(
+        stream(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="result-{result_id}.csv"'}
+    )
+
+@app.delete("/results/{result_id}")
+def delete_result(result_id: str):
     if bot is None:
         raise HTTPException(status_code=503, detail="Bot not initialized")
-    return bot.reports_manager.reports
+    try:
+        bot.result_store.delete(result_id)
+    except ResultSetNotFound:
+        raise HTTPException(status_code=404, detail="Result set not found or expired")
+    return {"deleted": result_id}
+
+@app.get("/admin/queries")
+def query_statistics(limit: int = 20, order_by: str = "total_seconds", database: Optional[str] = None):
+    """Executed SQL grouped by fingerprint (literals removed), most expensive first."""
+    with _bot_for(database) as target:
+        if not 1 <= limit <= 1000:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+        try:
+            queries = target.db_manager.query_stats.top(limit=limit, order_by=order_by)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"fingerprints": len(target.db_manager.query_stats), "queries": queries}
+
+@app.delete("/admin/queries")
+def reset_query_statistics(database: Optional[str] = None):
+    with _bot_for(database) as target:
+        target.db_manager.query_stats.reset()
+    return {"reset": True}
+
+@app.get("/admin/queries/advice")
+def index_advice(limit: Optional[int] = None, order_by: str = "total_seconds", database: Optional[str] = None):
+    """EXPLAINs the top SELECT fingerprints and suggests indexes for their full scans; nothing is created."""
+    with _bot_for(database) as target:
+        limit = Config.INDEX_ADVISOR_TOP if limit is None else limit
+        if not 1 <= limit <= 50:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+        try:
+            advice = IndexAdvisor(target.db_manager).advise(limit=limit, order_by=order_by)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"advice": advice}
 
 @app.get("/health")
 async def health_check():
+    """Liveness: answers immediately, even while models are still loading."""
     return {"status": "healthy", "db_type": Config.DB_TYPE, "llm_type": Config.LLM_TYPE}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 only once the LLM, embedding model and vector store are loaded."""
+    if bot is None or not bot.is_ready():
+        return JSONResponse(status_code=503, content={"status": "not_ready", "warmup": warmup_state})
+    return {"status": "ready", "warmup": warmup_state}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint with per-stage latency histograms."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 # Serve static files for the frontend
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 if os.path.exists(static_dir):
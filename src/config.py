@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -22,6 +23,20 @@ class Config:
     # SQLite connection details
     SQLITE_PATH = os.getenv("SQLITE_PATH", "demo.db")
 
+    # Read replicas: named extra engines and which of them serve each workload class, in failover order.
+    # DB_ENGINES='{"replica": {"url": "mysql+pymysql://ro@replica/demo", "lag_query": "SELECT ...", "max_lag_seconds": 30}}'
+    # Workload classes: agent (generated SQL), report, schema (reflection, value index). The primary is always the last resort.
+    DB_ENGINES = json.loads(os.getenv("DB_ENGINES", "{}"))
+    DB_ROUTES = {
+        "agent": "replica",
+        "report": ["reporting", "replica"],
+        "schema": "schema",
+        **json.loads(os.getenv("DB_ROUTES", "{}")),
+    }
+    DB_HEALTH_CHECK_SECONDS = float(os.getenv("DB_HEALTH_CHECK_SECONDS", "10"))
+    DB_FAILURE_COOLDOWN_SECONDS = float(os.getenv("DB_FAILURE_COOLDOWN_SECONDS", "30"))
+    DB_MAX_LAG_SECONDS = float(os.getenv("DB_MAX_LAG_SECONDS", "60"))
+
     # Optional: comma-separated list of tables to include
     INCLUDE_TABLES = [t.strip() for t in os.getenv("INCLUDE_TABLES").split(",")] if os.getenv("INCLUDE_TABLES") else None
 
@@ -50,3 +65,158 @@ class Config:
     HF_GGUF_REPO = os.getenv("HF_GGUF_REPO", "bartowski/Meta-Llama-3.1-8B-Instruct-GGUF")
     HF_GGUF_FILE = os.getenv("HF_GGUF_FILE", "Meta-Llama-3.1-8B-Instruct-Q4_K_M.gguf")
     LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH") # If set, skip download and use this path
+
+    # Observability: per-stage timing spans and the Prometheus /metrics endpoint
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+
+    # Logging: level, 'text' or 'json' console output, and the rotating JSONL request log
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+    REQUEST_LOG_PATH = os.getenv("REQUEST_LOG_PATH", "logs/requests.jsonl")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+    # Startup: load models and open the vector store in the background after boot
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "True").lower() == "true"
+
+    # Multi-worker mode: API workers forward embedding, vector search and local
+    # LLM inference to a shared sidecar listening on this Unix socket
+    API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+    MODEL_SERVER_ADDRESS = os.getenv("MODEL_SERVER_ADDRESS")
+    MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY")
+
+    # Local Hugging Face inference: micro-batching of concurrent prompts and CPU controls
+    HF_BATCHING = os.getenv("HF_BATCHING", "False").lower() == "true"
+    HF_MAX_BATCH_SIZE = int(os.getenv("HF_MAX_BATCH_SIZE", "8"))
+    HF_BATCH_WAIT_MS = int(os.getenv("HF_BATCH_WAIT_MS", "10"))
+    HF_TORCH_THREADS = int(os.getenv("HF_TORCH_THREADS", "0"))  # 0 = torch default
+    HF_TORCH_DTYPE = os.getenv("HF_TORCH_DTYPE")  # e.g. 'auto', 'float32', 'bfloat16'
+
+    # llama.cpp prompt-prefix KV state cache (RAM budget in MB, 0 disables) and
+    # priming of the static agent prompt at warm-up
+    LLAMACPP_PREFIX_CACHE_MB = int(os.getenv("LLAMACPP_PREFIX_CACHE_MB", "1024"))
+    LLAMACPP_PRIME_PREFIX = os.getenv("LLAMACPP_PRIME_PREFIX", "True").lower() == "true"
+
+    # Scheduler in front of the local backends (huggingface, llamacpp): parallel
+    # generations, queue bound and the queue-wait SLA beyond which requests get 429
+    LLM_SCHEDULER = os.getenv("LLM_SCHEDULER", "True").lower() == "true"
+    LLM_MAX_PARALLEL = int(os.getenv("LLM_MAX_PARALLEL", "1"))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+    LLM_QUEUE_SLA_SECONDS = float(os.getenv("LLM_QUEUE_SLA_SECONDS", "60"))
+
+    # Persistent LLM completion cache shared by every backend (empty path disables)
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+    LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
+    # Only greedy (temperature 0) backends are cached unless sampled completions may be replayed too
+    LLM_CACHE_SAMPLED = os.getenv("LLM_CACHE_SAMPLED", "False").lower() == "true"
+
+    # Tiered models: named extra models and which tier serves each call type.
+    # LLM_TIERS='{"small": {"type": "openai", "model": "llama3.2:1b"}}'
+    # Call types: chat, report_format, fallback, sql_agent, sql_generation, final_answer. Unknown tiers use the default model.
+    LLM_TIERS = json.loads(os.getenv("LLM_TIERS", "{}"))
+    LLM_ROUTES = {
+        "chat": "small",
+        "report_format": "small",
+        "fallback": "default",
+        "sql_agent": "default",
+        "sql_generation": "default",
+        "final_answer": "small",
+        **json.loads(os.getenv("LLM_ROUTES", "{}")),
+    }
+
+    # Embedding-based intent routing: greetings and chit-chat skip the SQL agent
+    INTENT_ROUTING = os.getenv("INTENT_ROUTING", "True").lower() == "true"
+    INTENT_CHAT_THRESHOLD = float(os.getenv("INTENT_CHAT_THRESHOLD", "0.6"))
+
+    # SQL generation: "agent" (ReAct SQL agent) or "single_shot" (one prompt with the pruned schema, one repair round)
+    SQL_GENERATION_MODE = os.getenv("SQL_GENERATION_MODE", "agent").lower()
+    SINGLE_SHOT_FINAL_ANSWER = os.getenv("SINGLE_SHOT_FINAL_ANSWER", "True").lower() == "true"
+    SINGLE_SHOT_MAX_ROWS = int(os.getenv("SINGLE_SHOT_MAX_ROWS", "50"))
+
+    # Parse and check generated SQL locally (read-only, known tables/columns, dialect rewrites) before execution
+    SQL_VALIDATION = os.getenv("SQL_VALIDATION", "True").lower() == "true"
+    SQL_VALIDATION_RETRY_SECONDS = int(os.getenv("SQL_VALIDATION_RETRY_SECONDS", "30"))
+
+    # Answer schema retrieval from an exact in-memory NumPy index (Chroma stays the persistent store)
+    SCHEMA_VECTOR_INDEX = os.getenv("SCHEMA_VECTOR_INDEX", "True").lower() == "true"
+
+    # Hybrid table retrieval: BM25 over names/columns/comments fused with vector scores,
+    # adaptive number of tables and foreign-key bridge tables
+    HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "True").lower() == "true"
+    RETRIEVAL_VECTOR_WEIGHT = float(os.getenv("RETRIEVAL_VECTOR_WEIGHT", "0.6"))
+    RETRIEVAL_MIN_TABLES = int(os.getenv("RETRIEVAL_MIN_TABLES", "1"))
+    RETRIEVAL_MAX_TABLES = int(os.getenv("RETRIEVAL_MAX_TABLES", "6"))
+    RETRIEVAL_SCORE_RATIO = float(os.getenv("RETRIEVAL_SCORE_RATIO", "0.75"))
+    RETRIEVAL_MAX_JOIN_TABLES = int(os.getenv("RETRIEVAL_MAX_JOIN_TABLES", "3"))
+
+    # Semantic report matching: questions close to a report's name/description take the report fast-path
+    SEMANTIC_REPORT_MATCHING = os.getenv("SEMANTIC_REPORT_MATCHING", "True").lower() == "true"
+    REPORT_MATCH_THRESHOLD = float(os.getenv("REPORT_MATCH_THRESHOLD", "0.65"))
+    REPORT_MATCH_MARGIN = float(os.getenv("REPORT_MATCH_MARGIN", "0.03"))
+
+    # Coalesce identical in-flight questions (same normalized question and format instruction)
+    COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "True").lower() == "true"
+
+    # API admission control: per-lane concurrency, bounded queues and load shedding (429 + Retry-After)
+    ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "True").lower() == "true"
+    ASK_MAX_CONCURRENT = int(os.getenv("ASK_MAX_CONCURRENT", "8"))
+    ASK_MAX_QUEUE = int(os.getenv("ASK_MAX_QUEUE", "32"))
+    ASK_MAX_WAIT_SECONDS = float(os.getenv("ASK_MAX_WAIT_SECONDS", "30"))
+    REPORTS_MAX_CONCURRENT = int(os.getenv("REPORTS_MAX_CONCURRENT", "4"))
+    REPORTS_MAX_QUEUE = int(os.getenv("REPORTS_MAX_QUEUE", "16"))
+    REPORTS_MAX_WAIT_SECONDS = float(os.getenv("REPORTS_MAX_WAIT_SECONDS", "10"))
+    SESSION_MAX_CONCURRENT = int(os.getenv("SESSION_MAX_CONCURRENT", "2"))
+
+    # Report precomputation: parameterless reports marked "precompute" (or with a "refresh_interval" in seconds)
+    # and the most-used bindings from report_execution.log are refreshed in the background and served from snapshots
+    REPORT_PRECOMPUTE = os.getenv("REPORT_PRECOMPUTE", "True").lower() == "true"
+    REPORT_REFRESH_INTERVAL = int(os.getenv("REPORT_REFRESH_INTERVAL", "900"))
+    REPORT_REFRESH_AHEAD = float(os.getenv("REPORT_REFRESH_AHEAD", "0.8"))
+    REPORT_HOT_BINDINGS = int(os.getenv("REPORT_HOT_BINDINGS", "5"))
+    REPORT_HOT_MIN_COUNT = int(os.getenv("REPORT_HOT_MIN_COUNT", "3"))
+
+    # Questions naming several reports and POST /reports/run: reports run concurrently on separate pooled connections
+    REPORT_MAX_PARALLEL = int(os.getenv("REPORT_MAX_PARALLEL", "4"))
+    REPORT_RUN_MAX_REPORTS = int(os.getenv("REPORT_RUN_MAX_REPORTS", "20"))
+
+    # Server-side result sets: results over RESULT_SET_MIN_ROWS rows get a cursor and are paged via /results/{id}
+    # without re-running SQL; kept in memory up to RESULT_SET_MEMORY_MB, then spilled to RESULT_SET_SPILL_DIR
+    RESULT_SETS = os.getenv("RESULT_SETS", "True").lower() == "true"
+    RESULT_SET_MIN_ROWS = int(os.getenv("RESULT_SET_MIN_ROWS", "20"))
+    RESULT_SET_MAX_ROWS = int(os.getenv("RESULT_SET_MAX_ROWS", "10000"))
+    RESULT_SET_PAGE_SIZE = int(os.getenv("RESULT_SET_PAGE_SIZE", "50"))
+    RESULT_SET_TTL_SECONDS = int(os.getenv("RESULT_SET_TTL_SECONDS", "900"))
+    RESULT_SET_MEMORY_MB = float(os.getenv("RESULT_SET_MEMORY_MB", "64"))
+    RESULT_SET_SPILL_DIR = os.getenv("RESULT_SET_SPILL_DIR", "result_sets")
+
+    # Local result digest: results over SUMMARY_MIN_ROWS rows reach the LLM as NumPy column statistics,
+    # top groups and a SUMMARY_SAMPLE_ROWS sample instead of every row
+    RESULT_SUMMARY = os.getenv("RESULT_SUMMARY", "True").lower() == "true"
+    SUMMARY_MIN_ROWS = int(os.getenv("SUMMARY_MIN_ROWS", "50"))
+    SUMMARY_SAMPLE_ROWS = int(os.getenv("SUMMARY_SAMPLE_ROWS", "10"))
+    SUMMARY_TOP_N = int(os.getenv("SUMMARY_TOP_N", "5"))
+    SUMMARY_MAX_OBSERVATION_CHARS = int(os.getenv("SUMMARY_MAX_OBSERVATION_CHARS", "4000"))
+
+    # Literal grounding: distinct values of string columns (up to VALUE_INDEX_FUZZY_MAX_DISTINCT per column) are
+    # read in the background, VALUE_INDEX_COLUMNS_PER_TICK stale columns at a time, and matched against question words
+    VALUE_INDEX = os.getenv("VALUE_INDEX", "True").lower() == "true"
+    VALUE_INDEX_MAX_DISTINCT = int(os.getenv("VALUE_INDEX_MAX_DISTINCT", "50"))
+    VALUE_INDEX_FUZZY_MAX_DISTINCT = int(os.getenv("VALUE_INDEX_FUZZY_MAX_DISTINCT", "1000"))
+    VALUE_INDEX_REFRESH_SECONDS = int(os.getenv("VALUE_INDEX_REFRESH_SECONDS", "3600"))
+    VALUE_INDEX_COLUMNS_PER_TICK = int(os.getenv("VALUE_INDEX_COLUMNS_PER_TICK", "20"))
+    VALUE_MATCH_THRESHOLD = float(os.getenv("VALUE_MATCH_THRESHOLD", "0.8"))
+    VALUE_HINTS_MAX = int(os.getenv("VALUE_HINTS_MAX", "8"))
+
+    # Several databases in one process: requests pick one by its "database" name (the DB_TYPE one is DEFAULT_DATABASE).
+    # DATABASES='{"finance": {"url": "sqlite:///finance.db", "reports_file": "finance_reports.json"}}'
+    # Bots for them share the embedding model and LLMs, load on first use and unload when idle or beyond the limit
+    DATABASES = json.loads(os.getenv("DATABASES", "{}"))
+    DEFAULT_DATABASE = os.getenv("DEFAULT_DATABASE", "default")
+    DATABASES_MAX_LOADED = int(os.getenv("DATABASES_MAX_LOADED", "8"))
+    DATABASE_IDLE_SECONDS = int(os.getenv("DATABASE_IDLE_SECONDS", "1800"))
+
+    # Per-fingerprint SQL statistics (literals stripped) behind GET /admin/queries; the index advisor
+    # EXPLAINs the INDEX_ADVISOR_TOP most expensive shapes and suggests CREATE INDEX statements for review
+    QUERY_STATS = os.getenv("QUERY_STATS", "True").lower() == "true"
+    QUERY_STATS_MAX_FINGERPRINTS = int(os.getenv("QUERY_STATS_MAX_FINGERPRINTS", "1000"))
+    INDEX_ADVISOR_TOP = int(os.getenv("INDEX_ADVISOR_TOP", "5"))
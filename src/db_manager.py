@@ -1,18 +1,51 @@
 import oracledb
 import os
-from sqlalchemy import create_engine, text
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
 from langchain_community.utilities import SQLDatabase
 from src.config import Config
+from src import metrics
+from src.db_router import PRIMARY, EngineRouter
+from src.logger import get_logger
+from src.query_stats import QueryStats
+from src.sql_validator import SQLValidationError, SQLValidator
+
+logger = get_logger("db_manager")
 
 class DBManager:
-    def __init__(self, db_type=None, include_tables=None):
+    def __init__(self, db_type=None, include_tables=None, engines=None, routes=None, url=None):
+        # An explicit SQLAlchemy URL (e.g. one hosted database of several) overrides the DB_TYPE settings
+        self.url = url
+        if url is not None:
+            db_type = make_url(url).get_backend_name()
         self.db_type = db_type if db_type is not None else Config.DB_TYPE
         self.engine = self._create_engine()
+        self.include_tables = include_tables
+        # Named replica engines and the workload classes (agent, report, schema) they serve
+        self.router = EngineRouter(
+            self.engine,
+            engines=Config.DB_ENGINES if engines is None else engines,
+            routes=Config.DB_ROUTES if routes is None else routes,
+            health_check_seconds=Config.DB_HEALTH_CHECK_SECONDS,
+            cooldown_seconds=Config.DB_FAILURE_COOLDOWN_SECONDS,
+            max_lag_seconds=Config.DB_MAX_LAG_SECONDS
+        )
         # allow limiting tables to reduce prompt size
         self.db = SQLDatabase(self.engine, include_tables=include_tables, sample_rows_in_table_info=2)
+        # Latency and row statistics per query fingerprint, for /admin/queries and the index advisor
+        self.query_stats = QueryStats(max_fingerprints=Config.QUERY_STATS_MAX_FINGERPRINTS)
+        self._instrument(self.db)
 
         # Cache for usable table names
         self._usable_table_names = None
+        # Cached table metadata, the {table: columns} catalogue and the validator built on it
+        self._table_metadata = None
+        self._schema_catalog = None
+        self._validator = None
+        # When the catalogue could not be read, validation is skipped until this time and then retried
+        self._validator_retry_at = 0.0
 
         # Cache for dynamic SQLDatabase instances (used in OracleBot)
         self._db_cache = {}
@@ -21,6 +54,7 @@ class DBManager:
         # We wrap the run method to automatically strip it.
         if self.db_type == "oracle":
             self._wrap_run_for_oracle()
+        self._install_validation(self.db)
 
     def _wrap_run_for_oracle(self):
         original_run = self.db.run
@@ -32,7 +66,34 @@ class DBManager:
         # Bind the wrapped method to the instance
         self.db.run = wrapped_run
 
+    def _instrument(self, db, workload="default"):
+        """Records duration and row count of every statement the SQLDatabase executes."""
+        original_execute = getattr(db, "_execute", None)
+        if original_execute is None:
+            return
+        def timed_execute(command, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = original_execute(command, *args, **kwargs)
+            except Exception:
+                self.record_query(command, time.perf_counter() - start, 0, workload, error=True)
+                raise
+            rows = len(result) if isinstance(result, (list, tuple)) else 0
+            self.record_query(command, time.perf_counter() - start, rows, workload)
+            return result
+        db._execute = timed_execute
+
+    def record_query(self, sql, duration, rows, workload="default", error=False):
+        """Adds an executed statement to the request trace and to the per-fingerprint statistics."""
+        if not error:
+            metrics.record_sql(duration, rows)
+        if Config.QUERY_STATS:
+            self.query_stats.record(sql, duration, rows, workload=workload, error=error)
+
     def _create_engine(self):
+        if self.url is not None:
+            return create_engine(self.url)
+
         if self.db_type == "sqlite":
             return create_engine(f"sqlite:///{Config.SQLITE_PATH}")
         
@@ -44,7 +105,7 @@ class DBManager:
             database = Config.MYSQL_DB
 
             if not all([user, host, database]):
-                print("Warning: MySQL credentials not fully provided. Falling back to SQLite.")
+                logger.warning("MySQL credentials not fully provided. Falling back to SQLite.")
                 return create_engine(f"sqlite:///{Config.SQLITE_PATH}")
 
             try:
@@ -55,7 +116,7 @@ class DBManager:
                     pass
                 return engine
             except Exception as e:
-                print(f"Warning: Failed to connect to MySQL ({e}). Falling back to SQLite.")
+                logger.warning("Failed to connect to MySQL (%s). Falling back to SQLite.", e)
                 return create_engine(f"sqlite:///{Config.SQLITE_PATH}")
 
         elif self.db_type == "oracle":
@@ -64,7 +125,7 @@ class DBManager:
             dsn = Config.ORACLE_DSN
 
             if not all([user, password, dsn]):
-                print("Warning: Oracle credentials not fully provided. Falling back to SQLite.")
+                logger.warning("Oracle credentials not fully provided. Falling back to SQLite.")
                 return create_engine(f"sqlite:///{Config.SQLITE_PATH}")
 
             connection_url = f"oracle+oracledb://{user}:{password}@{dsn}"
@@ -73,19 +134,35 @@ class DBManager:
         else:
             raise ValueError(f"Unsupported database type: {self.db_type}")
 
-    def get_db(self, include_tables=None):
+    def engine_for(self, workload):
+        """The engine currently serving a workload class (see EngineRouter)."""
+        return self.router.route(workload)[1]
+
+    @contextmanager
+    def connect(self, workload="default"):
+        """A connection on the engine serving `workload`, failing over to the next one if it cannot connect."""
+        connection = self.router.connect(workload)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def get_db(self, include_tables=None, workload="default"):
         """
-        Returns a SQLDatabase instance. If include_tables is provided,
-        it uses a cached instance or creates a new one.
+        Returns a SQLDatabase instance on the engine serving `workload`. If
+        include_tables is provided, it uses a cached instance or creates a new one.
         """
-        if include_tables is None:
+        engine_name, engine = self.router.route(workload)
+        if include_tables is None and engine_name == PRIMARY:
             return self.db
 
-        # Use a frozenset for the cache key
-        table_key = frozenset(include_tables)
+        # Use the engine, the workload (for query statistics) and a frozenset of the tables for the cache key
+        table_key = (engine_name, workload, frozenset(include_tables) if include_tables is not None else None)
         if table_key not in self._db_cache:
-            print(f"Creating new SQLDatabase instance for tables: {include_tables}")
-            new_db = SQLDatabase(self.engine, include_tables=list(table_key), sample_rows_in_table_info=2)
+            logger.debug("Creating new SQLDatabase instance on %s for tables: %s", engine_name, include_tables)
+            tables = list(table_key[2]) if include_tables is not None else self.include_tables
+            new_db = SQLDatabase(engine, include_tables=tables, sample_rows_in_table_info=2)
+            self._instrument(new_db, workload)
 
             # Apply Oracle fix to new instance if needed
             if self.db_type == "oracle":
@@ -95,6 +172,7 @@ class DBManager:
                         command = command.strip().rstrip(';')
                     return orig_run(command, *a, **kw)
                 new_db.run = wrap
+            self._install_validation(new_db)
 
             self._db_cache[table_key] = new_db
 
@@ -106,9 +184,126 @@ class DBManager:
             self._usable_table_names = self.db.get_usable_table_names()
         return self._usable_table_names
 
-    def execute_query(self, query):
+    def get_table_metadata(self):
+        """
+        Returns cached metadata of the usable tables:
+        {table: {"comment": str, "columns": [(name, comment)], "references": [referred tables]}}
+        """
+        if self._table_metadata is None:
+            inspector = inspect(self.engine_for("schema"))
+            metadata = {}
+            for table in self.get_usable_table_names():
+                try:
+                    columns = [(c["name"], c.get("comment") or "") for c in inspector.get_columns(table)]
+                except Exception as e:
+                    logger.warning("Could not read columns of %s: %s", table, e)
+                    continue
+                try:
+                    comment = (inspector.get_table_comment(table) or {}).get("text") or ""
+                except Exception:
+                    # Not every dialect supports table comments (e.g. SQLite)
+                    comment = ""
+                try:
+                    references = [fk["referred_table"] for fk in inspector.get_foreign_keys(table) if fk.get("referred_table")]
+                except Exception as e:
+                    logger.warning("Could not read foreign keys of %s: %s", table, e)
+                    references = []
+                metadata[table] = {"comment": comment, "columns": columns, "references": references}
+            self._table_metadata = metadata
+        return self._table_metadata
+
+    def get_schema_catalog(self):
+        """Returns the cached {table: set of columns} catalogue of the usable tables, lower-cased."""
+        if self._schema_catalog is None:
+            self._schema_catalog = {
+                table.lower(): {name.lower() for name, _ in meta["columns"]}
+                for table, meta in self.get_table_metadata().items()
+            }
+        return self._schema_catalog
+
+    def invalidate_schema_cache(self):
+        """Drops cached table names and columns, e.g. after a schema change."""
+        self._usable_table_names = None
+        self._table_metadata = None
+        self._schema_catalog = None
+        self._validator = None
+        self._validator_retry_at = 0.0
+
+    def validate_sql(self, sql):
+        """
+        Checks a generated query locally. Returns (sql to execute, error); the
+        query may be rewritten for the dialect, and error is None when it is valid.
+        """
+        if not Config.SQL_VALIDATION:
+            return sql, None
+        if self._validator is None and time.time() >= self._validator_retry_at:
+            try:
+                self._validator = SQLValidator(self.engine.dialect.name, self.get_schema_catalog())
+            except Exception as e:
+                # Without a catalogue the database remains the judge until the next attempt
+                logger.warning("SQL validation skipped for %ss, schema catalogue unavailable: %s",
+                               Config.SQL_VALIDATION_RETRY_SECONDS, e)
+                self._validator_retry_at = time.time() + Config.SQL_VALIDATION_RETRY_SECONDS
+        if self._validator is None:
+            return sql, None
+        try:
+            return self._validator.validate(sql), None
+        except SQLValidationError as e:
+            return sql, str(e)
+
+    def _install_validation(self, db):
+        """Validates agent queries before they reach the database; rejections come back as the tool's error."""
+        original_run = db.run
+        original_run_no_throw = db.run_no_throw
+
+        def validated_run(command, *args, **kwargs):
+            if isinstance(command, str):
+                command, error = self.validate_sql(command)
+                if error:
+                    raise SQLValidationError(error)
+            return original_run(command, *args, **kwargs)
+
+        def validated_run_no_throw(command, *args, **kwargs):
+            # SQLDatabase.run_no_throw goes through run (validated above) but only catches SQLAlchemy errors
+            try:
+                return original_run_no_throw(command, *args, **kwargs)
+            except SQLValidationError as e:
+                return f"Error: {e}"
+
+        db.run = validated_run
+        db.run_no_throw = validated_run_no_throw
+
+    def dispose(self):
+        """Closes the pooled connections of every engine, e.g. when an idle database is unloaded."""
+        for engine in self.router.engines.values():
+            engine.dispose()
+
+    def execute_query(self, query, workload="default"):
+        if self.db_type == "oracle" and isinstance(query, str):
+            query = query.strip().rstrip(';')
+        start = time.perf_counter()
+        try:
+            with self.connect(workload) as connection:
+                result = connection.execute(text(query))
+                rows = result.fetchall()
+        except Exception:
+            self.record_query(query, time.perf_counter() - start, 0, workload, error=True)
+            raise
+        self.record_query(query, time.perf_counter() - start, len(rows), workload)
+        return rows
+
+    def execute_select(self, query, max_rows=None, workload="default"):
+        """Runs a query and returns (column names, rows), fetching at most `max_rows` rows."""
         if self.db_type == "oracle" and isinstance(query, str):
             query = query.strip().rstrip(';')
-        with self.engine.connect() as connection:
-            result = connection.execute(text(query))
-            return result.fetchall()
+        start = time.perf_counter()
+        try:
+            with self.connect(workload) as connection:
+                result = connection.execute(text(query))
+                columns = list(result.keys())
+                rows = result.fetchmany(max_rows) if max_rows else result.fetchall()
+        except Exception:
+            self.record_query(query, time.perf_counter() - start, 0, workload, error=True)
+            raise
+        self.record_query(query, time.perf_counter() - start, len(rows), workload)
+        return columns, rows
@@ -0,0 +1,154 @@
+"""
+Routing of database work to named engines (read replicas).
+
+Besides the primary, DB_ENGINES names extra engines by SQLAlchemy URL, and
+DB_ROUTES says which engine(s) serve each workload class: `agent` (SQL the
+agent or the single-shot path generated), `report` (predefined reports) and
+`schema` (reflection and the value index). A route lists engines in failover
+order and always ends at the primary. An engine is skipped while its last
+health check failed or its replication lag (from its optional `lag_query`)
+exceeds `max_lag_seconds`; checks are cached for `health_check_seconds`,
+failed engines are retried after `cooldown_seconds`.
+"""
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from src import metrics
+from src.logger import get_logger
+
+logger = get_logger("db_router")
+
+PRIMARY = "primary"
+
+ROUTED = metrics.REGISTRY.counter(
+    "dbllm_db_routed_total", "Database work routed by workload class and engine", ("workload", "engine")
+)
+FAILOVERS = metrics.REGISTRY.counter(
+    "dbllm_db_failovers_total", "Connections that skipped an unavailable engine", ("workload", "engine")
+)
+ENGINE_UP = metrics.REGISTRY.gauge(
+    "dbllm_db_engine_up", "1 when the engine passed its last health and lag check", ("engine",)
+)
+REPLICA_LAG = metrics.REGISTRY.gauge(
+    "dbllm_db_replica_lag_seconds", "Replication lag reported by the engine's lag query", ("engine",)
+)
+
+
+class EngineRouter:
+    def __init__(self, primary, engines=None, routes=None, health_check_seconds=10.0, cooldown_seconds=30.0,
+                 max_lag_seconds=60.0):
+        """
+        `engines` is {name: {"url": ..., "lag_query": optional SQL returning seconds,
+        "max_lag_seconds": optional}}; `routes` is {workload: name or [names]}.
+        """
+        self.engines = {PRIMARY: primary}
+        self.specs = {PRIMARY: {}}
+        for name, spec in (engines or {}).items():
+            spec = {"url": spec} if isinstance(spec, str) else dict(spec)
+            try:
+                self.engines[name] = create_engine(spec["url"], **spec.get("engine_options", {}))
+                self.specs[name] = spec
+            except Exception as e:
+                logger.warning("Database engine '%s' unavailable, its workloads use the next engine: %s", name, e)
+        self.routes = {}
+        for workload, names in (routes or {}).items():
+            names = [names] if isinstance(names, str) else list(names)
+            self.routes[workload] = [n for n in names if n in self.engines and n != PRIMARY] + [PRIMARY]
+        self.health_check_seconds = health_check_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self._health = {}
+        self._checking = set()
+        self._lock = threading.Lock()
+
+    def candidates(self, workload):
+        """Engine names for a workload in failover order, ending at the primary."""
+        return self.routes.get(workload, [PRIMARY])
+
+    def check(self, name):
+        """Runs the health (SELECT 1) and lag check of one engine now; returns its state."""
+        spec = self.specs[name]
+        state = {"healthy": True, "lag_seconds": None, "error": None, "checked_at": time.time()}
+        try:
+            engine = self.engines[name]
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1 FROM dual" if engine.dialect.name == "oracle" else "SELECT 1"))
+                if spec.get("lag_query"):
+                    lag = connection.execute(text(spec["lag_query"])).scalar()
+                    state["lag_seconds"] = float(lag) if lag is not None else None
+        except Exception as e:
+            state.update(healthy=False, error=str(e))
+        max_lag = spec.get("max_lag_seconds", self.max_lag_seconds)
+        if state["healthy"] and state["lag_seconds"] is not None and state["lag_seconds"] > max_lag:
+            state.update(healthy=False, error=f"replication lag {state['lag_seconds']:.1f}s over {max_lag}s")
+        with self._lock:
+            self._health[name] = state
+        ENGINE_UP.set(1 if state["healthy"] else 0, engine=name)
+        if state["lag_seconds"] is not None:
+            REPLICA_LAG.set(state["lag_seconds"], engine=name)
+        if not state["healthy"]:
+            logger.warning("Database engine '%s' unavailable: %s", name, state["error"])
+        return state
+
+    def available(self, name, now=None):
+        """Whether to send work to an engine, re-checking it when its last check is due."""
+        if name == PRIMARY:
+            return True
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._health.get(name)
+            due = state is None or now - state["checked_at"] >= (
+                self.health_check_seconds if state["healthy"] else self.cooldown_seconds
+            )
+            # One caller runs a due check; the others go by the previous result meanwhile
+            run_check = due and name not in self._checking
+            if run_check:
+                self._checking.add(name)
+        if run_check:
+            try:
+                state = self.check(name)
+            finally:
+                with self._lock:
+                    self._checking.discard(name)
+        return state is not None and state["healthy"]
+
+    def mark_failed(self, name, error):
+        if name == PRIMARY:
+            return
+        with self._lock:
+            self._health[name] = {"healthy": False, "lag_seconds": None, "error": str(error), "checked_at": time.time()}
+        ENGINE_UP.set(0, engine=name)
+        logger.warning("Database engine '%s' failed, failing over: %s", name, error)
+
+    def route(self, workload):
+        """(name, engine) of the first available engine for the workload."""
+        for name in self.candidates(workload):
+            if self.available(name):
+                ROUTED.inc(workload=workload, engine=name)
+                return name, self.engines[name]
+            FAILOVERS.inc(workload=workload, engine=name)
+        return PRIMARY, self.engines[PRIMARY]
+
+    def connect(self, workload):
+        """A connection from the first engine of the route that accepts one; connection errors fail over."""
+        for name in self.candidates(workload):
+            if not self.available(name):
+                FAILOVERS.inc(workload=workload, engine=name)
+                continue
+            try:
+                connection = self.engines[name].connect()
+            except Exception as e:
+                if name == PRIMARY:
+                    raise
+                self.mark_failed(name, e)
+                FAILOVERS.inc(workload=workload, engine=name)
+                continue
+            ROUTED.inc(workload=workload, engine=name)
+            return connection
+
+    def status(self):
+        """{name: last health state} of the non-primary engines."""
+        with self._lock:
+            return {name: dict(state) for name, state in self._health.items()}
@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 import json
+import math
 
 st.set_page_config(page_title="DB-LLM RAG Bot", page_icon="📊", layout="wide")
 
@@ -9,15 +10,49 @@ API_URL = "http://localhost:8000"
 st.title("📊 DB-LLM RAG Assistant")
 st.markdown("Interact with your database using natural language.")
 
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_page(result_id, offset, limit):
+    response = requests.get(f"{API_URL}/results/{result_id}", params={"offset": offset, "limit": limit})
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+def show_result_set(cursor):
+    """Pages through a server-side result set; only the visible page is fetched."""
+    page_size = cursor.get("page_size") or 50
+    total = cursor["total_rows"]
+    pages = max(1, math.ceil(total / page_size))
+    with st.expander(f"All {total} rows" + (" (truncated)" if cursor.get("truncated") else "")):
+        page_no = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                                  key=f"page_{cursor['id']}")
+        offset = (page_no - 1) * page_size
+        page = fetch_page(cursor["id"], offset, page_size)
+        if page is None:
+            st.info("This result has expired. Ask the question again to page through it.")
+            return
+        st.dataframe([dict(zip(page["columns"], row)) for row in page["rows"]], use_container_width=True)
+        st.caption(f"Rows {offset + 1}-{offset + len(page['rows'])} of {total}")
+        st.markdown(f"[Download this page as CSV]({API_URL}/results/{cursor['id']}"
+                    f"?offset={offset}&limit={page_size}&format=csv) · "
+                    f"[Download all rows]({API_URL}/results/{cursor['id']}/download)")
+
 # Initialize session state for chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
 # Sidebar for Reports and Settings
 with st.sidebar:
+    database = None
+    try:
+        databases = [d["name"] for d in requests.get(f"{API_URL}/databases").json()["databases"]]
+        if len(databases) > 1:
+            database = st.selectbox("🗄️ Database", databases)
+    except Exception:
+        pass
+
     st.header("📋 Predefined Reports")
     try:
-        response = requests.get(f"{API_URL}/reports")
+        response = requests.get(f"{API_URL}/reports", params={"database": database} if database else None)
         if response.status_code == 200:
             reports = response.json()
             for report_id, info in reports.items():
@@ -41,6 +76,8 @@ with st.sidebar:
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+        if message.get("result_set"):
+            show_result_set(message["result_set"])
         if "sql" in message and show_sql:
             with st.expander("Executed SQL"):
                 for query in message["sql"]:
@@ -60,6 +97,8 @@ if prompt := st.chat_input("Ask a question about your data..."):
                 payload = {"question": prompt}
                 if format_instr:
                     payload["format_instruction"] = format_instr
+                if database:
+                    payload["database"] = database
 
                 response = requests.post(f"{API_URL}/ask", json=payload)
 
@@ -67,8 +106,11 @@ if prompt := st.chat_input("Ask a question about your data..."):
                     data = response.json()
                     answer = data["answer"]
                     sql_queries = data.get("sql_queries", [])
+                    result_set = data.get("result_set")
 
                     st.markdown(answer)
+                    if result_set:
+                        show_result_set(result_set)
                     if sql_queries and show_sql:
                         with st.expander("Executed SQL"):
                             for query in sql_queries:
@@ -78,7 +120,8 @@ if prompt := st.chat_input("Ask a question about your data..."):
                     st.session_state.messages.append({
                         "role": "assistant",
                         "content": answer,
-                        "sql": sql_queries
+                        "sql": sql_queries,
+                        "result_set": result_set
                     })
                 else:
                     error_msg = f"API Error ({response.status_code}): {response.text}"
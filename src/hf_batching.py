@@ -0,0 +1,189 @@
+"""
+Dynamic micro-batching for the local Hugging Face backend.
+
+Concurrent prompts are queued, collected for up to `max_wait_ms` (or until
+`max_batch_size` is reached), left-padded into one batch and generated in a
+single `model.generate` call with the KV cache enabled. Each caller waits on
+its own future.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, ClassVar, List, Optional
+
+import torch
+from langchain_core.language_models.llms import LLM
+
+from src import metrics
+from src.logger import get_logger
+
+logger = get_logger("hf_batching")
+
+BATCH_SIZE = metrics.REGISTRY.histogram(
+    "dbllm_hf_batch_size", "Prompts per Hugging Face generate() call", buckets=(1, 2, 4, 8, 16, 32)
+)
+GENERATED_TOKENS = metrics.REGISTRY.counter(
+    "dbllm_hf_generated_tokens_total", "Tokens generated by the local Hugging Face model"
+)
+QUEUE_SECONDS = metrics.REGISTRY.histogram(
+    "dbllm_hf_batch_queue_seconds", "Time a prompt waited before its batch started"
+)
+
+
+def _apply_stop(text, stop):
+    if not stop:
+        return text
+    cut = len(text)
+    for s in stop:
+        index = text.find(s)
+        if index != -1:
+            cut = min(cut, index)
+    return text[:cut]
+
+
+class _Request:
+    __slots__ = ("prompt", "stop", "max_new_tokens", "future", "enqueued")
+
+    def __init__(self, prompt, stop, max_new_tokens):
+        self.prompt = prompt
+        self.stop = stop
+        self.max_new_tokens = max_new_tokens
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+_SHUTDOWN = object()
+
+
+class BatchingGenerator:
+    """Collects concurrent prompts into padded batches for one shared model."""
+
+    def __init__(self, model, tokenizer, max_batch_size=8, max_wait_ms=10, max_new_tokens=256,
+                 repetition_penalty=1.1, max_input_length=2048, use_chat_template=False):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_new_tokens = max_new_tokens
+        self.repetition_penalty = repetition_penalty
+        self.max_input_length = max_input_length
+        self.use_chat_template = use_chat_template and getattr(tokenizer, "chat_template", None)
+        self.is_encoder_decoder = bool(getattr(getattr(model, "config", None), "is_encoder_decoder", False))
+
+        if getattr(tokenizer, "pad_token", None) is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        if not self.is_encoder_decoder:
+            # Decoder-only models must be left-padded so generation continues from real tokens
+            tokenizer.padding_side = "left"
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="hf-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt, stop=None, max_new_tokens=None):
+        request = _Request(prompt, stop, max_new_tokens or self.max_new_tokens)
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt, stop=None, max_new_tokens=None, timeout=None):
+        return self.submit(prompt, stop, max_new_tokens).result(timeout=timeout)
+
+    def close(self):
+        self._queue.put(_SHUTDOWN)
+        self._thread.join(timeout=5)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _SHUTDOWN:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _SHUTDOWN:
+                self._queue.put(_SHUTDOWN)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                self._generate_batch(batch)
+            except Exception as e:
+                logger.exception("Batched generation failed for %d prompts", len(batch))
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _render(self, prompt):
+        if self.use_chat_template:
+            return self.tokenizer.apply_chat_template(
+                [{"role": "user", "content": prompt}], tokenize=False, add_generation_prompt=True
+            )
+        return prompt
+
+    def _generate_batch(self, batch):
+        started = time.perf_counter()
+        for request in batch:
+            QUEUE_SECONDS.observe(started - request.enqueued)
+        BATCH_SIZE.observe(len(batch))
+
+        inputs = self.tokenizer(
+            [self._render(r.prompt) for r in batch],
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=self.max_input_length
+        ).to(self.model.device)
+
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=max(r.max_new_tokens for r in batch),
+                repetition_penalty=self.repetition_penalty,
+                do_sample=False,
+                use_cache=True,
+                pad_token_id=self.tokenizer.pad_token_id
+            )
+
+        prompt_length = len(inputs["input_ids"][0])
+        for i, request in enumerate(batch):
+            tokens = outputs[i] if self.is_encoder_decoder else outputs[i][prompt_length:]
+            GENERATED_TOKENS.inc(len(tokens))
+            text = self.tokenizer.decode(tokens, skip_special_tokens=True)
+            request.future.set_result(_apply_stop(text, request.stop))
+
+
+class BatchedHuggingFaceLLM(LLM):
+    """LangChain LLM backed by a shared BatchingGenerator."""
+    bounds_concurrency: ClassVar[bool] = True
+    generator: Any = None
+    model_id: str = ""
+    timeout: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "huggingface-batched"
+
+    @property
+    def _identifying_params(self):
+        # Part of the completion cache key: model and generation settings
+        return {
+            "model_id": self.model_id,
+            "max_new_tokens": getattr(self.generator, "max_new_tokens", None),
+            "repetition_penalty": getattr(self.generator, "repetition_penalty", None),
+        }
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        return self.generator.generate(prompt, stop=stop, timeout=self.timeout)
@@ -0,0 +1,191 @@
+"""
+Index suggestions for the query shapes the agent actually produces.
+
+For the top fingerprints in QueryStats the last executed statement is
+EXPLAINed (SQLite, MySQL and PostgreSQL plans are understood) to find full
+table scans. The statement is parsed with sqlglot for the columns it filters,
+joins, groups and sorts on, and a table that is scanned although the query
+filters or joins on columns no existing index starts with gets a
+`CREATE INDEX` suggestion: equality columns first, then one range column,
+then sort columns. Nothing is created; the statements are for a DBA to review.
+"""
+import re
+
+import sqlglot
+from sqlalchemy import inspect, text
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from src.logger import get_logger
+from src.sql_validator import DIALECTS
+
+logger = get_logger("index_advisor")
+
+EQUALITY = (exp.EQ, exp.In)
+RANGE = tuple(getattr(exp, name) for name in ("GT", "GTE", "LT", "LTE", "Between", "Like") if hasattr(exp, name))
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?")
+POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)(?: (\w+))?")
+MAX_INDEX_COLUMNS = 3
+
+
+def _column_ref(node, aliases, catalog):
+    """(table, column) of a column reference, resolved through aliases or the catalogue; None if ambiguous."""
+    if not isinstance(node, exp.Column) or not node.name:
+        return None
+    column = node.name.lower()
+    if node.table:
+        table = aliases.get(node.table.lower())
+        return (table, column) if table else None
+    tables = set(aliases.values())
+    owners = [t for t in tables if column in catalog.get(t, ())]
+    if len(owners) == 1:
+        return owners[0], column
+    if len(tables) == 1 and not owners:
+        return next(iter(tables)), column
+    return None
+
+
+def table_aliases(tree):
+    """{alias or name: table name}, lower-cased."""
+    aliases = {}
+    for table in tree.find_all(exp.Table):
+        aliases[(table.alias or table.name).lower()] = table.name.lower()
+        aliases.setdefault(table.name.lower(), table.name.lower())
+    return aliases
+
+
+def query_columns(tree, catalog):
+    """
+    {table: {"eq": [...], "range": [...], "join": [...], "sort": [...]}} of the
+    columns a parsed query compares with values, joins on, groups and orders by.
+    """
+    aliases = table_aliases(tree)
+    usage = {}
+
+    def add(kind, node):
+        ref = _column_ref(node, aliases, catalog)
+        if ref is not None:
+            columns = usage.setdefault(ref[0], {"eq": [], "range": [], "join": [], "sort": []})[kind]
+            if ref[1] not in columns:
+                columns.append(ref[1])
+
+    for clause in list(tree.find_all(exp.Where)) + [j.args.get("on") for j in tree.find_all(exp.Join)]:
+        if clause is None:
+            continue
+        for predicate in clause.find_all(*EQUALITY, *RANGE):
+            if isinstance(predicate, exp.EQ) and isinstance(predicate.expression, exp.Column):
+                # column = column: a join condition, useful for the table probed in the join loop
+                add("join", predicate.this)
+                add("join", predicate.expression)
+            else:
+                add("eq" if isinstance(predicate, EQUALITY) else "range", predicate.this)
+    for clause in list(tree.find_all(exp.Group)) + list(tree.find_all(exp.Order)):
+        for column in clause.find_all(exp.Column):
+            add("sort", column)
+    return usage
+
+
+class IndexAdvisor:
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def _explain(self, connection, dialect, sql):
+        """(plan lines, full-scanned table names or aliases); (None, None) when the dialect is not supported."""
+        if dialect == "sqlite":
+            rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+            lines = [row[-1] for row in rows]
+            scans = []
+            for line in lines:
+                match = SQLITE_SCAN.match(line)
+                if match and "USING" not in line:
+                    scans.append(match.group(2) or match.group(1))
+            return lines, scans
+        if dialect == "mysql":
+            result = connection.execute(text(f"EXPLAIN {sql}"))
+            rows = [dict(row._mapping) for row in result]
+            lines = [f"{r.get('table')}: type={r.get('type')} key={r.get('key')} rows={r.get('rows')}" for r in rows]
+            return lines, [r["table"] for r in rows if r.get("type") == "ALL" and r.get("table")]
+        if dialect == "postgresql":
+            lines = [row[0] for row in connection.execute(text(f"EXPLAIN {sql}")).fetchall()]
+            scans = []
+            for line in lines:
+                match = POSTGRES_SCAN.search(line)
+                if match:
+                    scans.append(match.group(2) or match.group(1))
+            return lines, scans
+        return None, None
+
+    @staticmethod
+    def _leading_columns(inspector, table):
+        """First columns of the table's existing indexes and primary key."""
+        leading = set()
+        try:
+            for index in inspector.get_indexes(table):
+                if index.get("column_names") and index["column_names"][0]:
+                    leading.add(index["column_names"][0].lower())
+            primary = inspector.get_pk_constraint(table).get("constrained_columns") or []
+            if primary:
+                leading.add(primary[0].lower())
+        except Exception as e:
+            logger.debug("Could not read indexes of %s: %s", table, e)
+        return leading
+
+    def analyse(self, sql):
+        """Plan, full scans and index suggestions for one statement."""
+        engine = self.db_manager.engine_for("schema")
+        dialect = engine.dialect.name
+        catalog = self.db_manager.get_schema_catalog()
+        try:
+            tree = sqlglot.parse_one(sql, read=DIALECTS.get(dialect, dialect))
+        except ParseError as e:
+            return {"plan": None, "full_scans": [], "suggestions": [], "error": f"Could not parse query: {e}"}
+        usage = query_columns(tree, catalog)
+        aliases = table_aliases(tree)
+
+        with self.db_manager.connect("schema") as connection:
+            plan, scans = self._explain(connection, dialect, sql)
+        scanned = sorted({aliases.get(s.lower(), s.lower()) for s in scans}) if scans is not None else None
+
+        inspector = inspect(engine)
+        suggestions = []
+        # Without a plan every table with filter columns is a candidate
+        for table in (scanned if scanned is not None else sorted(usage)):
+            columns = usage.get(table)
+            if not columns or not (columns["eq"] or columns["range"] or columns["join"]):
+                continue
+            # Filters first; a table that is only joined needs its join columns indexed
+            chosen = list(columns["eq"]) or list(columns["join"])
+            if columns["range"]:
+                chosen.append(columns["range"][0])
+            else:
+                chosen.extend(c for c in columns["sort"] if c not in chosen)
+            chosen = chosen[:MAX_INDEX_COLUMNS]
+            if chosen[0] in self._leading_columns(inspector, table):
+                continue
+            suggestions.append({
+                "table": table,
+                "columns": chosen,
+                "statement": f"CREATE INDEX ix_{table}_{'_'.join(chosen)} ON {table} ({', '.join(chosen)})",
+                "reason": ("full scan in the plan" if scanned is not None else "no plan available")
+                          + f"; filtered or joined on {', '.join(columns['eq'] + columns['range'] + columns['join'])}",
+            })
+        return {"plan": plan, "full_scans": scanned or [], "suggestions": suggestions}
+
+    def advise(self, limit=5, order_by="total_seconds"):
+        """Index suggestions for the `limit` top SELECT fingerprints of DBManager.query_stats."""
+        stats = self.db_manager.query_stats
+        advice = []
+        for entry in stats.top(limit=stats.max_fingerprints, order_by=order_by):
+            if len(advice) >= limit:
+                break
+            if not entry["fingerprint"].startswith(("select", "with")):
+                continue
+            sql = stats.example(entry["fingerprint"])
+            if sql is None:
+                continue
+            try:
+                analysis = self.analyse(sql.strip().rstrip(";"))
+            except Exception as e:
+                analysis = {"plan": None, "full_scans": [], "suggestions": [], "error": str(e)}
+            advice.append({**entry, **analysis})
+        return advice
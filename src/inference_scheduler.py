@@ -0,0 +1,179 @@
+"""
+Admission and ordering of generations on the local LLM backends.
+
+A bounded priority queue sits in front of the shared model object: at most
+`max_parallel` generations run at once, interactive `/ask` traffic is served
+before report formatting and batch work, and a request is rejected up front
+when its estimated queue wait would exceed the SLA.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, ClassVar, List, Optional
+
+from langchain_core.language_models.llms import LLM
+
+from src import metrics
+
+PRIORITIES = {"interactive": 0, "report": 1, "batch": 2}
+DEFAULT_PRIORITY = "interactive"
+
+QUEUE_SECONDS = metrics.REGISTRY.histogram(
+    "dbllm_llm_queue_seconds", "Time a generation waited for a scheduler slot", ("priority",)
+)
+QUEUE_DEPTH = metrics.REGISTRY.gauge(
+    "dbllm_llm_queue_depth", "Generations waiting for a scheduler slot"
+)
+ACTIVE = metrics.REGISTRY.gauge(
+    "dbllm_llm_active_generations", "Generations currently running on the local model"
+)
+REJECTED = metrics.REGISTRY.counter(
+    "dbllm_llm_rejected_total", "Generations rejected by the scheduler", ("priority", "reason")
+)
+
+_current_priority = contextvars.ContextVar("dbllm_llm_priority", default=DEFAULT_PRIORITY)
+
+
+@contextlib.contextmanager
+def priority_scope(priority):
+    """Marks every LLM call made inside the block with `priority`."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority():
+    return _current_priority.get()
+
+
+class SchedulerRejected(Exception):
+    """Raised when a generation cannot be admitted; maps to HTTP 429."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InferenceScheduler:
+    def __init__(self, max_parallel=1, max_queue=32, sla_seconds=60.0, initial_service_seconds=5.0):
+        self.max_parallel = max(1, max_parallel)
+        self.max_queue = max_queue
+        self.sla_seconds = sla_seconds
+        self._avg_service = initial_service_seconds
+        self._active = 0
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def _estimated_wait(self, rank):
+        """Rough wait for a request with `rank` requests queued ahead of it."""
+        if self._active < self.max_parallel and rank == 0:
+            return 0.0
+        return (rank // self.max_parallel + 1) * self._avg_service
+
+    def acquire(self, priority=None):
+        priority = priority or current_priority()
+        level = PRIORITIES.get(priority, PRIORITIES["batch"])
+        enqueued = time.perf_counter()
+
+        with self._cond:
+            ahead = sum(1 for entry in self._heap if entry[0] <= level)
+            estimate = self._estimated_wait(ahead)
+            must_wait = self._active >= self.max_parallel or bool(self._heap)
+            if must_wait and len(self._heap) >= self.max_queue:
+                REJECTED.inc(priority=priority, reason="queue_full")
+                raise SchedulerRejected("LLM queue is full", retry_after=self._avg_service)
+            if must_wait and estimate > self.sla_seconds:
+                REJECTED.inc(priority=priority, reason="sla")
+                raise SchedulerRejected(
+                    f"Estimated LLM queue wait {estimate:.1f}s exceeds {self.sla_seconds:.0f}s",
+                    retry_after=estimate
+                )
+
+            entry = (level, next(self._counter))
+            heapq.heappush(self._heap, entry)
+            QUEUE_DEPTH.set(len(self._heap))
+            while self._active >= self.max_parallel or self._heap[0] is not entry:
+                self._cond.wait()
+            heapq.heappop(self._heap)
+            self._active += 1
+            QUEUE_DEPTH.set(len(self._heap))
+            ACTIVE.set(self._active)
+            # Let the next waiter re-check if there is still a free slot
+            self._cond.notify_all()
+
+        waited = time.perf_counter() - enqueued
+        QUEUE_SECONDS.observe(waited, priority=priority)
+        trace = metrics.current_trace()
+        if trace is not None:
+            trace.record("llm_queue", waited, priority=priority)
+        return time.perf_counter()
+
+    def release(self, started):
+        duration = time.perf_counter() - started
+        with self._cond:
+            self._active -= 1
+            # Exponentially weighted service time drives the wait estimate
+            self._avg_service = 0.8 * self._avg_service + 0.2 * duration
+            ACTIVE.set(self._active)
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, priority=None):
+        started = self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(started)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": len(self._heap),
+                "max_parallel": self.max_parallel,
+                "avg_service_seconds": round(self._avg_service, 3),
+            }
+
+
+def bounds_own_concurrency(llm):
+    """
+    True for models that bound concurrent generations themselves (the scheduler,
+    the batching generator), which need concurrent prompts to fill a batch.
+    """
+    return getattr(llm, "bounds_concurrency", False) is True
+
+
+class ScheduledLLM(LLM):
+    """Wraps a local LangChain LLM so every generation goes through the scheduler."""
+    bounds_concurrency: ClassVar[bool] = True
+    inner: Any = None
+    scheduler: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled-{getattr(self.inner, '_llm_type', 'llm')}"
+
+    @property
+    def _identifying_params(self):
+        # The completion cache keys on these: the wrapped model's path/id and generation settings
+        params = dict(getattr(self.inner, "_identifying_params", None) or {})
+        if not params and getattr(self.inner, "llm", None) is not None:
+            # Chat wrappers such as ChatHuggingFace identify through the model they wrap
+            params = dict(getattr(self.inner.llm, "_identifying_params", None) or {})
+        return params
+
+    @property
+    def client(self):
+        # Exposes the llama.cpp client (prefix cache priming) through the wrapper
+        return getattr(self.inner, "client", None)
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        with self.scheduler.slot():
+            response = self.inner.invoke(prompt, stop=stop)
+        return response.content if hasattr(response, "content") else str(response)
@@ -0,0 +1,69 @@
+"""
+Embedding-based intent classification.
+
+Reuses the question embedding that OracleBot.ask already computes and
+compares it with a few prototype utterances, so greetings and chit-chat can
+be answered without building a SQL agent.
+"""
+import math
+import threading
+
+from src import metrics
+
+CHAT_EXAMPLES = [
+    "hi", "hello", "hey there", "good morning", "good evening",
+    "thanks", "thank you very much", "how are you?", "who are you?",
+    "what can you do?", "bye", "see you later", "ok great",
+]
+
+DATA_EXAMPLES = [
+    "how many students are there", "show attendance for 2024-01-05",
+    "list all teachers", "what is the total sales amount",
+    "which class has the most students", "average salary by department",
+    "show me the records from last month", "count rows in the orders table",
+]
+
+INTENTS = metrics.REGISTRY.counter(
+    "dbllm_intents_total", "Questions by detected intent", ("intent",)
+)
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class IntentClassifier:
+    """Nearest-prototype classifier over sentence embeddings."""
+
+    def __init__(self, embed_documents, threshold=0.6, margin=0.05):
+        self._embed_documents = embed_documents
+        self.threshold = threshold
+        self.margin = margin
+        self._chat = None
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _prototypes(self):
+        if self._chat is None:
+            with self._lock:
+                if self._chat is None:
+                    vectors = self._embed_documents(CHAT_EXAMPLES + DATA_EXAMPLES)
+                    vectors = [_normalize(v) for v in vectors]
+                    self._data = vectors[len(CHAT_EXAMPLES):]
+                    self._chat = vectors[:len(CHAT_EXAMPLES)]
+        return self._chat, self._data
+
+    def classify(self, vector):
+        """Returns ('chat' | 'data', best chat similarity)."""
+        chat, data = self._prototypes()
+        query = _normalize(vector)
+        chat_score = max(_dot(query, p) for p in chat)
+        data_score = max(_dot(query, p) for p in data)
+        intent = "chat" if chat_score >= self.threshold and chat_score >= data_score + self.margin else "data"
+        INTENTS.inc(intent=intent)
+        return intent, chat_score
@@ -0,0 +1,67 @@
+"""
+Prompt-prefix KV state cache for the llama.cpp backend.
+
+llama-cpp-python looks up the cache with the prompt tokens before every
+completion; the longest cached prefix is restored and only the remaining
+suffix is prefilled. After each completion the evaluated state is stored
+again. Entries are evicted LRU once the RAM budget is exceeded.
+"""
+try:
+    from llama_cpp import LlamaRAMCache
+except ImportError:
+    # llama-cpp-python is only installed for LLM_TYPE=llamacpp; callers check for None
+    LlamaRAMCache = None
+
+from src import metrics
+from src.logger import get_logger
+
+logger = get_logger("llama_cache")
+
+CACHE_LOOKUPS = metrics.REGISTRY.counter(
+    "dbllm_llamacpp_prefix_cache_lookups_total", "Prefix state cache lookups", ("result",)
+)
+TOKENS_REUSED = metrics.REGISTRY.counter(
+    "dbllm_llamacpp_prefix_tokens_reused_total", "Prompt tokens restored from cache instead of prefilled"
+)
+CACHE_BYTES = metrics.REGISTRY.gauge(
+    "dbllm_llamacpp_prefix_cache_bytes", "Bytes held by the prefix state cache"
+)
+
+
+def _common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class PrefixStateCache(LlamaRAMCache or object):
+    """LlamaRAMCache with hit/miss metrics and explicit priming of static prefixes."""
+
+    def __getitem__(self, key):
+        try:
+            state = super().__getitem__(key)
+        except KeyError:
+            CACHE_LOOKUPS.inc(result="miss")
+            raise
+        reused = _common_prefix(state.input_ids.tolist(), key)
+        CACHE_LOOKUPS.inc(result="hit" if reused else "miss")
+        TOKENS_REUSED.inc(reused)
+        return state
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        CACHE_BYTES.set(self.cache_size)
+
+    def prime(self, llama, text):
+        """Evaluates `text` once and stores its state, so later prompts sharing it skip that prefill."""
+        tokens = llama.tokenize(text.encode("utf-8"))
+        if not tokens:
+            return 0
+        llama.reset()
+        llama.eval(tokens)
+        self[tokens] = llama.save_state()
+        logger.info("Primed llama.cpp prefix cache with %d tokens", len(tokens))
+        return len(tokens)
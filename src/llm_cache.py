@@ -0,0 +1,173 @@
+"""
+Persistent LLM completion cache.
+
+Implements LangChain's BaseCache on top of SQLite so every backend returned
+by LLMManager can use it through the model's `cache` field. Entries are keyed
+by a hash of the LLM string (model id + generation params + stop) and the
+prompt, capped in total size and evicted least-recently-used first.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+from src import metrics
+from src.logger import get_logger
+
+logger = get_logger("llm_cache")
+
+LOOKUPS = metrics.REGISTRY.counter(
+    "dbllm_llm_cache_lookups_total", "LLM completion cache lookups", ("result",)
+)
+CACHE_BYTES = metrics.REGISTRY.gauge(
+    "dbllm_llm_cache_bytes", "Bytes stored in the LLM completion cache"
+)
+
+
+# Hits only refresh LRU bookkeeping; it is written in one transaction per batch
+TOUCH_BATCH = 64
+TOUCH_INTERVAL_SECONDS = 5.0
+
+
+class CompletionCache(BaseCache):
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (last access, hits since the last flush)
+        self._touches = {}
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS completions_lru ON completions(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        CACHE_BYTES.set(self._total_bytes)
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        key = self._key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                LOOKUPS.inc(result="miss")
+                return None
+            _, pending = self._touches.get(key, (0, 0))
+            self._touches[key] = (time.time(), pending + 1)
+            if len(self._touches) >= TOUCH_BATCH or time.monotonic() - self._last_flush >= TOUCH_INTERVAL_SECONDS:
+                self._flush_touches()
+                self._conn.commit()
+            self.hits += 1
+        LOOKUPS.inc(result="hit")
+        try:
+            return loads(row[0])
+        except Exception as e:
+            logger.warning("Discarding unreadable cache entry: %s", e)
+            return None
+
+    def update(self, prompt, llm_string, return_val):
+        value = dumps(return_val)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._touches.pop(key, None)
+            self._flush_touches()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, size, created, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, 0)",
+                (key, value, size, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+            CACHE_BYTES.set(self._total_bytes)
+
+    def _flush_touches(self):
+        """Writes pending hit bookkeeping, without committing. Caller holds the lock."""
+        if self._touches:
+            self._conn.executemany(
+                "UPDATE completions SET last_access = MAX(last_access, ?), hits = hits + ? WHERE key = ?",
+                [(last_access, hits, key) for key, (last_access, hits) in self._touches.items()]
+            )
+            self._touches.clear()
+        self._last_flush = time.monotonic()
+
+    def _evict(self):
+        """Drops least-recently-used entries until the size cap is met. Caller holds the lock."""
+        # Other worker processes write to the same file, so the size is read from the database
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM completions ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    return
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._touches.clear()
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+            self._total_bytes = 0
+            CACHE_BYTES.set(0)
+
+    def stats(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            entries, self._total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_completion_cache(path, max_bytes):
+    """Returns the process-wide cache for `path`, so every LLM shares one connection."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None or _shared_cache.path != path:
+            _shared_cache = CompletionCache(path, max_bytes=max_bytes)
+        return _shared_cache
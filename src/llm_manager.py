@@ -1,20 +1,193 @@
-from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFacePipeline, HuggingFaceEndpoint, ChatHuggingFace
-from langchain_community.llms import LlamaCpp
-from transformers import AutoModelForCausalLM, AutoModelForSeq2SeqLM, AutoTokenizer, pipeline, AutoConfig
-from huggingface_hub import hf_hub_download
-from src.config import Config
-import torch
+import importlib
 import os
+import threading
+from src.config import Config
+from src.logger import get_logger
+
+# Backend libraries are imported on first use, so that e.g. LLM_TYPE=openai
+# never pays for importing torch/transformers/llama_cpp. The names stay
+# module-level so they can be patched in tests.
+ChatOpenAI = None
+HuggingFacePipeline = None
+HuggingFaceEndpoint = None
+ChatHuggingFace = None
+LlamaCpp = None
+AutoModelForCausalLM = None
+AutoModelForSeq2SeqLM = None
+AutoTokenizer = None
+AutoConfig = None
+pipeline = None
+hf_hub_download = None
+torch = None
+
+_LAZY_IMPORTS = {
+    "ChatOpenAI": ("langchain_openai", "ChatOpenAI"),
+    "HuggingFacePipeline": ("langchain_huggingface", "HuggingFacePipeline"),
+    "HuggingFaceEndpoint": ("langchain_huggingface", "HuggingFaceEndpoint"),
+    "ChatHuggingFace": ("langchain_huggingface", "ChatHuggingFace"),
+    "LlamaCpp": ("langchain_community.llms", "LlamaCpp"),
+    "AutoModelForCausalLM": ("transformers", "AutoModelForCausalLM"),
+    "AutoModelForSeq2SeqLM": ("transformers", "AutoModelForSeq2SeqLM"),
+    "AutoTokenizer": ("transformers", "AutoTokenizer"),
+    "AutoConfig": ("transformers", "AutoConfig"),
+    "pipeline": ("transformers", "pipeline"),
+    "hf_hub_download": ("huggingface_hub", "hf_hub_download"),
+    "torch": ("torch", None),
+}
+
+_BACKEND_IMPORTS = {
+    "openai": ["ChatOpenAI"],
+    "huggingface": [
+        "HuggingFacePipeline", "AutoModelForCausalLM", "AutoModelForSeq2SeqLM",
+        "AutoTokenizer", "AutoConfig", "pipeline", "torch"
+    ],
+    "huggingface_api": ["HuggingFaceEndpoint", "ChatHuggingFace"],
+    "llamacpp": ["LlamaCpp", "hf_hub_download"],
+}
+
+_import_lock = threading.Lock()
+
+LOCAL_LLM_TYPES = ("huggingface", "llamacpp")
+
+
+def _ensure_backend_imports(llm_type):
+    """Imports the libraries a backend needs into module globals, once."""
+    g = globals()
+    with _import_lock:
+        for name in _BACKEND_IMPORTS.get(llm_type, []):
+            if g.get(name) is None:
+                module_name, attr = _LAZY_IMPORTS[name]
+                module = importlib.import_module(module_name)
+                g[name] = getattr(module, attr) if attr else module
+
+logger = get_logger("llm_manager")
 
 class LLMManager:
     def __init__(self, llm_type=None, model_name=None):
         self.llm_type = llm_type if llm_type else Config.LLM_TYPE
         self.api_key = Config.LLM_API_KEY
         self.base_url = Config.LLM_BASE_URL
-        self.model_name = model_name if model_name else (Config.HF_MODEL_ID if self.llm_type in ["huggingface", "huggingface_api"] else Config.LLM_MODEL)
+        if model_name:
+            self.model_name = model_name
+        elif self.llm_type in ["huggingface", "huggingface_api"]:
+            self.model_name = Config.HF_MODEL_ID
+        elif self.llm_type == "llamacpp":
+            # A GGUF file path, or "<repo>/<file>" on the Hugging Face hub
+            self.model_name = Config.LOCAL_MODEL_PATH or f"{Config.HF_GGUF_REPO}/{Config.HF_GGUF_FILE}"
+        else:
+            self.model_name = Config.LLM_MODEL
+        self.scheduler = None
+        self.cache = None
+        self._tier_llms = {}
+        self._tier_lock = threading.Lock()
+        # Physical model -> loaded LLM, and the once-guards of loads in progress
+        self._models = {}
+        self._loading = {}
+
+    def _model_key(self):
+        """Identifies the physical model; tiers resolving to the same one share its instance and scheduler."""
+        if self.llm_type in LOCAL_LLM_TYPES:
+            return self.llm_type, self.model_name
+        return self.llm_type, self.model_name, self.base_url
+
+    def get_llm_for(self, tier):
+        """Returns the model of a named tier from LLM_TIERS (created once), or None if not configured."""
+        spec = Config.LLM_TIERS.get(tier)
+        if not spec:
+            return None
+        with self._tier_lock:
+            llm = self._tier_llms.get(tier)
+        if llm is None:
+            manager = LLMManager(llm_type=spec.get("type", self.llm_type), model_name=spec.get("model"))
+            manager.base_url = spec.get("base_url", manager.base_url)
+            manager.api_key = spec.get("api_key", manager.api_key)
+            llm = self._load(manager, f"'{tier}' tier")
+            with self._tier_lock:
+                self._tier_llms[tier] = llm
+        return llm
 
     def get_llm(self):
+        """The model of this manager's backend, created once and shared with tiers that resolve to it."""
+        return self._load(self, "default model")
+
+    def _load(self, manager, label):
+        """Builds `manager`'s model once per physical model, outside _tier_lock so other tiers stay available."""
+        key = manager._model_key()
+        with self._tier_lock:
+            if key in self._models:
+                return self._models[key]
+            once = self._loading.setdefault(key, threading.Lock())
+        with once:
+            with self._tier_lock:
+                if key in self._models:
+                    return self._models[key]
+            logger.info("Loading %s: %s (%s)", label, manager.model_name, manager.llm_type)
+            llm = manager._build_llm()
+            with self._tier_lock:
+                self._models[key] = llm
+                self._loading.pop(key, None)
+        return llm
+
+    def _build_llm(self):
+        llm = self._create_llm()
+        if self.llm_type in LOCAL_LLM_TYPES and Config.LLM_SCHEDULER:
+            # Local models are shared objects: bound parallelism and order calls by priority
+            from src.inference_scheduler import InferenceScheduler, ScheduledLLM
+            self.scheduler = InferenceScheduler(
+                max_parallel=self._max_parallel(),
+                max_queue=Config.LLM_MAX_QUEUE,
+                sla_seconds=Config.LLM_QUEUE_SLA_SECONDS
+            )
+            llm = ScheduledLLM(inner=llm, scheduler=self.scheduler)
+
+        if Config.LLM_CACHE_PATH and (Config.LLM_CACHE_SAMPLED or self._greedy(llm)):
+            # Identical prompts for the same model and params are answered from disk.
+            # Set on the outermost model so cache hits skip the scheduler queue as well.
+            from src.llm_cache import get_completion_cache
+            self.cache = get_completion_cache(Config.LLM_CACHE_PATH, Config.LLM_CACHE_MAX_MB * 1024 * 1024)
+            try:
+                llm.cache = self.cache
+            except Exception as e:
+                logger.warning("LLM completion cache not supported by %s: %s", type(llm).__name__, e)
+        return llm
+
+    def _greedy(self, llm):
+        """Whether the model decodes deterministically, so a stored completion is the one it would give again."""
+        if Config.MODEL_SERVER_ADDRESS and self.llm_type in LOCAL_LLM_TYPES:
+            # RemoteLLM: the sidecar builds the same backend from the same settings
+            return self.llm_type == "llamacpp" or (self.llm_type == "huggingface" and Config.HF_BATCHING)
+        while llm is not None:
+            temperature = getattr(llm, "temperature", None)
+            if temperature is not None:
+                return temperature == 0
+            if getattr(llm, "generator", None) is not None:
+                # BatchedHuggingFaceLLM decodes with do_sample=False
+                return True
+            pipe = getattr(llm, "pipeline", None)
+            if pipe is not None:
+                return not getattr(getattr(pipe.model, "generation_config", None), "do_sample", False)
+            # Look through ScheduledLLM / ChatHuggingFace to the model that samples
+            llm = getattr(llm, "inner", None) or getattr(llm, "llm", None)
+        return False
+
+    def _max_parallel(self):
+        if self.llm_type == "llamacpp":
+            # A single llama.cpp context cannot run two generations at once
+            return 1
+        if Config.HF_BATCHING and not Config.MODEL_SERVER_ADDRESS:
+            # Let enough requests through for the batcher to fill a batch
+            return max(Config.LLM_MAX_PARALLEL, Config.HF_MAX_BATCH_SIZE)
+        return Config.LLM_MAX_PARALLEL
+
+    def _create_llm(self):
+        if Config.MODEL_SERVER_ADDRESS and self.llm_type in LOCAL_LLM_TYPES:
+            # Multi-worker mode: the local model lives in the shared sidecar process
+            from src.model_server import RemoteLLM
+            logger.info("Forwarding %s inference to model server at %s", self.llm_type, Config.MODEL_SERVER_ADDRESS)
+            return RemoteLLM(address=Config.MODEL_SERVER_ADDRESS, model_name=self.model_name)
+
+        _ensure_backend_imports(self.llm_type)
+
         if self.llm_type == "openai":
             return ChatOpenAI(
                 model=self.model_name,
@@ -23,7 +196,7 @@ class LLMManager:
                 temperature=0
             )
         elif self.llm_type == "huggingface":
-            print(f"Loading Hugging Face model locally: {self.model_name}...")
+            logger.info("Loading Hugging Face model locally: %s...", self.model_name)
 
             try:
                 hf_config = AutoConfig.from_pretrained(self.model_name, token=Config.HF_TOKEN, trust_remote_code=True)
@@ -40,9 +213,15 @@ class LLMManager:
                 else:
                     task = "text-generation"
 
-            print(f"Detected task: {task}")
+            logger.info("Detected task: %s", task)
             device = 0 if torch.cuda.is_available() else -1
 
+            if Config.HF_TORCH_THREADS:
+                torch.set_num_threads(Config.HF_TORCH_THREADS)
+            elif Config.LLM_MAX_PARALLEL > 1 and not Config.HF_BATCHING:
+                # Parallel generations share the cores instead of each claiming all of them
+                torch.set_num_threads(max(1, (os.cpu_count() or 4) // Config.LLM_MAX_PARALLEL))
+
             tokenizer = AutoTokenizer.from_pretrained(
                 self.model_name,
                 token=Config.HF_TOKEN,
@@ -54,6 +233,9 @@ class LLMManager:
                 "token": Config.HF_TOKEN,
                 "trust_remote_code": True
             }
+            if Config.HF_TORCH_DTYPE:
+                dtype = Config.HF_TORCH_DTYPE
+                model_kwargs["torch_dtype"] = dtype if dtype == "auto" else getattr(torch, dtype)
 
             if task == "text2text-generation":
                 model = AutoModelForSeq2SeqLM.from_pretrained(
@@ -67,7 +249,25 @@ class LLMManager:
                 )
 
             if hasattr(model, 'config'):
-                model.config.use_cache = False
+                # Keep the KV cache so each new token does not recompute attention over the prompt
+                model.config.use_cache = True
+
+            if Config.HF_BATCHING:
+                from src.hf_batching import BatchedHuggingFaceLLM, BatchingGenerator
+                if device == 0:
+                    model = model.to("cuda")
+                generator = BatchingGenerator(
+                    model,
+                    tokenizer,
+                    max_batch_size=Config.HF_MAX_BATCH_SIZE,
+                    max_wait_ms=Config.HF_BATCH_WAIT_MS,
+                    max_new_tokens=256,
+                    repetition_penalty=1.1,
+                    max_input_length=max(Config.HF_MAX_LENGTH, 2048),
+                    use_chat_template=(task == "conversational")
+                )
+                logger.info("Using batched generation (max batch %d, wait %dms)", Config.HF_MAX_BATCH_SIZE, Config.HF_BATCH_WAIT_MS)
+                return BatchedHuggingFaceLLM(generator=generator, model_id=self.model_name)
 
             pipe = pipeline(
                 task,
@@ -82,10 +282,10 @@ class LLMManager:
             return HuggingFacePipeline(pipeline=pipe)
 
         elif self.llm_type == "huggingface_api":
-            print(f"Using Hugging Face Inference API for model: {self.model_name}...")
+            logger.info("Using Hugging Face Inference API for model: %s...", self.model_name)
 
             if not Config.HF_TOKEN:
-                print("Warning: HF_TOKEN not provided. API calls will likely fail.")
+                logger.warning("HF_TOKEN not provided. API calls will likely fail.")
 
             # Use conversational task by default for Chat/Instruct models if not specified
             # This fixes the error where providers like Novita require 'conversational'
@@ -96,7 +296,7 @@ class LLMManager:
                 else:
                     task = "text-generation"
 
-            print(f"Using task: {task}")
+            logger.info("Using task: %s", task)
 
             llm = HuggingFaceEndpoint(
                 repo_id=self.model_name,
@@ -114,20 +314,26 @@ class LLMManager:
             return llm
 
         elif self.llm_type == "llamacpp":
-            model_path = Config.LOCAL_MODEL_PATH
+            model_path = self.model_name
 
-            if not model_path:
-                print(f"Downloading GGUF model from {Config.HF_GGUF_REPO}...")
+            if model_path != Config.LOCAL_MODEL_PATH and not os.path.exists(model_path):
+                if model_path == f"{Config.HF_GGUF_REPO}/{Config.HF_GGUF_FILE}":
+                    repo_id, filename = Config.HF_GGUF_REPO, Config.HF_GGUF_FILE
+                else:
+                    # "<org>/<repo>/<file in repo>" on the Hugging Face hub
+                    parts = model_path.split("/")
+                    repo_id, filename = "/".join(parts[:2]), "/".join(parts[2:])
+                logger.info("Downloading GGUF model from %s...", repo_id)
                 model_path = hf_hub_download(
-                    repo_id=Config.HF_GGUF_REPO,
-                    filename=Config.HF_GGUF_FILE,
+                    repo_id=repo_id,
+                    filename=filename,
                     token=Config.HF_TOKEN
                 )
-                print(f"Model downloaded to: {model_path}")
+                logger.info("Model downloaded to: %s", model_path)
 
-            print(f"Loading LlamaCpp model from: {model_path}")
+            logger.info("Loading LlamaCpp model from: %s", model_path)
 
-            return LlamaCpp(
+            llm = LlamaCpp(
                 model_path=model_path,
                 n_ctx=32768,
                 n_data=64,
@@ -136,5 +342,15 @@ class LLMManager:
                 verbose=False
                # stop=["Observation:", "\nObservation:"]
             )
+
+            if Config.LLAMACPP_PREFIX_CACHE_MB > 0 and getattr(llm, "client", None) is not None:
+                # Restore the evaluated KV state of shared prompt prefixes instead of re-prefilling them
+                from src.llama_cache import LlamaRAMCache, PrefixStateCache
+                if LlamaRAMCache is None:
+                    logger.warning("llama_cpp.LlamaRAMCache not available, prompt prefix cache disabled")
+                else:
+                    llm.client.set_cache(PrefixStateCache(capacity_bytes=Config.LLAMACPP_PREFIX_CACHE_MB * 1024 * 1024))
+
+            return llm
         else:
             raise ValueError(f"Unsupported LLM type: {self.llm_type}")
@@ -0,0 +1,131 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+from src.config import Config
+
+
+ROOT_LOGGER = "dbllm"
+
+_lock = threading.Lock()
+_listeners = []
+_file_loggers = {}
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Renders a record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _RawJsonFormatter(logging.Formatter):
+    """Writes the `fields` payload only, for the offline-analysis request log."""
+
+    def format(self, record):
+        return json.dumps(getattr(record, "fields", {}), default=str)
+
+
+def _start_listener(handler):
+    """Puts `handler` behind a queue so request threads never block on I/O."""
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return logging.handlers.QueueHandler(log_queue)
+
+
+def _stop_listeners():
+    for listener in _listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+    _listeners.clear()
+
+
+atexit.register(_stop_listeners)
+
+
+def setup_logging():
+    """Configures the application logger once. Safe to call repeatedly."""
+    global _configured
+    with _lock:
+        if _configured:
+            return
+        stream_handler = logging.StreamHandler()
+        if Config.LOG_FORMAT == "json":
+            stream_handler.setFormatter(JsonFormatter())
+        else:
+            stream_handler.setFormatter(
+                logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+            )
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(Config.LOG_LEVEL)
+        root.addHandler(_start_listener(stream_handler))
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name):
+    setup_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def get_file_logger(name, path, json_lines=False):
+    """
+    Returns a logger writing to a rotating file through a background queue.
+    One logger is kept per path so repeated calls are cheap.
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        logger = _file_loggers.get(path)
+        if logger is not None:
+            return logger
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=Config.LOG_MAX_BYTES,
+            backupCount=Config.LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+        file_handler.setFormatter(_RawJsonFormatter() if json_lines else logging.Formatter("%(message)s"))
+
+        logger = logging.getLogger(f"{ROOT_LOGGER}.file.{name}.{len(_file_loggers)}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(_start_listener(file_handler))
+        _file_loggers[path] = logger
+        return logger
+
+
+def log_request(**fields):
+    """Appends one record to the JSONL request log."""
+    if not Config.REQUEST_LOG_PATH:
+        return
+    fields.setdefault("ts", datetime.now(timezone.utc).isoformat())
+    get_file_logger("requests", Config.REQUEST_LOG_PATH, json_lines=True).info(
+        "request", extra={"fields": fields}
+    )
@@ -1,4 +1,5 @@
 import sys
+import threading
 from db_manager import DBManager
 from llm_manager import LLMManager
 from oracle_bot import OracleBot
@@ -27,7 +28,8 @@ def main():
         print("\nResult:")
         print(result_dict["answer"])
     else:
-        # Interactive mode
+        # Interactive mode: load models while the user types the first question
+        threading.Thread(target=bot.warm_up, daemon=True).start()
         print("Enter your queries (type 'exit' to quit):")
         while True:
             try:
@@ -0,0 +1,357 @@
+import contextvars
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config import Config
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = []
+    for name, value in zip(labelnames, values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        lines = []
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative bucket histogram in the Prometheus exposition format."""
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labelnames + ("le",), key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {total}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric of the process and renders the `/metrics` payload."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "dbllm_stage_duration_seconds", "Duration of each stage of OracleBot.ask", ("stage",)
+)
+REQUESTS_TOTAL = REGISTRY.counter(
+    "dbllm_requests_total", "Questions answered, by route taken", ("route",)
+)
+LLM_TOKENS_TOTAL = REGISTRY.counter(
+    "dbllm_llm_tokens_total", "Tokens reported by the LLM backend", ("kind",)
+)
+SQL_ROWS_TOTAL = REGISTRY.counter(
+    "dbllm_sql_rows_total", "Rows returned by executed SQL statements"
+)
+AGENT_ITERATIONS = REGISTRY.histogram(
+    "dbllm_agent_iterations", "Agent iterations per question", buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+)
+
+
+# -------------------------------
+# Per-request tracing
+# -------------------------------
+
+class _NullSpan:
+    """Shared no-op span used when no trace is active."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.trace.record(self.name, time.perf_counter() - self.start, **self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class RequestTrace:
+    """Collects timed spans for a single call to OracleBot.ask."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []
+        self.route = None
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.agent_iterations = 0
+        self.sql_rows = 0
+        self._lock = threading.Lock()
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def record(self, name, duration, **attrs):
+        with self._lock:
+            self.spans.append({"name": name, "ms": round(duration * 1000, 3), **attrs})
+        STAGE_SECONDS.observe(duration, stage=name)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def to_dict(self):
+        return {
+            "route": self.route,
+            "total_ms": round(self.elapsed() * 1000, 3),
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "agent_iterations": self.agent_iterations,
+            "sql_rows": self.sql_rows,
+            "spans": list(self.spans),
+        }
+
+
+_current_trace = contextvars.ContextVar("dbllm_current_trace", default=None)
+
+
+def start_trace():
+    """Starts a trace for the current context. Returns (trace, token), trace is None when disabled."""
+    if not Config.METRICS_ENABLED:
+        return None, None
+    trace = RequestTrace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(trace, token):
+    if trace is None:
+        return
+    _current_trace.reset(token)
+    STAGE_SECONDS.observe(trace.elapsed(), stage="total")
+    REQUESTS_TOTAL.inc(route=trace.route or "unknown")
+    if trace.agent_iterations:
+        AGENT_ITERATIONS.observe(trace.agent_iterations)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def span(name, **attrs):
+    """Times a block against the active trace; a shared no-op when tracing is off."""
+    trace = _current_trace.get()
+    if trace is None:
+        return NULL_SPAN
+    return Span(trace, name, attrs)
+
+
+def record_sql(duration, rows):
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    with trace._lock:
+        trace.sql_rows += rows
+    trace.record("sql_execute", duration, rows=rows)
+    SQL_ROWS_TOTAL.inc(rows)
+
+
+# -------------------------------
+# LangChain callback
+# -------------------------------
+
+def _token_usage(response):
+    """Extracts (prompt, completion) token counts from an LLMResult, if the backend reports them."""
+    usage = (response.llm_output or {}).get("token_usage") if response.llm_output else None
+    if usage:
+        return usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0
+
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            metadata = getattr(message, "usage_metadata", None) if message is not None else None
+            if metadata:
+                prompt_tokens += metadata.get("input_tokens", 0) or 0
+                completion_tokens += metadata.get("output_tokens", 0) or 0
+    return prompt_tokens, completion_tokens
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Records LLM calls, token counts and agent iterations into a RequestTrace."""
+
+    def __init__(self, trace):
+        self.trace = trace
+        self._llm_starts = {}
+        self._iteration_start = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id=None, **kwargs):
+        self._llm_starts[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id=None, **kwargs):
+        self._llm_starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs):
+        start = self._llm_starts.pop(run_id, None)
+        if start is None:
+            return
+        prompt_tokens, completion_tokens = _token_usage(response)
+        with self.trace._lock:
+            self.trace.llm_calls += 1
+            self.trace.prompt_tokens += prompt_tokens
+            self.trace.completion_tokens += completion_tokens
+        self.trace.record(
+            "llm_call", time.perf_counter() - start,
+            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        LLM_TOKENS_TOTAL.inc(prompt_tokens, kind="prompt")
+        LLM_TOKENS_TOTAL.inc(completion_tokens, kind="completion")
+
+    def on_llm_error(self, error, *, run_id=None, **kwargs):
+        start = self._llm_starts.pop(run_id, None)
+        if start is not None:
+            self.trace.record("llm_call", time.perf_counter() - start, error=type(error).__name__)
+
+    def _end_iteration(self, **attrs):
+        now = time.perf_counter()
+        with self.trace._lock:
+            self.trace.agent_iterations += 1
+            iteration = self.trace.agent_iterations
+        self.trace.record("agent_iteration", now - self._iteration_start, iteration=iteration, **attrs)
+        self._iteration_start = now
+
+    def on_agent_action(self, action, **kwargs):
+        self._end_iteration(tool=getattr(action, "tool", None))
+
+    def on_tool_end(self, output, **kwargs):
+        # The next iteration starts once the observation is available
+        self._iteration_start = time.perf_counter()
+
+    def on_agent_finish(self, finish, **kwargs):
+        self._end_iteration(tool="final_answer")
+
+
+def callbacks_for(trace):
+    """Returns the callbacks list to pass in a LangChain `config` for this trace."""
+    if trace is None:
+        return []
+    return [TraceCallbackHandler(trace)]
@@ -0,0 +1,265 @@
+"""
+Shared model sidecar for multi-worker deployments.
+
+One sidecar process owns the embedding model, the Chroma store and (for the
+local `huggingface` / `llamacpp` backends) the LLM. Stateless API workers
+reach it over a Unix socket through the proxies below, so models are loaded
+once and Chroma has a single writer.
+
+    python -m src.model_server --address /tmp/dbllm-models.sock
+"""
+import argparse
+import contextlib
+import os
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+
+from src.config import Config
+from src.inference_scheduler import bounds_own_concurrency
+from src.logger import get_logger
+
+logger = get_logger("model_server")
+
+LOCAL_LLM_TYPES = ("huggingface", "llamacpp")
+
+COLLECTION_METHODS = {"similarity_search", "similarity_search_by_vector", "add_documents", "get", "delete"}
+
+
+def _authkey():
+    # Shared secret of the sidecar and its workers; run_api.py generates one per start
+    if not Config.MODEL_SERVER_AUTHKEY:
+        raise RuntimeError("MODEL_SERVER_AUTHKEY is not set")
+    return Config.MODEL_SERVER_AUTHKEY.encode()
+
+
+class ModelServer:
+    """Serves embedding, vector store and local LLM calls to API workers."""
+
+    def __init__(self, address, persist_directory="./chroma_db"):
+        self.address = address
+        self.persist_directory = persist_directory
+        self._embeddings = None
+        self._collections = {}
+        self._llm = None
+        self._lock = threading.Lock()
+        # Plain local models are not re-entrant; their generations are serialized here
+        self._llm_lock = threading.Lock()
+        self._listener = None
+
+    @property
+    def embeddings(self):
+        with self._lock:
+            if self._embeddings is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+                self._embeddings = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/all-MiniLM-L6-v2"
+                )
+            return self._embeddings
+
+    def collection(self, name):
+        embeddings = self.embeddings
+        with self._lock:
+            if name not in self._collections:
+                from langchain_chroma import Chroma
+                self._collections[name] = Chroma(
+                    collection_name=name,
+                    embedding_function=embeddings,
+                    persist_directory=self.persist_directory
+                )
+            return self._collections[name]
+
+    @property
+    def llm(self):
+        with self._lock:
+            if self._llm is None:
+                from src.llm_manager import LLMManager
+                self._llm = LLMManager(llm_type=Config.LLM_TYPE).get_llm()
+            return self._llm
+
+    def handle(self, op, kwargs):
+        if op == "ping":
+            return "pong"
+        if op == "embed_query":
+            return self.embeddings.embed_query(kwargs["text"])
+        if op == "embed_documents":
+            return self.embeddings.embed_documents(kwargs["texts"])
+        if op == "collection":
+            method = kwargs["method"]
+            if method not in COLLECTION_METHODS:
+                raise ValueError(f"Unsupported collection method: {method}")
+            target = getattr(self.collection(kwargs["name"]), method)
+            return target(*kwargs.get("args", ()), **kwargs.get("kwargs", {}))
+        if op == "generate":
+            llm = self.llm
+            with contextlib.nullcontext() if bounds_own_concurrency(llm) else self._llm_lock:
+                response = llm.invoke(kwargs["prompt"], stop=kwargs.get("stop"))
+            return response.content if hasattr(response, "content") else str(response)
+        raise ValueError(f"Unknown operation: {op}")
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    op, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self.handle(op, kwargs)))
+                except Exception as e:
+                    logger.exception("Model server operation '%s' failed", op)
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    def warm_up(self):
+        _ = self.embeddings
+        if Config.LLM_TYPE in LOCAL_LLM_TYPES:
+            _ = self.llm
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        self._listener = Listener(self.address, family="AF_UNIX", authkey=_authkey())
+        logger.info("Model server listening on %s", self.address)
+        while True:
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError:
+                logger.warning("Rejected a model server connection with a wrong authkey")
+                continue
+            except OSError:
+                # Listener closed
+                return
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+
+class ModelServerError(RuntimeError):
+    pass
+
+
+class ModelServerClient:
+    """Thread-safe client; each thread keeps its own connection to the sidecar."""
+
+    def __init__(self, address=None):
+        self.address = address or Config.MODEL_SERVER_ADDRESS
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=_authkey())
+            self._local.conn = conn
+        return conn
+
+    def call(self, op, **kwargs):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.send((op, kwargs))
+                status, payload = conn.recv()
+                break
+            except (EOFError, OSError):
+                # Sidecar restarted or connection dropped: reconnect once
+                self._local.conn = None
+                if attempt == 1:
+                    raise
+        if status == "error":
+            raise ModelServerError(payload)
+        return payload
+
+    def wait_until_ready(self, timeout=60.0):
+        deadline = time.time() + timeout
+        while True:
+            try:
+                return self.call("ping") == "pong"
+            except (OSError, EOFError):
+                if time.time() > deadline:
+                    raise
+                time.sleep(0.2)
+
+
+class RemoteEmbeddings(Embeddings):
+    def __init__(self, client):
+        self.client = client
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.call("embed_documents", texts=list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.call("embed_query", text=text)
+
+
+class RemoteCollection:
+    """Stands in for a Chroma collection owned by the sidecar."""
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def _call(self, method, *args, **kwargs):
+        return self.client.call("collection", name=self.name, method=method, args=args, kwargs=kwargs)
+
+    def similarity_search(self, *args, **kwargs):
+        return self._call("similarity_search", *args, **kwargs)
+
+    def similarity_search_by_vector(self, *args, **kwargs):
+        return self._call("similarity_search_by_vector", *args, **kwargs)
+
+    def add_documents(self, *args, **kwargs):
+        return self._call("add_documents", *args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        return self._call("get", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._call("delete", *args, **kwargs)
+
+
+class RemoteLLM(LLM):
+    """LangChain LLM that forwards generation to the sidecar's local model."""
+    address: Optional[str] = None
+    model_name: str = "remote"
+    _client: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "dbllm-model-server"
+
+    @property
+    def _identifying_params(self):
+        # Part of the completion cache key, so a different sidecar model does not reuse old completions
+        return {"model_name": self.model_name}
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        if self._client is None:
+            self._client = ModelServerClient(self.address)
+        return self._client.call("generate", prompt=prompt, stop=stop)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared model and vector store sidecar")
+    parser.add_argument("--address", default=Config.MODEL_SERVER_ADDRESS or "/tmp/dbllm-models.sock")
+    parser.add_argument("--persist-directory", default="./chroma_db")
+    args = parser.parse_args(argv)
+    if not Config.MODEL_SERVER_AUTHKEY:
+        parser.error("MODEL_SERVER_AUTHKEY must be set (run_api.py generates one for the server and its workers)")
+
+    # This process owns the models; it must never forward to itself
+    Config.MODEL_SERVER_ADDRESS = None
+
+    server = ModelServer(args.address, persist_directory=args.persist_directory)
+    threading.Thread(target=server.warm_up, name="model-warmup", daemon=True).start()
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
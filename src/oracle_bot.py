@@ -1,6 +1,10 @@
+import asyncio
+import contextvars
 import hashlib
+import threading
 import time
 import sqlalchemy
+from concurrent.futures import ThreadPoolExecutor
 
 from langchain_community.agent_toolkits import create_sql_agent
 from langchain_community.utilities import SQLDatabase
@@ -23,26 +27,198 @@ except ImportError:
             ZERO_SHOT_REACT_DESCRIPTION = "zero-shot-react-description"
             OPENAI_FUNCTIONS = "openai-functions"
 
+from src import metrics
+from src.config import Config
 from src.db_manager import DBManager
+from src.inference_scheduler import SchedulerRejected, current_priority, priority_scope
+from src.intent_router import IntentClassifier
+from src.logger import get_logger, log_request
 from src.llm_manager import LLMManager
 from src.reports_manager import ReportsManager
+from src.result_store import ResultStore
+from src.result_summarizer import compact_observation, render_digest, summarize
+from src.single_flight import SingleFlight
+from src.sql_generator import build_sql_prompt, check_read_only, extract_sql, format_rows_markdown
+from src.value_index import ValueIndex
 from src.vector_manager import VectorManager
 
 
+logger = get_logger("oracle_bot")
+
+ROUTED = metrics.REGISTRY.counter(
+    "dbllm_llm_routed_total", "LLM calls by call type and model tier", ("call_type", "tier")
+)
+REPORT_MATCHES = metrics.REGISTRY.counter(
+    "dbllm_report_matches_total", "Questions by how a predefined report was matched (id, semantic, none)", ("method",)
+)
+
 class OracleBot:
     CACHE_TTL = 300  # 5 minutes cache expiry
 
-    def __init__(self, db_manager: DBManager, llm_manager: LLMManager):
+    def __init__(self, db_manager: DBManager, llm_manager: LLMManager, vector_manager: VectorManager = None,
+                 reports_manager: ReportsManager = None, database: str = None):
         self.db_manager = db_manager
+        # Name of the hosted database this bot answers for (see TenantRegistry), logged with each request
+        self.database = database
         self.llm_manager = llm_manager
-        self.llm = self.llm_manager.get_llm()
+        # The LLM is created on first use or by warm_up(); local backends take a while to load
+        self._llm = None
+        self._llm_lock = threading.Lock()
 
-        self.reports_manager = ReportsManager()
-        self.vector_manager = VectorManager(db_manager)
+        self.reports_manager = reports_manager or ReportsManager()
+        self.vector_manager = vector_manager or VectorManager(db_manager)
 
         self.memories = {}
         self.executors = {}
         self.response_cache = {}
+        self._intent_classifier = None
+        self._indexed_reports = None
+        # Identical questions in flight at the same time share one computation
+        self.single_flight = SingleFlight()
+        self.sql_generation_mode = Config.SQL_GENERATION_MODE
+        # Large results are kept server-side and paged through /results/{id}
+        self.result_store = ResultStore(
+            ttl_seconds=Config.RESULT_SET_TTL_SECONDS,
+            max_rows=Config.RESULT_SET_MAX_ROWS,
+            memory_mb=Config.RESULT_SET_MEMORY_MB,
+            spill_dir=Config.RESULT_SET_SPILL_DIR
+        )
+        # Stored spellings of filter values, so the agent need not probe them with SELECT DISTINCT
+        self.value_index = ValueIndex(
+            db_manager,
+            max_distinct=Config.VALUE_INDEX_MAX_DISTINCT,
+            fuzzy_max_distinct=Config.VALUE_INDEX_FUZZY_MAX_DISTINCT,
+            refresh_seconds=Config.VALUE_INDEX_REFRESH_SECONDS,
+            columns_per_tick=Config.VALUE_INDEX_COLUMNS_PER_TICK,
+            threshold=Config.VALUE_MATCH_THRESHOLD
+        )
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self.llm_manager.get_llm()
+        return self._llm
+
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+
+    def warm_up(self):
+        """Loads the LLM, the embedding model and the vector store ahead of the first question."""
+        start = time.perf_counter()
+        self.vector_manager.warm_up()
+        if Config.SEMANTIC_REPORT_MATCHING:
+            try:
+                self._index_reports()
+            except Exception as e:
+                logger.warning("Could not index reports: %s", e)
+        _ = self.llm
+        for tier in set(Config.LLM_ROUTES.values()):
+            if tier in Config.LLM_TIERS:
+                self.llm_manager.get_llm_for(tier)
+        if self.llm_manager.llm_type == "llamacpp" and Config.LLAMACPP_PRIME_PREFIX:
+            self._prime_prompt_prefix()
+        logger.info("Warm-up finished in %.2fs", time.perf_counter() - start)
+
+    def _static_prompt_prefix(self, agent_executor):
+        """Returns the part of the agent prompt before the question, which is identical for every call."""
+        agent = getattr(agent_executor, "agent", None)
+        prompts = []
+        runnable = getattr(agent, "runnable", None)
+        if runnable is not None and hasattr(runnable, "get_prompts"):
+            prompts = runnable.get_prompts()
+        elif getattr(agent, "llm_chain", None) is not None:
+            prompts = [agent.llm_chain.prompt]
+
+        for prompt in prompts:
+            template = getattr(prompt, "template", None)
+            if isinstance(template, str) and "{input}" in template:
+                prefix = template.split("{input}")[0]
+                # Stop at any other (unrendered) placeholder
+                cut = prefix.find("{")
+                return prefix if cut == -1 else prefix[:cut]
+        return None
+
+    def _prime_prompt_prefix(self):
+        """Pre-evaluates the static agent prompt into the llama.cpp prefix state cache."""
+        client = getattr(self.llm, "client", None)
+        cache = getattr(client, "cache", None)
+        if cache is None or not hasattr(cache, "prime"):
+            return
+        session_id = "__warmup__"
+        try:
+            prefix = self._static_prompt_prefix(self._create_agent_executor(session_id))
+            if prefix:
+                cache.prime(client, prefix)
+        except Exception as e:
+            logger.warning("Could not prime llama.cpp prefix cache: %s", e)
+        finally:
+            self.memories.pop(session_id, None)
+
+    def _llm_for(self, call_type):
+        """Routes a call type (chat, report_format, fallback, sql_agent) to its tier's model."""
+        tier = Config.LLM_ROUTES.get(call_type, "default")
+        if tier != "default" and tier in Config.LLM_TIERS:
+            llm = self.llm_manager.get_llm_for(tier)
+            if llm is not None:
+                ROUTED.inc(call_type=call_type, tier=tier)
+                return llm
+        ROUTED.inc(call_type=call_type, tier="default")
+        return self.llm
+
+    def _classify_intent(self, question_vector):
+        """Returns 'chat' for greetings/chit-chat, 'data' otherwise (or when classification is unavailable)."""
+        if not Config.INTENT_ROUTING:
+            return "data"
+        try:
+            if self._intent_classifier is None:
+                self._intent_classifier = IntentClassifier(
+                    self.vector_manager.embeddings.embed_documents,
+                    threshold=Config.INTENT_CHAT_THRESHOLD
+                )
+            intent, score = self._intent_classifier.classify(question_vector)
+        except Exception as e:
+            logger.debug("Intent classification unavailable: %s", e)
+            return "data"
+        logger.debug("Intent %s (chat similarity %.3f)", intent, score)
+        return intent
+
+    def _index_reports(self):
+        """(Re-)indexes report descriptions when the loaded report set changed."""
+        if self._indexed_reports is not self.reports_manager.reports:
+            self.vector_manager.index_reports(self.reports_manager.reports)
+            self._indexed_reports = self.reports_manager.reports
+
+    def _match_report(self, question, question_vector):
+        """
+        Returns (report_id, method). A literal report ID wins; otherwise the closest
+        report description is used when it clears the threshold and the margin over
+        the runner-up, and the question supplies every parameter the report needs.
+        """
+        report_id = self.reports_manager.find_report_id(question)
+        if report_id:
+            return report_id, "id"
+        if not Config.SEMANTIC_REPORT_MATCHING:
+            return None, "none"
+        try:
+            self._index_reports()
+            hits = self.vector_manager.match_report(question_vector)
+            if hits:
+                best_id, best = hits[0]
+                runner_up = hits[1][1] if len(hits) > 1 else 0.0
+                if (best >= Config.REPORT_MATCH_THRESHOLD
+                        and best - runner_up >= Config.REPORT_MATCH_MARGIN
+                        and not self.reports_manager.get_missing_variables(best_id, question)):
+                    logger.info("Semantic report match %s (similarity %.3f)", best_id, best)
+                    return best_id, "semantic"
+        except Exception as e:
+            logger.warning("Semantic report matching unavailable: %s", e)
+        return None, "none"
+
+    def is_ready(self):
+        return self._llm is not None and self.vector_manager.is_loaded
 
     # -------------------------------
     # Utility Functions
@@ -55,11 +231,19 @@ class OracleBot:
         normalized = self._normalize_question(question)
         return hashlib.md5(normalized.encode()).hexdigest()
 
+    def _store_cache(self, session_id, question_hash, answer, sql_queries):
+        self.response_cache[(session_id, question_hash)] = {
+            "answer": answer,
+            "sql_queries": sql_queries,
+            "timestamp": time.time()
+        }
+
     def _get_memory(self, session_id):
         if session_id not in self.memories:
             self.memories[session_id] = ConversationBufferWindowMemory(
                 memory_key="chat_history",
-                return_messages=True,
+                # Rendered as text into the ReAct prompt
+                return_messages=False,
                 k=3
             )
         return self.memories[session_id]
@@ -68,7 +252,7 @@ class OracleBot:
         memory = self._get_memory(session_id)
 
         # Create/Get a dynamic DB instance with only relevant tables (Optimized)
-        db = self.db_manager.get_db(include_tables=include_tables)
+        db = self.db_manager.get_db(include_tables=include_tables, workload="agent")
 
         if self.llm_manager.llm_type == "openai":
             agent_type = "tool-calling"
@@ -77,16 +261,10 @@ class OracleBot:
 
         table_names_str = ", ".join(include_tables) if include_tables else "all tables"
 
+        # Static instructions come first: identical for every question, so their KV state is reused
         prefix = (
-            "You are an expert SQL Data Analyst. Relevant tables: {table_names_str}.\n"
+            "You are an expert SQL Data Analyst.\n"
             "Dialect: {dialect}. Top K: {top_k}.\n"
-            "History: {{chat_history}}\n"
-        ).replace("{table_names_str}", table_names_str)
-
-        if extra_context:
-            prefix += f"\n{extra_context}\n"
-
-        prefix += (
             "\nRULES:\n"
             "1. Greets? Answer direct.\n"
             "2. DB query? Use 'sql_db_schema' first.\n"
@@ -95,6 +273,12 @@ class OracleBot:
             "5. NO new questions after 'Final Answer'.\n"
         )
 
+        context = f"Relevant tables: {table_names_str}.\n"
+        if extra_context:
+            context += f"\n{extra_context}\n"
+        # Literal text: braces in past answers or SQL must not become prompt variables
+        context = context.replace("{", "{{").replace("}", "}}")
+
         if agent_type == AgentType.ZERO_SHOT_REACT_DESCRIPTION:
             prefix += (
                 "FORMAT:\n"
@@ -106,17 +290,24 @@ class OracleBot:
                 "Thought: I have the answer\n"
                 "Final Answer: [Markdown answer]\n"
             )
+            # Per-question parts follow the tool descriptions and format instructions
             suffix = (
+                context +
+                "History: {chat_history}\n\n"
                 "Begin!\n\n"
                 "Question: {input}\n"
                 "{agent_scratchpad}"
             )
         else:
+            # The system message is sent as is; history is not part of it
+            prefix += f"\n{context}"
             suffix = None
 
         return create_sql_agent(
-            llm=self.llm,
+            llm=self._llm_for("sql_agent"),
             db=db,
+            prefix=prefix,
+            suffix=suffix,
             verbose=False,  # faster
             agent_type=agent_type,
             max_iterations=10,  # reduce reasoning steps
@@ -127,20 +318,372 @@ class OracleBot:
             }
         )
 
+    def _invoke_llm(self, prompt, stage="llm_call", priority=None, call_type="fallback"):
+        """Calls the LLM directly (outside the agent), timing it against the active trace."""
+        trace = metrics.current_trace()
+        llm = self._llm_for(call_type)
+        with metrics.span(stage), priority_scope(priority or current_priority()):
+            if hasattr(llm, 'invoke'):
+                config = {"callbacks": metrics.callbacks_for(trace)} if trace else None
+                response = llm.invoke(prompt, config=config)
+            else:
+                response = llm(prompt)
+        return response.content if hasattr(response, 'content') else str(response)
+
+    def _fetch_report(self, query):
+        """Returns (columns, rows); each call checks out its own pooled connection."""
+        start = time.perf_counter()
+        with self.db_manager.connect("report") as conn:
+            result = conn.execute(sqlalchemy.text(query))
+            data = result.fetchall()
+            columns = list(result.keys())
+        self.db_manager.record_query(query, time.perf_counter() - start, len(data), workload="report")
+        return columns, data
+
+    @staticmethod
+    def _run_concurrently(tasks, max_parallel):
+        """
+        Runs zero-argument callables on up to `max_parallel` threads, each in a copy
+        of the caller's context (trace, LLM priority). Returns results or raised
+        exceptions, in order.
+        """
+        if not tasks:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(tasks)))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, task) for task in tasks]
+        outcomes = []
+        for future in futures:
+            error = future.exception()
+            outcomes.append(error if error is not None else future.result())
+        return outcomes
+
+    def _answer_report(self, report_id, query, format_instruction=None, extra_context=None):
+        """
+        (formatted answer, result set cursor or None, snapshot or None) for one
+        bound report: its snapshot when fresh, else executed and formatted.
+        Precomputed snapshots are formatted without a format instruction.
+        """
+        if not format_instruction:
+            snapshot = self.reports_manager.get_snapshot(query)
+            if snapshot is not None:
+                self.reports_manager.log_execution(report_id, query)
+                return snapshot["answer"], snapshot.get("result_set"), snapshot
+        with metrics.span("report_sql", report_id=report_id):
+            columns, data = self._fetch_report(query)
+        self.reports_manager.log_execution(report_id, query)
+        if not data:
+            return "No records found.", None, None
+        # Large results reach the LLM as a digest; all rows stay pageable and downloadable
+        result_set = self._register_result(columns, data, query)
+        answer = self._format_report(columns, data, format_instruction, extra_context, priority="report")
+        return answer + self._download_note(result_set), result_set, None
+
+    def _ask_reports(self, report_ids, question, format_instruction, session_id, extra_context, trace):
+        """Several report IDs in one question: each is bound and run concurrently, answers are combined."""
+        if trace is not None:
+            trace.route = "reports"
+        # Without the IDs, "ST1001 and AT1202 for 2024-01-05" binds only the date
+        text = self.reports_manager.strip_report_ids(question)
+        sections = {}
+        result_sets = {}
+        queries = []
+        tasks = []
+        for report_id in report_ids:
+            report = self.reports_manager.get_report(report_id)
+            missing = self.reports_manager.get_missing_variables(report_id, text)
+            if missing:
+                sections[report_id] = f"Report '{report['name']}' requires: {', '.join(missing)}"
+                continue
+            query = self.reports_manager.format_query(report_id, text)
+            queries.append(query)
+            tasks.append((report_id, lambda r=report_id, q=query: self._answer_report(
+                r, q, format_instruction, extra_context)))
+
+        outcomes = self._run_concurrently([task for _, task in tasks], Config.REPORT_MAX_PARALLEL)
+        for (report_id, _), outcome in zip(tasks, outcomes):
+            if isinstance(outcome, SchedulerRejected):
+                raise outcome
+            if isinstance(outcome, Exception):
+                sections[report_id] = f"Error executing report: {outcome}"
+                continue
+            sections[report_id], result_set, _ = outcome
+            if result_set:
+                result_sets[report_id] = result_set
+
+        answer = "\n\n".join(
+            f"### {self.reports_manager.get_report(report_id)['name']} ({report_id})\n\n{sections[report_id]}"
+            for report_id in report_ids
+        )
+        if queries:
+            self._store_cache(session_id, self._hash_question(question), answer, queries)
+            self.vector_manager.add_chat_interaction(question, answer, queries, session_id)
+        response = {
+            "answer": answer,
+            "sql_queries": queries,
+            "report_id": report_ids[0],
+            "report_ids": report_ids
+        }
+        if result_sets:
+            response["result_sets"] = result_sets
+        return response
+
+    def run_reports(self, requests, max_parallel=None):
+        """
+        Dashboard fan-out: runs [(report_id, params)] concurrently, at most
+        `max_parallel` (capped by REPORT_MAX_PARALLEL) at a time. Returns one entry
+        per request, in order, with `columns` and `rows` or an `error`.
+        """
+        limit = min(max_parallel or Config.REPORT_MAX_PARALLEL, Config.REPORT_MAX_PARALLEL)
+        results = []
+        tasks = []
+        for report_id, params in requests:
+            entry = {"report_id": report_id}
+            results.append(entry)
+            report = self.reports_manager.get_report(report_id)
+            if not report:
+                entry["error"] = f"Unknown report '{report_id}'"
+                continue
+            params = params or {}
+            missing = [v for v in self.reports_manager.required_variables(report_id) if v not in params]
+            if missing:
+                entry["error"] = f"Report '{report['name']}' requires: {', '.join(missing)}"
+                continue
+            try:
+                query = self.reports_manager.bind_parameters(report_id, params)
+            except ValueError as e:
+                entry["error"] = str(e)
+                continue
+            entry.update(name=report["name"], sql=query)
+            tasks.append((entry, query))
+
+        outcomes = self._run_concurrently(
+            [lambda q=query: self._fetch_report(q) for _, query in tasks], limit
+        )
+        for (entry, query), outcome in zip(tasks, outcomes):
+            if isinstance(outcome, Exception):
+                entry["error"] = f"Error executing report: {outcome}"
+                continue
+            columns, rows = outcome
+            entry["columns"] = columns
+            entry["rows"] = [list(row) for row in rows]
+            self.reports_manager.log_execution(entry["report_id"], query)
+        return results
+
+    def _register_result(self, columns, rows, sql, ttl_seconds=None):
+        """Registers a large result as a server-side result set; returns its cursor or None."""
+        if not Config.RESULT_SETS or len(rows) <= Config.RESULT_SET_MIN_ROWS:
+            return None
+        return self.result_store.register(columns, rows, sql=sql, page_size=Config.RESULT_SET_PAGE_SIZE,
+                                          ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def _download_note(result_set):
+        """Answer suffix linking the full rows of a result set; empty without one."""
+        if not result_set:
+            return ""
+        return (f"\n\n_{result_set['total_rows']} rows: "
+                f"[download as CSV](/results/{result_set['id']}/download)._")
+
+    @staticmethod
+    def _digest(columns, rows):
+        """Statistical digest plus a sample for a prompt, or None when the rows are few enough to send."""
+        if not Config.RESULT_SUMMARY or len(rows) <= Config.SUMMARY_MIN_ROWS:
+            return None
+        with metrics.span("result_digest", rows=len(rows)):
+            return render_digest(summarize(
+                columns, rows, top_n=Config.SUMMARY_TOP_N, sample_rows=Config.SUMMARY_SAMPLE_ROWS
+            ))
+
+    @staticmethod
+    def _compact_observation(observation):
+        if not Config.RESULT_SUMMARY:
+            return observation
+        return compact_observation(
+            observation, min_rows=Config.SUMMARY_MIN_ROWS, max_chars=Config.SUMMARY_MAX_OBSERVATION_CHARS,
+            top_n=Config.SUMMARY_TOP_N, sample_rows=Config.SUMMARY_SAMPLE_ROWS
+        )
+
+    def _format_report(self, columns, data, format_instruction=None, extra_context=None, priority="report"):
+        digest = self._digest(columns, data)
+        if digest is not None:
+            format_prompt = (
+                "The report returned too many rows to list. Using only this digest, summarise the result "
+                f"in Markdown and show the sample as a Markdown table:\n{digest}"
+            )
+        else:
+            format_prompt = (
+                f"Convert this into clean Markdown table only:\n{data}"
+            )
+        if extra_context:
+            format_prompt = f"{extra_context}\n\n" + format_prompt
+
+        if format_instruction:
+            format_prompt += f"\nNote: {format_instruction}"
+
+        return self._invoke_llm(format_prompt, stage="report_format", priority=priority,
+                                call_type="report_format")
+
+    def _precompute_report(self, report_id, query):
+        """Scheduler runner: executes and formats a bound report query at batch priority."""
+        columns, data = self._fetch_report(query)
+        if not data:
+            return {"answer": "No records found.", "result_set": None}
+        # The rows stay downloadable for as long as answers are served from the snapshot
+        report = self.reports_manager.get_report(report_id) or {}
+        interval = report.get("refresh_interval") or Config.REPORT_REFRESH_INTERVAL
+        result_set = self._register_result(columns, data, query, ttl_seconds=interval + Config.RESULT_SET_TTL_SECONDS)
+        answer = self._format_report(columns, data, priority="batch")
+        return {"answer": answer + self._download_note(result_set), "result_set": result_set}
+
+    def start_report_scheduler(self):
+        """Starts background refreshes of precomputed reports (see ReportsManager.precompute_targets)."""
+        return self.reports_manager.start_scheduler(self._precompute_report)
+
+    def start_value_index(self):
+        """Starts reading column values for literal grounding in the background (see ValueIndex)."""
+        self.value_index.start()
+        return self.value_index
+
+    def close(self):
+        """Stops background work and releases database connections; used when an idle database is unloaded."""
+        self.value_index.stop(timeout=1.0)
+        if self.reports_manager.scheduler is not None:
+            self.reports_manager.scheduler.stop(timeout=1.0)
+        self.vector_manager.executor.shutdown(wait=False)
+        self.db_manager.dispose()
+
+    def _value_hints(self, question, relevant_tables):
+        """Stored spellings of the question's filter values for the prompt, or None."""
+        if not Config.VALUE_INDEX:
+            return None
+        with metrics.span("value_lookup"):
+            try:
+                hints = self.value_index.hints(question, relevant_tables or None, limit=Config.VALUE_HINTS_MAX)
+            except Exception as e:
+                logger.warning("Value lookup failed: %s", e)
+                return None
+        if hints:
+            logger.debug("Grounded question literals: %s", hints)
+        return hints
+
     # -------------------------------
     # Main Ask Method
     # -------------------------------
 
-    def ask(self, question: str, format_instruction: str = None, session_id: str = "default"):
+    def ask(self, question: str, format_instruction: str = None, session_id: str = "default",
+            include_timings: bool = False, priority: str = "interactive"):
+        if not Config.COALESCE_REQUESTS:
+            return self._ask_traced(question, format_instruction, session_id, include_timings, priority)
+        result, leader = self.single_flight.do(
+            self._flight_key(question, format_instruction, session_id),
+            lambda: self._ask_traced(question, format_instruction, session_id, include_timings, priority)
+        )
+        return result if leader else self._coalesced_copy(result, include_timings)
+
+    async def ask_async(self, question: str, format_instruction: str = None, session_id: str = "default",
+                        include_timings: bool = False, priority: str = "interactive"):
+        """Coroutine version of ask(); coalesces with sync callers asking the same question."""
+        run = lambda: self._ask_traced(question, format_instruction, session_id, include_timings, priority)
+        if not Config.COALESCE_REQUESTS:
+            return await asyncio.get_running_loop().run_in_executor(None, run)
+        result, leader = await self.single_flight.do_async(
+            self._flight_key(question, format_instruction, session_id), run
+        )
+        return result if leader else self._coalesced_copy(result, include_timings)
+
+    def _flight_key(self, question, format_instruction, session_id):
+        # Answers depend on the session's chat history and are recorded in it, so sessions never share a flight
+        return session_id, self._hash_question(question), format_instruction or ""
+
+    @staticmethod
+    def _coalesced_copy(result, include_timings):
+        """Followers get their own dict; timings describe the leader's run, so only on request."""
+        copy = dict(result)
+        if not include_timings:
+            copy.pop("timings", None)
+        return copy
+
+    def _ask_traced(self, question, format_instruction, session_id, include_timings, priority):
+        start = time.perf_counter()
+        trace, token = metrics.start_trace()
+        result = None
+        try:
+            with priority_scope(priority):
+                result = self._ask(question, format_instruction, session_id, trace)
+        finally:
+            metrics.end_trace(trace, token)
+            self._log_request(question, session_id, result, trace, time.perf_counter() - start)
+
+        if include_timings and trace is not None:
+            result["timings"] = trace.to_dict()
+        return result
+
+    def _log_request(self, question, session_id, result, trace, elapsed):
+        """Writes the request summary to the JSONL request log for offline analysis."""
+        result = result or {"error": "unhandled exception"}
+        fields = {
+            "question_hash": self._hash_question(question),
+            "session_id": session_id,
+            "database": self.database,
+            "route": trace.route if trace is not None else None,
+            "report_id": result.get("report_id"),
+            "total_ms": round(elapsed * 1000, 3),
+            "sql_queries": result.get("sql_queries", []),
+            "error": result.get("error"),
+        }
+        if trace is not None:
+            fields.update(
+                sql_rows=trace.sql_rows,
+                llm_calls=trace.llm_calls,
+                prompt_tokens=trace.prompt_tokens,
+                completion_tokens=trace.completion_tokens,
+                agent_iterations=trace.agent_iterations,
+                stages={s["name"]: s["ms"] for s in trace.spans if s["name"] not in ("llm_call", "sql_execute", "agent_iteration")},
+            )
+        try:
+            log_request(**fields)
+        except Exception as e:
+            logger.error("Error writing request log: %s", e)
+
+    def _ask(self, question, format_instruction, session_id, trace):
         # Generate question embedding once (Optimization)
-        question_vector = self.vector_manager.get_embedding(question)
+        with metrics.span("embed"):
+            question_vector = self.vector_manager.get_embedding(question)
+
+        # Check for predefined reports first: literal ID, then report descriptions
+        with metrics.span("report_match"):
+            report_id, match_method = self._match_report(question, question_vector)
+        REPORT_MATCHES.inc(method=match_method)
+
+        # Greetings and chit-chat are answered by the chat tier without building an agent
+        if not report_id:
+            with metrics.span("intent"):
+                intent = self._classify_intent(question_vector)
+            if intent == "chat":
+                if trace is not None:
+                    trace.route = "chat"
+                chat_prompt = (
+                    "You are a friendly assistant for a database question-answering service. "
+                    "Reply briefly to the user's message; if relevant, mention that you can answer "
+                    f"questions about the data.\nUser: {question}"
+                )
+                answer = self._invoke_llm(chat_prompt, stage="chat_llm", call_type="chat")
+                return {
+                    "answer": answer,
+                    "sql_queries": []
+                }
 
         # Retrieve relevant past interactions for self-learning (Optimized)
-        extra_context = self.vector_manager.search_relevant_chat_by_vector(question_vector)
+        with metrics.span("chat_retrieval"):
+            extra_context = self.vector_manager.search_relevant_chat_by_vector(question_vector)
 
-        # Check for predefined reports first
-        report_id = self.reports_manager.find_report_id(question)
         if report_id:
+            report_ids = self.reports_manager.find_report_ids(question) if match_method == "id" else []
+            if len(report_ids) > 1:
+                return self._ask_reports(report_ids, question, format_instruction, session_id, extra_context, trace)
+
+            if trace is not None:
+                trace.route = "report"
             report = self.reports_manager.get_report(report_id)
             missing = self.reports_manager.get_missing_variables(report_id, question)
 
@@ -153,78 +696,97 @@ class OracleBot:
             query = self.reports_manager.format_query(report_id, question)
 
             try:
-                with self.db_manager.engine.connect() as conn:
-                    data = conn.execute(sqlalchemy.text(query)).fetchall()
-
-                if not data:
-                    return {
-                        "answer": "No records found.",
-                        "sql_queries": [query],
-                        "report_id": report_id
-                    }
-
-                format_prompt = (
-                    f"Convert this into clean Markdown table only:\n{data}"
-                )
-                if extra_context:
-                    format_prompt = f"{extra_context}\n\n" + format_prompt
-
-                if format_instruction:
-                    format_prompt += f"\nNote: {format_instruction}"
-
-                response = self.llm.invoke(format_prompt) if hasattr(self.llm, 'invoke') else self.llm(format_prompt)
-                answer = response.content if hasattr(response, 'content') else str(response)
-
-                question_hash = self._hash_question(question)
-                self._store_cache(session_id, question_hash, answer, [query])
-
-                # Save to vector DB for self-learning (Asynchronous)
-                self.vector_manager.add_chat_interaction(question, answer, [query], session_id)
-
-                return {
-                    "answer": answer,
-                    "sql_queries": [query],
-                    "report_id": report_id
-                }
+                answer, result_set, snapshot = self._answer_report(report_id, query, format_instruction, extra_context)
+            except SchedulerRejected:
+                raise
             except Exception as e:
                 return {
                     "answer": f"Error executing report: {str(e)}",
                     "sql_queries": [query]
                 }
 
+            response = {
+                "answer": answer,
+                "sql_queries": [query],
+                "report_id": report_id
+            }
+            if snapshot is not None:
+                if trace is not None:
+                    trace.route = "report_snapshot"
+                response["snapshot"] = {
+                    "computed_at": snapshot["computed_at"],
+                    "expires_at": snapshot["expires_at"],
+                    "age_seconds": snapshot["age_seconds"],
+                }
+            else:
+                self._store_cache(session_id, self._hash_question(question), answer, [query])
+                # Save to vector DB for self-learning (Asynchronous)
+                self.vector_manager.add_chat_interaction(question, answer, [query], session_id)
+            if result_set:
+                response["result_set"] = result_set
+            return response
+
+        if trace is not None:
+            trace.route = "agent"
+
         # RAG: Find relevant tables (Optimized)
-        relevant_tables = self.vector_manager.get_relevant_tables_by_vector(question_vector)
+        with metrics.span("table_retrieval"):
+            relevant_tables = self.vector_manager.get_relevant_tables_by_vector(question_vector, question=question)
 
-        # Filter to only include tables that actually exist in the DB (Optimized with cache)
-        all_tables = self.db_manager.get_usable_table_names()
-        relevant_tables = [t for t in relevant_tables if t in all_tables]
+            # Filter to only include tables that actually exist in the DB (Optimized with cache)
+            all_tables = self.db_manager.get_usable_table_names()
+            relevant_tables = [t for t in relevant_tables if t in all_tables]
 
-        print(f"RAG retrieved relevant tables (filtered): {relevant_tables}")
+        logger.info("RAG retrieved relevant tables (filtered): %s", relevant_tables)
+        value_hints = self._value_hints(question, relevant_tables)
+
+        if self.sql_generation_mode == "single_shot":
+            if value_hints:
+                extra_context = f"{extra_context}\n\n{value_hints}" if extra_context else value_hints
+            return self._ask_single_shot(question, format_instruction, session_id, relevant_tables, extra_context, trace)
 
         # Create/Get executor for this session and this specific query (due to dynamic tables)
-        agent_executor = self._create_agent_executor(session_id, include_tables=relevant_tables, extra_context=extra_context)
+        with metrics.span("executor_build"):
+            agent_executor = self._create_agent_executor(session_id, include_tables=relevant_tables, extra_context=extra_context)
 
         full_query = question
         if format_instruction:
             full_query += f"\nFormat output as: {format_instruction}"
+        if value_hints:
+            # Part of the input rather than the prefix, which the SQL agent builds itself
+            full_query += f"\n{value_hints}"
 
         try:
-            result = agent_executor.invoke({"input": full_query})
+            with metrics.span("agent"):
+                if trace is not None:
+                    result = agent_executor.invoke(
+                        {"input": full_query},
+                        config={"callbacks": metrics.callbacks_for(trace)}
+                    )
+                else:
+                    result = agent_executor.invoke({"input": full_query})
 
             sql_queries = []
             for step in result.get("intermediate_steps", []):
                 if hasattr(step[0], 'tool') and step[0].tool == "sql_db_query":
                     sql_queries.append(step[0].tool_input)
 
+            answer = result["output"]
+
             # Save to vector DB for self-learning (Asynchronous)
-            self.vector_manager.add_chat_interaction(question, result["output"], sql_queries, session_id)
+            self.vector_manager.add_chat_interaction(question, answer, sql_queries, session_id)
 
             return {
                 "answer": answer,
                 "sql_queries": sql_queries
             }
 
+        except SchedulerRejected:
+            # Overloaded: let the caller answer 429 instead of queueing a fallback generation
+            raise
         except Exception as e:
+            if trace is not None:
+                trace.route = "fallback"
             sql_queries = []
             last_observation = None
             if hasattr(e, 'intermediate_steps'):
@@ -236,15 +798,14 @@ class OracleBot:
             try:
                 fallback_prompt = (
                     f"The user asked: {full_query}\n"
-                    f"Database result found: {last_observation}\n"
+                    f"Database result found: {self._compact_observation(last_observation)}\n"
                     "Please provide the final answer."
                 ) if last_observation else full_query
 
                 if extra_context:
                     fallback_prompt = f"{extra_context}\n\n" + fallback_prompt
 
-                response = self.llm.invoke(fallback_prompt) if hasattr(self.llm, 'invoke') else self.llm(fallback_prompt)
-                answer = response.content if hasattr(response, 'content') else str(response)
+                answer = self._invoke_llm(fallback_prompt, stage="fallback_llm", call_type="fallback")
 
                 # Save successful fallback to vector DB for self-learning (Asynchronous)
                 self.vector_manager.add_chat_interaction(question, answer, sql_queries, session_id)
@@ -254,8 +815,84 @@ class OracleBot:
                     "sql_queries": sql_queries,
                     "error": str(e)
                 }
+            except SchedulerRejected:
+                raise
             except Exception as e2:
                 return {
                     "answer": f"Error: {str(e)}",
                     "sql_queries": []
                 }
+
+    def _validate_sql(self, sql):
+        """Returns (sql to execute, error message or None)."""
+        error = check_read_only(sql)
+        if error:
+            return sql, error
+        return self.db_manager.validate_sql(sql)
+
+    def _ask_single_shot(self, question, format_instruction, session_id, relevant_tables, extra_context, trace):
+        """One SQL generation with the pruned schema in the prompt, local validation and one repair round."""
+        if trace is not None:
+            trace.route = "single_shot"
+
+        with metrics.span("schema_prompt"):
+            db = self.db_manager.get_db(include_tables=relevant_tables or None, workload="agent")
+            schema = db.get_table_info()
+
+        full_query = question
+        if format_instruction:
+            full_query += f"\nFormat output as: {format_instruction}"
+
+        max_rows = Config.SINGLE_SHOT_MAX_ROWS
+        sql_queries = []
+        sql, error, columns, rows = None, None, [], []
+        for attempt in range(2):
+            prompt = build_sql_prompt(
+                schema, db.dialect, question, extra_context,
+                previous_sql=sql if attempt else None, error=error
+            )
+            sql = extract_sql(self._invoke_llm(prompt, stage="sql_generation", call_type="sql_generation"))
+            sql, error = self._validate_sql(sql)
+            if error is None:
+                sql_queries.append(sql)
+                try:
+                    with metrics.span("single_shot_sql"):
+                        # One extra row tells whether the result was truncated; with result sets the
+                        # whole (capped) result is fetched once so later pages need no SQL
+                        fetch = max(max_rows, Config.RESULT_SET_MAX_ROWS if Config.RESULT_SETS else 0) + 1
+                        columns, rows = self.db_manager.execute_select(sql, max_rows=fetch, workload="agent")
+                    break
+                except Exception as e:
+                    error = str(e)
+            logger.info("Single-shot SQL attempt %d rejected: %s", attempt + 1, error)
+
+        if error is not None:
+            return {
+                "answer": f"Error: {error}",
+                "sql_queries": sql_queries,
+                "error": error
+            }
+
+        table = format_rows_markdown(columns, rows, max_rows=max_rows)
+        if Config.SINGLE_SHOT_FINAL_ANSWER:
+            answer_prompt = (
+                f"The user asked: {full_query}\n"
+                f"The query\n{sql}\nreturned:\n{self._digest(columns, rows) or table}\n"
+                "Answer the user in Markdown using only this result."
+            )
+            answer = self._invoke_llm(answer_prompt, stage="final_answer", call_type="final_answer")
+        else:
+            answer = table
+
+        self._get_memory(session_id).save_context({"input": question}, {"output": answer})
+        # Save to vector DB for self-learning (Asynchronous)
+        self.vector_manager.add_chat_interaction(question, answer, sql_queries, session_id)
+
+        response = {
+            "answer": answer,
+            "sql_queries": sql_queries
+        }
+        result_set = self._register_result(columns, rows, sql)
+        if result_set:
+            response["result_set"] = result_set
+        return response
@@ -0,0 +1,130 @@
+"""
+Per-fingerprint statistics of executed SQL.
+
+Every statement DBManager runs is reduced to a fingerprint (comments,
+string and number literals and IN-list lengths removed, whitespace and case
+normalised), so `... WHERE class_id = 7` and `... WHERE class_id = 9` count
+as one query shape. Each fingerprint keeps its call and error counts, total
+and max latency, a window of recent latencies for the p95, rows returned,
+the workload classes it ran under and when it was last seen.
+"""
+import functools
+import re
+import threading
+import time
+from array import array
+
+from src import metrics
+
+FINGERPRINTS = metrics.REGISTRY.gauge(
+    "dbllm_query_fingerprints", "Distinct SQL fingerprints with statistics held in memory"
+)
+
+COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+SPACES = re.compile(r"\s+")
+
+ORDERS = ("total_seconds", "p95_seconds", "max_seconds", "count", "rows", "last_seen")
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """The query shape: `SELECT * FROM t WHERE a = 'x' AND b IN (1, 2)` -> `select * from t where a = ? and b in (?)`."""
+    text = COMMENTS.sub(" ", str(sql))
+    text = STRINGS.sub("?", text)
+    text = NUMBERS.sub("?", text)
+    text = LISTS.sub("(?)", text)
+    return SPACES.sub(" ", text).strip().rstrip(";").strip().lower()
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "example", "count", "errors", "total", "max", "rows", "last_seen",
+                 "latencies", "next_sample", "workloads")
+
+    def __init__(self, key, window):
+        self.fingerprint = key
+        self.example = None
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.last_seen = 0.0
+        self.latencies = array("d", [0.0] * window)
+        self.next_sample = 0
+        self.workloads = set()
+
+
+class QueryStats:
+    def __init__(self, max_fingerprints=1000, latency_window=256):
+        self.max_fingerprints = max_fingerprints
+        self.latency_window = latency_window
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql, duration, rows=0, workload="default", error=False):
+        if not isinstance(sql, str):
+            sql = str(sql)
+        key = fingerprint(sql)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    # The shape not seen for longest makes room
+                    del self._entries[min(self._entries.values(), key=lambda e: e.last_seen).fingerprint]
+                entry = self._entries[key] = _Entry(key, self.latency_window)
+                FINGERPRINTS.set(len(self._entries))
+            # The latest literal values are kept so the index advisor can EXPLAIN the shape
+            entry.example = sql
+            entry.count += 1
+            entry.errors += 1 if error else 0
+            entry.total += duration
+            entry.max = max(entry.max, duration)
+            entry.rows += rows
+            entry.last_seen = now
+            entry.latencies[entry.next_sample % self.latency_window] = duration
+            entry.next_sample += 1
+            entry.workloads.add(workload)
+
+    @staticmethod
+    def _describe(entry):
+        samples = sorted(entry.latencies[:min(entry.next_sample, len(entry.latencies))])
+        p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))] if samples else 0.0
+        return {
+            "fingerprint": entry.fingerprint,
+            "count": entry.count,
+            "errors": entry.errors,
+            "total_seconds": round(entry.total, 6),
+            "mean_seconds": round(entry.total / entry.count, 6),
+            "p95_seconds": round(p95, 6),
+            "max_seconds": round(entry.max, 6),
+            "rows": entry.rows,
+            "workloads": sorted(entry.workloads),
+            "last_seen": entry.last_seen,
+        }
+
+    def top(self, limit=20, order_by="total_seconds"):
+        """The `limit` fingerprints with the largest `order_by` value."""
+        if order_by not in ORDERS:
+            raise ValueError(f"Unknown order '{order_by}', expected one of {', '.join(ORDERS)}")
+        with self._lock:
+            described = [self._describe(e) for e in self._entries.values()]
+        described.sort(key=lambda d: d[order_by], reverse=True)
+        return described[:limit]
+
+    def example(self, key):
+        """The last executed statement with this fingerprint, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.example if entry is not None else None
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+        FINGERPRINTS.set(0)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,126 @@
+"""
+Background precomputation of predefined reports.
+
+Reports marked `precompute` (or given a `refresh_interval`) in reports.json,
+plus the most-used parameter bindings from report_execution.log, are run on a
+background thread and kept as snapshots keyed by the bound query. A snapshot
+is refreshed once `refresh_ahead` of its interval has passed, i.e. before it
+expires, so questions for these reports are answered from memory.
+"""
+import threading
+import time
+
+from src import metrics
+from src.logger import get_logger
+
+logger = get_logger("report_scheduler")
+
+SNAPSHOT_HITS = metrics.REGISTRY.counter(
+    "dbllm_report_snapshot_hits_total", "Report questions answered from a precomputed snapshot"
+)
+REFRESHES = metrics.REGISTRY.counter(
+    "dbllm_report_snapshot_refreshes_total", "Background report refreshes", ("result",)
+)
+SNAPSHOTS = metrics.REGISTRY.gauge(
+    "dbllm_report_snapshots", "Precomputed report snapshots held in memory"
+)
+
+
+class ReportScheduler:
+    def __init__(self, reports_manager, runner, refresh_ahead=0.8, tick_seconds=5.0, rescan_seconds=300.0):
+        """
+        `runner(report_id, query)` executes a bound report query and returns its
+        formatted answer, or {"answer": ..., "result_set": cursor or None} when the
+        rows were kept as a result set; the scheduler calls it from its own thread.
+        """
+        self.reports_manager = reports_manager
+        self.runner = runner
+        self.refresh_ahead = refresh_ahead
+        self.tick_seconds = tick_seconds
+        self.rescan_seconds = rescan_seconds
+        self.snapshots = {}
+        self._targets = []
+        self._targets_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def targets(self, now=None):
+        """[(report_id, query, interval)], re-read from reports.json and the log every `rescan_seconds`."""
+        now = time.time() if now is None else now
+        if self._targets_at is None or now - self._targets_at >= self.rescan_seconds:
+            self._targets = self.reports_manager.precompute_targets()
+            self._targets_at = now
+            wanted = {query for _, query, _ in self._targets}
+            with self._lock:
+                for query in list(self.snapshots):
+                    if query not in wanted:
+                        del self.snapshots[query]
+                SNAPSHOTS.set(len(self.snapshots))
+        return self._targets
+
+    def due(self, query, interval, now):
+        snapshot = self.snapshots.get(query)
+        return snapshot is None or now >= snapshot["computed_at"] + interval * self.refresh_ahead
+
+    def refresh(self, report_id, query, interval):
+        started = time.time()
+        try:
+            outcome = self.runner(report_id, query)
+        except Exception as e:
+            REFRESHES.inc(result="error")
+            logger.warning("Precomputing report %s failed: %s", report_id, e)
+            return None
+        computed_at = time.time()
+        snapshot = {
+            "report_id": report_id,
+            **(outcome if isinstance(outcome, dict) else {"answer": outcome}),
+            "computed_at": computed_at,
+            "expires_at": computed_at + interval,
+            "duration_seconds": round(computed_at - started, 3),
+        }
+        with self._lock:
+            self.snapshots[query] = snapshot
+            SNAPSHOTS.set(len(self.snapshots))
+        REFRESHES.inc(result="ok")
+        return snapshot
+
+    def run_once(self, now=None):
+        """Refreshes every target that is missing or close to expiry; returns the number refreshed."""
+        now = time.time() if now is None else now
+        refreshed = 0
+        for report_id, query, interval in self.targets(now):
+            if self._stop.is_set():
+                break
+            if self.due(query, interval, now) and self.refresh(report_id, query, interval):
+                refreshed += 1
+        return refreshed
+
+    def get(self, query, now=None):
+        """The snapshot for a bound query with its age, or None when there is none or it has expired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            snapshot = self.snapshots.get(query)
+        if snapshot is None or now >= snapshot["expires_at"]:
+            return None
+        SNAPSHOT_HITS.inc()
+        return {**snapshot, "age_seconds": round(now - snapshot["computed_at"], 3)}
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Report scheduler tick failed")
+            self._stop.wait(self.tick_seconds)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="report-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -1,11 +1,23 @@
 import json
 import os
 import re
+from collections import Counter
+
+from src.config import Config
+from src.logger import get_file_logger, get_logger
+from src.report_scheduler import ReportScheduler
+
+logger = get_logger("reports_manager")
+
+PARAMETER_VALUE = re.compile(r"\d+|\d{4}-\d{2}-\d{2}")
 
 class ReportsManager:
-    def __init__(self, filepath="reports.json"):
+    def __init__(self, filepath="reports.json", database=None):
         self.filepath = filepath
+        # Hosted database these reports run on; tags its entries in the shared execution log
+        self.database = database
         self.reports = self.load_reports()
+        self.scheduler = None
 
     def load_reports(self):
         if not os.path.exists(self.filepath):
@@ -14,7 +26,7 @@ class ReportsManager:
             with open(self.filepath, 'r') as f:
                 return json.load(f)
         except Exception as e:
-            print(f"Error loading reports: {e}")
+            logger.error("Error loading reports: %s", e)
             return {}
 
     def find_report_id(self, text):
@@ -24,6 +36,21 @@ class ReportsManager:
                 return report_id
         return None
 
+    def find_report_ids(self, text):
+        """Every report ID mentioned in the text, in order of appearance."""
+        found = []
+        for report_id in self.reports.keys():
+            match = re.search(rf"\b{report_id}\b", text, re.IGNORECASE)
+            if match:
+                found.append((match.start(), report_id))
+        return [report_id for _, report_id in sorted(found)]
+
+    def strip_report_ids(self, text):
+        """Removes all report IDs so their digits are not taken for parameters of another report."""
+        for report_id in self.reports.keys():
+            text = re.sub(rf"\b{report_id}\b", "", text, flags=re.IGNORECASE)
+        return text
+
     def extract_parameters(self, text):
         params = {}
         # Extract dates (YYYY-MM-DD)
@@ -55,10 +82,24 @@ class ReportsManager:
             return None
 
         clean_text = re.sub(rf"\b{report_id}\b", "", user_text, flags=re.IGNORECASE)
-        query = report["query"]
-        params = self.extract_parameters(clean_text)
+        return self.bind_parameters(report_id, self.extract_parameters(clean_text))
+
+    def bind_parameters(self, report_id, params):
+        """
+        Substitutes parameter values into the report query. Values are limited to
+        integers and YYYY-MM-DD dates (what extract_parameters produces), since
+        they are written into the SQL text.
+        """
+        report = self.get_report(report_id)
+        if not report:
+            return None
 
+        query = report["query"]
         for key, val in params.items():
+            val = str(val).strip()
+            if not PARAMETER_VALUE.fullmatch(val):
+                raise ValueError(f"Invalid value for parameter '{key}': expected an integer or YYYY-MM-DD date")
+
             # Placeholders can be :key or {key}
 
             # Heuristic for replacement
@@ -82,17 +123,10 @@ class ReportsManager:
         return query
 
     def get_missing_variables(self, report_id, user_text):
-        report = self.get_report(report_id)
-        if not report:
+        required_vars = self.required_variables(report_id)
+        if not required_vars:
             return []
 
-        query = report["query"]
-        # Convert :var to {var} for uniform variable finding
-        temp_query = re.sub(r":(\w+)", r"{\1}", query)
-
-        # Find all required variables in {var} format
-        required_vars = list(set(re.findall(r"\{(\w+)\}", temp_query)))
-
         clean_text = re.sub(rf"\b{report_id}\b", "", user_text, flags=re.IGNORECASE)
         params = self.extract_parameters(clean_text)
 
@@ -102,21 +136,91 @@ class ReportsManager:
     def get_report(self, report_id):
         return self.reports.get(report_id)
 
+    def required_variables(self, report_id):
+        report = self.get_report(report_id)
+        if not report:
+            return []
+
+        # Convert :var to {var} for uniform variable finding
+        temp_query = re.sub(r":(\w+)", r"{\1}", report["query"])
+        return sorted(set(re.findall(r"\{(\w+)\}", temp_query)))
+
+    def hot_bindings(self, log_file="report_execution.log", limit=5, min_count=3):
+        """
+        The most executed (report_id, bound query) pairs of parameterized reports
+        in the execution log, counting only entries of this manager's database.
+        """
+        if not os.path.exists(log_file):
+            return []
+        try:
+            with open(log_file, "r", encoding="utf-8") as f:
+                text = f.read()
+        except Exception as e:
+            logger.error("Error reading report execution log: %s", e)
+            return []
+
+        entries = re.findall(
+            r"^Report ID: (\S+)\n(?:Report Name: .*\n)?(?:Database: (\S+)\n)?Query: (.+)$", text, re.MULTILINE
+        )
+        counts = Counter(
+            (report_id, query.strip())
+            for report_id, database, query in entries
+            if (database or None) == self.database and self.required_variables(report_id)
+        )
+        return [key for key, count in counts.most_common(limit) if count >= min_count]
+
+    def precompute_targets(self, log_file="report_execution.log"):
+        """
+        Returns [(report_id, query, refresh interval)]: reports with `precompute` or a
+        `refresh_interval` that take no parameters, and the hot bindings of
+        parameterized reports from the execution log.
+        """
+        targets = {}
+        for report_id, report in self.reports.items():
+            if not (report.get("precompute") or report.get("refresh_interval")):
+                continue
+            if self.required_variables(report_id):
+                continue
+            interval = report.get("refresh_interval") or Config.REPORT_REFRESH_INTERVAL
+            targets[report["query"]] = (report_id, report["query"], interval)
+
+        for report_id, query in self.hot_bindings(log_file, Config.REPORT_HOT_BINDINGS, Config.REPORT_HOT_MIN_COUNT):
+            report = self.get_report(report_id)
+            if report and query not in targets:
+                interval = report.get("refresh_interval") or Config.REPORT_REFRESH_INTERVAL
+                targets[query] = (report_id, query, interval)
+        return list(targets.values())
+
+    def start_scheduler(self, runner):
+        """Starts background precomputation; `runner(report_id, query)` returns the answer (see ReportScheduler)."""
+        if self.scheduler is None:
+            self.scheduler = ReportScheduler(self, runner, refresh_ahead=Config.REPORT_REFRESH_AHEAD)
+        self.scheduler.start()
+        return self.scheduler
+
+    def get_snapshot(self, query):
+        """A fresh precomputed snapshot for a bound report query, or None."""
+        if self.scheduler is None:
+            return None
+        return self.scheduler.get(query)
+
     def log_execution(self, report_id, query, log_file="report_execution.log"):
+        """Appends an execution record; the write happens on the logging thread."""
         from datetime import datetime
         report = self.get_report(report_id)
         report_name = report["name"] if report else "Unknown"
 
+        database = f"Database: {self.database}\n" if self.database else ""
         log_entry = (
             f"Timestamp: {datetime.now().isoformat()}\n"
             f"Report ID: {report_id}\n"
             f"Report Name: {report_name}\n"
+            f"{database}"
             f"Query: {query}\n"
-            f"{'-'*40}\n"
+            f"{'-'*40}"
         )
 
         try:
-            with open(log_file, "a") as f:
-                f.write(log_entry)
+            get_file_logger("report_execution", log_file).info(log_entry)
         except Exception as e:
-            print(f"Error logging report execution: {e}")
+            logger.error("Error logging report execution: %s", e)
@@ -0,0 +1,221 @@
+"""
+Server-side result sets for paging through large answers.
+
+Rows are serialised once into newline-delimited JSON with an array of byte
+offsets, so any page is one slice (or one seek and read) plus decoding just
+the rows of that page. Sets are kept in memory up to a byte budget; sets
+registered beyond it are written to `spill_dir` instead. Each set expires
+`ttl_seconds` after it was last read.
+"""
+import csv
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from array import array
+
+from src import metrics
+from src.logger import get_logger
+from src.sql_generator import format_rows_markdown
+
+logger = get_logger("result_store")
+
+RESULT_SETS = metrics.REGISTRY.gauge(
+    "dbllm_result_sets", "Server-side result sets held for paging", ("storage",)
+)
+RESULT_BYTES = metrics.REGISTRY.gauge(
+    "dbllm_result_set_bytes", "Bytes of serialised rows in result sets", ("storage",)
+)
+PAGES = metrics.REGISTRY.counter(
+    "dbllm_result_pages_total", "Result set pages served", ("format",)
+)
+
+FORMATS = ("json", "csv", "markdown")
+
+
+class ResultSetNotFound(KeyError):
+    """Unknown or expired result set id; maps to HTTP 404."""
+
+
+class _ResultSet:
+    __slots__ = ("id", "columns", "sql", "truncated", "offsets", "data", "path", "expires_at", "nbytes")
+
+    @property
+    def total_rows(self):
+        return len(self.offsets) - 1
+
+
+class ResultStore:
+    def __init__(self, ttl_seconds=900, max_rows=10000, memory_mb=64, spill_dir="result_sets"):
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.memory_budget = int(memory_mb * 1024 * 1024)
+        self.spill_dir = spill_dir
+        self._sets = {}
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def register(self, columns, rows, sql=None, truncated=False, page_size=None, ttl_seconds=None):
+        """
+        Stores up to `max_rows` rows and returns the set's cursor (see describe).
+        `ttl_seconds` overrides the initial lifetime, e.g. for sets behind a report snapshot.
+        """
+        rows = list(rows)
+        if len(rows) > self.max_rows:
+            rows = rows[:self.max_rows]
+            truncated = True
+
+        data = bytearray()
+        offsets = array("Q", [0])
+        for row in rows:
+            data += json.dumps(list(row), default=str, separators=(",", ":")).encode("utf-8")
+            data += b"\n"
+            offsets.append(len(data))
+
+        result = _ResultSet()
+        result.id = uuid.uuid4().hex
+        result.columns = list(columns)
+        result.sql = sql
+        result.truncated = truncated
+        result.offsets = offsets
+        result.nbytes = len(data)
+        result.data = bytes(data)
+        result.path = None
+
+        with self._lock:
+            self._purge(time.time())
+            if self._memory_bytes + result.nbytes > self.memory_budget:
+                try:
+                    self._spill(result)
+                except OSError as e:
+                    logger.warning("Could not spill result set to %s: %s", self.spill_dir, e)
+            if result.path is None:
+                self._memory_bytes += result.nbytes
+            result.expires_at = time.time() + (ttl_seconds or self.ttl_seconds)
+            self._sets[result.id] = result
+            self._update_gauges()
+        return self.describe(result, page_size)
+
+    def _spill(self, result):
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{result.id}.jsonl")
+        with open(path, "wb") as f:
+            f.write(result.data)
+        result.path = path
+        result.data = None
+
+    def _drop(self, result):
+        if result.path is None:
+            self._memory_bytes -= result.nbytes
+        else:
+            try:
+                os.remove(result.path)
+            except OSError:
+                pass
+
+    def _purge(self, now):
+        for result_id in [rid for rid, r in self._sets.items() if r.expires_at <= now]:
+            self._drop(self._sets.pop(result_id))
+
+    def _update_gauges(self):
+        spilled = [r for r in self._sets.values() if r.path is not None]
+        RESULT_SETS.set(len(self._sets) - len(spilled), storage="memory")
+        RESULT_SETS.set(len(spilled), storage="disk")
+        RESULT_BYTES.set(self._memory_bytes, storage="memory")
+        RESULT_BYTES.set(sum(r.nbytes for r in spilled), storage="disk")
+
+    def _get(self, result_id):
+        with self._lock:
+            now = time.time()
+            self._purge(now)
+            result = self._sets.get(result_id)
+            if result is None:
+                self._update_gauges()
+                raise ResultSetNotFound(result_id)
+            # Sliding expiry: a set stays alive while someone is paging through it
+            result.expires_at = max(result.expires_at, now + self.ttl_seconds)
+            return result
+
+    @staticmethod
+    def describe(result, page_size=None):
+        cursor = {
+            "id": result.id,
+            "columns": result.columns,
+            "total_rows": result.total_rows,
+            "truncated": result.truncated,
+            "expires_at": result.expires_at,
+        }
+        if page_size is not None:
+            cursor["page_size"] = page_size
+            cursor["next_offset"] = page_size if page_size < result.total_rows else None
+        return cursor
+
+    def page(self, result_id, offset=0, limit=50):
+        """Rows [offset, offset + limit) with paging metadata; no SQL or LLM involved."""
+        result = self._get(result_id)
+        offset = max(0, offset)
+        end = min(result.total_rows, offset + max(0, limit))
+        rows = []
+        if offset < end:
+            start_byte, end_byte = result.offsets[offset], result.offsets[end]
+            if result.path is None:
+                chunk = result.data[start_byte:end_byte]
+            else:
+                with open(result.path, "rb") as f:
+                    f.seek(start_byte)
+                    chunk = f.read(end_byte - start_byte)
+            rows = [json.loads(line) for line in chunk.splitlines()]
+        return {
+            "id": result.id,
+            "columns": result.columns,
+            "rows": rows,
+            "offset": offset,
+            "limit": limit,
+            "total_rows": result.total_rows,
+            "truncated": result.truncated,
+            "next_offset": end if end < result.total_rows else None,
+        }
+
+    def render(self, page, fmt="json"):
+        """Returns the page as a dict (json) or as CSV/Markdown text."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+        PAGES.inc(format=fmt)
+        if fmt == "json":
+            return page
+        if fmt == "csv":
+            out = io.StringIO()
+            writer = csv.writer(out)
+            writer.writerow(page["columns"])
+            writer.writerows(page["rows"])
+            return out.getvalue()
+        return format_rows_markdown(page["columns"], page["rows"])
+
+    def iter_csv(self, result_id, chunk_rows=1000):
+        """Yields the whole result set as CSV text, `chunk_rows` rows at a time."""
+        first = self.page(result_id, 0, chunk_rows)
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(first["columns"])
+        page = first
+        while True:
+            writer.writerows(page["rows"])
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+            if page["next_offset"] is None:
+                break
+            page = self.page(result_id, page["next_offset"], chunk_rows)
+
+    def delete(self, result_id):
+        with self._lock:
+            result = self._sets.pop(result_id, None)
+            if result is None:
+                raise ResultSetNotFound(result_id)
+            self._drop(result)
+            self._update_gauges()
+
+    def __len__(self):
+        return len(self._sets)
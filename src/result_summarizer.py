@@ -0,0 +1,218 @@
+"""
+Local digest of large query results for LLM prompts.
+
+Instead of the text of every row, the LLM gets per-column statistics
+(count, nulls, min/max/mean/percentiles for numbers, top values for text,
+range for dates), the top groups of the lowest-cardinality text column by
+each numeric column, and a small sample. Statistics are computed with NumPy
+over whole columns, so the prompt stays the same size whatever the row count.
+"""
+import ast
+import datetime
+import decimal
+
+import numpy as np
+
+from src.sql_generator import format_rows_markdown
+
+PERCENTILES = (25, 50, 75, 95)
+
+
+def _fmt(value):
+    if isinstance(value, (float, np.floating)):
+        return f"{float(value):.6g}"
+    return str(value)
+
+
+def _numeric(values):
+    """Float array of the column, or None when a value is not a number."""
+    if any(isinstance(v, (str, bytes, datetime.date)) for v in values[:100]):
+        return None
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return None
+
+
+def _dates(values):
+    if not all(isinstance(v, datetime.date) for v in values[:100]):
+        return None
+    try:
+        dates = np.asarray(values, dtype="datetime64[s]")
+    except (TypeError, ValueError):
+        return None
+    days = dates.astype("datetime64[D]")
+    return days if (days == dates).all() else dates
+
+
+def _column_stats(name, column, top_n):
+    present = [v for v in column if v is not None]
+    stats = {"name": name, "count": len(present), "nulls": len(column) - len(present)}
+    if not present:
+        stats["type"] = "empty"
+        return stats, None
+
+    numbers = _numeric(present)
+    if numbers is not None:
+        numbers = numbers[~np.isnan(numbers)]
+    if numbers is not None and numbers.size:
+        stats.update(
+            type="numeric",
+            min=numbers.min(),
+            max=numbers.max(),
+            mean=numbers.mean(),
+            sum=numbers.sum(),
+            percentiles=dict(zip(PERCENTILES, np.percentile(numbers, PERCENTILES))),
+        )
+        return stats, None
+
+    dates = _dates(present)
+    if dates is not None:
+        stats.update(type="date", min=dates.min(), max=dates.max())
+        return stats, None
+
+    labels = np.asarray([str(v) for v in present])
+    uniques, counts = np.unique(labels, return_counts=True)
+    stats.update(type="text", distinct=int(uniques.size))
+    # Mostly-unique columns (names, ids as text) have no meaningful top values
+    if uniques.size <= max(top_n, len(present) // 2):
+        order = np.argsort(-counts, kind="stable")[:top_n]
+        stats["top"] = [(uniques[i], int(counts[i])) for i in order]
+    return stats, (labels, uniques.size)
+
+
+def _top_groups(key_name, keys, value_name, values, top_n):
+    """Sum, mean and row count of `values` per key, largest sums first (rows with a null value are skipped)."""
+    valid = ~np.isnan(values)
+    groups, inverse = np.unique(keys[valid], return_inverse=True)
+    sums = np.bincount(inverse, weights=values[valid], minlength=groups.size)
+    counts = np.bincount(inverse, minlength=groups.size)
+    order = np.argsort(-sums, kind="stable")[:top_n]
+    return {
+        "by": key_name,
+        "value": value_name,
+        "groups": [(groups[i], sums[i], sums[i] / counts[i], int(counts[i])) for i in order],
+    }
+
+
+def summarize(columns, rows, top_n=5, sample_rows=10, max_group_columns=3):
+    """Returns a digest dict of the result; see render_digest()."""
+    rows = list(rows)
+    columns = list(columns) or [f"col{i + 1}" for i in range(len(rows[0]) if rows else 0)]
+    stats = []
+    text_keys = []
+    numeric = []
+    for i, (name, column) in enumerate(zip(columns, zip(*rows) if rows else [() for _ in columns])):
+        column_stats, labels = _column_stats(name, list(column), top_n)
+        stats.append(column_stats)
+        if labels is not None and 1 < labels[1] <= 50:
+            text_keys.append((labels[1], name, i))
+        # Sums of identifiers mean nothing, so they are not grouped
+        if column_stats.get("type") == "numeric" and not (name.lower() == "id" or name.lower().endswith("_id")):
+            numeric.append((name, i))
+
+    group_by = []
+    if text_keys:
+        _, key_name, key_index = min(text_keys)
+        non_null = [row for row in rows if row[key_index] is not None]
+        keys = np.asarray([str(row[key_index]) for row in non_null])
+        for value_name, value_index in numeric[:max_group_columns]:
+            values = np.asarray(
+                [np.nan if row[value_index] is None else float(row[value_index]) for row in non_null]
+            )
+            group_by.append(_top_groups(key_name, keys, value_name, values, top_n))
+
+    return {
+        "row_count": len(rows),
+        "columns": stats,
+        "group_by": group_by,
+        "sample_columns": columns,
+        "sample": rows[:sample_rows],
+    }
+
+
+def render_digest(digest):
+    """Compact text form of a digest for an LLM prompt."""
+    lines = [f"Rows: {digest['row_count']}, columns: {len(digest['columns'])}"]
+    for c in digest["columns"]:
+        head = f"- {c['name']} ({c.get('type')}): {c['count']} values, {c['nulls']} nulls"
+        if c.get("type") == "numeric":
+            pct = ", ".join(f"p{p} {_fmt(v)}" for p, v in c["percentiles"].items())
+            head += f", min {_fmt(c['min'])}, max {_fmt(c['max'])}, mean {_fmt(c['mean'])}, sum {_fmt(c['sum'])}, {pct}"
+        elif c.get("type") == "date":
+            head += f", from {c['min']} to {c['max']}"
+        elif c.get("type") == "text":
+            head += f", {c['distinct']} distinct"
+            if c.get("top"):
+                head += "; top: " + ", ".join(f"{v} ({n})" for v, n in c["top"])
+        lines.append(head)
+    for g in digest["group_by"]:
+        groups = "; ".join(
+            f"{key}: sum {_fmt(total)}, mean {_fmt(mean)}, {n} rows" for key, total, mean, n in g["groups"]
+        )
+        lines.append(f"Top {g['by']} by total {g['value']}: {groups}")
+    if digest["sample"]:
+        lines.append(f"Sample (first {len(digest['sample'])} rows):")
+        lines.append(format_rows_markdown(digest["sample_columns"], digest["sample"]))
+    return "\n".join(lines)
+
+
+# Constructors that appear in the repr of database rows, besides plain literals
+_ROW_VALUE_TYPES = {
+    "Decimal": decimal.Decimal,
+    "decimal.Decimal": decimal.Decimal,
+    "datetime.date": datetime.date,
+    "datetime.datetime": datetime.datetime,
+    "datetime.time": datetime.time,
+    "datetime.timedelta": datetime.timedelta,
+    "datetime.timezone": datetime.timezone,
+}
+
+
+def _row_value(node):
+    """Evaluates one node of a row repr: literals and the constructors above, nothing else."""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Tuple):
+        return tuple(_row_value(e) for e in node.elts)
+    if isinstance(node, ast.List):
+        return [_row_value(e) for e in node.elts]
+    if isinstance(node, ast.Dict):
+        return {_row_value(k): _row_value(v) for k, v in zip(node.keys, node.values)}
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _row_value(node.operand)
+        if isinstance(value, (int, float, complex, decimal.Decimal)):
+            return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.Attribute) and ast.unparse(node) == "datetime.timezone.utc":
+        return datetime.timezone.utc
+    if isinstance(node, ast.Call) and ast.unparse(node.func) in _ROW_VALUE_TYPES:
+        return _ROW_VALUE_TYPES[ast.unparse(node.func)](
+            *[_row_value(a) for a in node.args], **{k.arg: _row_value(k.value) for k in node.keywords}
+        )
+    raise ValueError(f"Unsupported value in rows: {ast.unparse(node)[:80]}")
+
+
+def parse_rows(text):
+    """
+    The rows of a SQL tool observation (the repr of a list of tuples), including
+    Decimal and date/time values, which ast.literal_eval rejects.
+    """
+    return _row_value(ast.parse(text.strip(), mode="eval").body)
+
+
+def compact_observation(observation, min_rows=50, max_chars=4000, **kwargs):
+    """
+    Shrinks an agent SQL observation (the text of a list of row tuples) for a
+    prompt: a digest when it parses into more than `min_rows` rows, otherwise
+    the text cut at `max_chars`.
+    """
+    text = str(observation)
+    try:
+        rows = parse_rows(text) if len(text) > max_chars or text.count("),") >= min_rows else None
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        rows = None
+    if isinstance(rows, list) and len(rows) > min_rows and all(isinstance(r, tuple) for r in rows):
+        return render_digest(summarize([], rows, **kwargs))
+    if len(text) > max_chars:
+        return text[:max_chars] + f"\n... [truncated, {len(text)} characters in total]"
+    return text
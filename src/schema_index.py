@@ -0,0 +1,102 @@
+"""
+Exact in-memory vector index for schema retrieval.
+
+A schema has at most a few thousand tables, so one matrix product over a
+contiguous, L2-normalised float32 matrix is both faster than an HNSW query
+and exact. Chroma stays the persistent store; this index is loaded from it
+at startup and updated incrementally when the schema is refreshed.
+"""
+import threading
+
+import numpy as np
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms)
+
+
+class SchemaVectorIndex:
+    def __init__(self):
+        # (names, matrix) is replaced as a whole, so readers never see a half-updated index
+        self._snapshot = ([], np.zeros((0, 0), dtype=np.float32))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._snapshot[0])
+
+    @property
+    def names(self):
+        return list(self._snapshot[0])
+
+    def load(self, names, vectors):
+        """Replaces the whole index."""
+        names = list(names)
+        matrix = _normalize(vectors) if names else np.zeros((0, 0), dtype=np.float32)
+        with self._lock:
+            self._snapshot = (names, matrix)
+
+    def upsert(self, names, vectors):
+        """Adds or replaces the rows of `names`."""
+        if not names:
+            return
+        new_rows = _normalize(vectors)
+        with self._lock:
+            current, matrix = self._snapshot
+            positions = {name: i for i, name in enumerate(current)}
+            names_out = list(current)
+            matrix_out = matrix.copy() if len(current) else np.zeros((0, new_rows.shape[1]), dtype=np.float32)
+            appended = []
+            for name, row in zip(names, new_rows):
+                if name in positions:
+                    matrix_out[positions[name]] = row
+                else:
+                    positions[name] = len(names_out)
+                    names_out.append(name)
+                    appended.append(row)
+            if appended:
+                matrix_out = np.vstack([matrix_out, np.stack(appended)])
+            self._snapshot = (names_out, np.ascontiguousarray(matrix_out))
+
+    def remove(self, names):
+        drop = set(names)
+        with self._lock:
+            current, matrix = self._snapshot
+            keep = [i for i, name in enumerate(current) if name not in drop]
+            if len(keep) == len(current):
+                return
+            self._snapshot = ([current[i] for i in keep], np.ascontiguousarray(matrix[keep]))
+
+    def scores(self, vector):
+        """Cosine similarity of `vector` to every table, as {name: score}."""
+        names, matrix = self._snapshot
+        if not names:
+            return {}
+        row = _normalize(vector)[0] @ matrix.T
+        return dict(zip(names, row.tolist()))
+
+    def search(self, vector, k=3):
+        """Returns [(name, cosine similarity)] of the `k` nearest tables, best first."""
+        return self.search_batch([vector], k)[0]
+
+    def search_batch(self, vectors, k=3):
+        """Top-k for several query vectors with one matrix product."""
+        names, matrix = self._snapshot
+        if not names:
+            return [[] for _ in vectors]
+        queries = _normalize(vectors)
+        scores = queries @ matrix.T
+        k = min(k, len(names))
+        if k < len(names):
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(len(names)), (len(queries), 1))
+        results = []
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates])]
+            results.append([(names[i], float(row[i])) for i in ordered])
+        return results
@@ -0,0 +1,78 @@
+"""
+Single-flight execution: concurrent calls with the same key share one run.
+
+The first caller for a key computes the result; callers arriving while it is
+in flight wait on the same future instead of repeating the work. Sync callers
+(FastAPI's threadpool) and async callers share one in-flight table.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from src import metrics
+
+COALESCED = metrics.REGISTRY.counter(
+    "dbllm_coalesced_requests_total", "Requests answered by an identical in-flight request"
+)
+IN_FLIGHT = metrics.REGISTRY.gauge(
+    "dbllm_single_flight_keys", "Distinct questions currently being computed"
+)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def _join_or_lead(self, key):
+        """Returns (future, leader)."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                COALESCED.inc()
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            IN_FLIGHT.set(len(self._in_flight))
+            return future, True
+
+    def _finish(self, key):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            IN_FLIGHT.set(len(self._in_flight))
+
+    def do(self, key, fn):
+        """Runs `fn()` once per key at a time. Returns (result, leader); exceptions reach every caller."""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return future.result(), False
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key, fn):
+        """Async variant: the leader runs the blocking `fn` in the default executor."""
+        future, leader = self._join_or_lead(key)
+        if not leader:
+            return await asyncio.wrap_future(future), False
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(None, fn)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, True
+        finally:
+            self._finish(key)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._in_flight)
@@ -0,0 +1,67 @@
+"""
+Prompt building and output handling for single-shot SQL generation.
+
+Instead of letting the ReAct agent discover the schema with tool calls, the
+schema of the RAG-selected tables goes straight into one prompt and the model
+answers with a single query. The static instructions and the schema come
+before the question, so backends with a prefix cache reuse that part.
+"""
+import re
+
+SQL_FENCE = re.compile(r"```(?:sql)?\s*(.*?)```", re.IGNORECASE | re.DOTALL)
+SQL_START = re.compile(r"\b(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def build_sql_prompt(schema, dialect, question, extra_context=None, previous_sql=None, error=None):
+    prompt = (
+        f"You are an expert SQL analyst. Write one read-only {dialect} SQL query that answers the question.\n"
+        "Use only the tables and columns below. Return only the SQL, without explanation.\n\n"
+        f"{schema}\n\n"
+    )
+    if extra_context:
+        prompt += f"{extra_context}\n\n"
+    prompt += f"Question: {question}\n"
+    if previous_sql is not None:
+        prompt += (
+            f"Previous SQL:\n{previous_sql}\n"
+            f"It failed with: {error}\n"
+            "Return a corrected query.\n"
+        )
+    return prompt + "SQL:"
+
+
+def extract_sql(text):
+    """Pulls the query out of a completion: code fences, leading prose and trailing text are dropped."""
+    text = text.content if hasattr(text, "content") else str(text)
+    fenced = SQL_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    match = SQL_START.search(text)
+    if match:
+        text = text[match.start():]
+    # Keep the first statement only
+    return text.strip().split(";")[0].strip()
+
+
+def check_read_only(sql):
+    """Returns an error message if `sql` is not a single SELECT statement, else None."""
+    if not sql:
+        return "The response did not contain a SQL query."
+    if not SQL_START.match(sql.lstrip("( \n\t")):
+        return "Only SELECT queries are allowed."
+    return None
+
+
+def format_rows_markdown(columns, rows, max_rows=None):
+    if not rows:
+        return "No records found."
+    shown = rows[:max_rows] if max_rows else rows
+    lines = [
+        "| " + " | ".join(str(c) for c in columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    for row in shown:
+        lines.append("| " + " | ".join("" if v is None else str(v) for v in row) + " |")
+    if max_rows and len(rows) > max_rows:
+        lines.append(f"\n_Showing the first {max_rows} rows._")
+    return "\n".join(lines)
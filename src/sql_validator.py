@@ -0,0 +1,169 @@
+"""
+Local SQL validation before execution.
+
+Generated queries are parsed with sqlglot and checked against the cached
+schema catalogue: only single read-only statements, only known tables and
+columns. Common dialect mismatches (LIMIT vs FETCH FIRST, SUM over a
+boolean predicate on Oracle) are rewritten for the target database. A
+rejected query never reaches the database; the error goes straight back to
+the agent as its observation.
+"""
+import difflib
+import functools
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+
+from src import metrics
+
+VALIDATIONS = metrics.REGISTRY.counter(
+    "dbllm_sql_validations_total", "Generated SQL checked locally before execution", ("result",)
+)
+
+# Engine dialect name -> sqlglot dialect
+DIALECTS = {"sqlite": "sqlite", "mysql": "mysql", "oracle": "oracle", "postgresql": "postgres"}
+
+READ_ONLY_ROOTS = tuple(
+    getattr(exp, name) for name in ("Select", "Union", "Intersect", "Except") if hasattr(exp, name)
+)
+WRITE_NODES = tuple(
+    getattr(exp, name)
+    for name in ("Insert", "Update", "Delete", "Merge", "Drop", "Create", "Alter", "AlterTable",
+                 "TruncateTable", "Command", "Into", "Lock")
+    if hasattr(exp, name)
+)
+# Identifiers some dialects parse as columns
+PSEUDO_COLUMNS = {
+    "rownum", "rowid", "level", "sysdate", "systimestamp", "current_date",
+    "current_timestamp", "current_time", "user",
+}
+BUILTIN_TABLES = {"dual"}
+
+
+class SQLValidationError(ValueError):
+    """A generated query was rejected without being executed."""
+
+
+def _suggest(name, candidates):
+    matches = difflib.get_close_matches(name, candidates, n=3, cutoff=0.6)
+    return f" Did you mean: {', '.join(matches)}?" if matches else ""
+
+
+class SQLValidator:
+    def __init__(self, dialect, catalog):
+        """`catalog` maps lower-case table names to sets of lower-case column names."""
+        self.dialect = DIALECTS.get(dialect, dialect)
+        self.catalog = catalog
+        self._validate_cached = functools.lru_cache(maxsize=512)(self._validate)
+
+    def validate(self, sql):
+        """Returns the query to execute (possibly rewritten for the dialect); raises SQLValidationError."""
+        try:
+            checked = self._validate_cached(sql.strip())
+        except SQLValidationError:
+            VALIDATIONS.inc(result="rejected")
+            raise
+        VALIDATIONS.inc(result="ok" if checked == sql.strip() else "rewritten")
+        return checked
+
+    def _parse(self, sql):
+        try:
+            statements = sqlglot.parse(sql, read=self.dialect)
+        except ParseError:
+            try:
+                # The model may have written another dialect; read it generically and transpile
+                statements = sqlglot.parse(sql, read=None)
+            except ParseError as e:
+                raise SQLValidationError(f"Syntax error: {str(e).splitlines()[0]}")
+        statements = [s for s in statements if s is not None]
+        if not statements:
+            raise SQLValidationError("The query is empty.")
+        if len(statements) > 1:
+            raise SQLValidationError("Only one statement is allowed per query.")
+        return statements[0]
+
+    def _validate(self, sql):
+        tree = self._parse(sql)
+
+        if not isinstance(tree, READ_ONLY_ROOTS) or tree.find(*WRITE_NODES):
+            raise SQLValidationError("Only read-only SELECT queries are allowed.")
+
+        self._check_names(tree)
+
+        rewritten = False
+        if self.dialect == "oracle":
+            rewritten = tree.find(exp.Limit) is not None
+            tree, sums = self._rewrite_boolean_aggregates(tree)
+            rewritten = rewritten or sums
+        elif tree.find(exp.Fetch) is not None:
+            rewritten = True
+
+        if rewritten:
+            return tree.sql(dialect=self.dialect)
+        return sql.rstrip(";").strip()
+
+    def _check_names(self, tree):
+        ctes = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+        known_tables = sorted(self.catalog)
+
+        aliases = {}
+        referenced = set()
+        for table in tree.find_all(exp.Table):
+            name = table.name.lower()
+            if not name or name in ctes or name in BUILTIN_TABLES:
+                continue
+            if name not in self.catalog:
+                raise SQLValidationError(f"Unknown table '{table.name}'.{_suggest(name, known_tables)}")
+            referenced.add(name)
+            aliases[table.alias_or_name.lower()] = name
+            aliases[name] = name
+
+        # Columns of CTEs and derived tables are not in the catalogue
+        derived = bool(ctes) or any(
+            isinstance(source.this, exp.Subquery)
+            for source in list(tree.find_all(exp.From)) + list(tree.find_all(exp.Join))
+        )
+        output_aliases = {a.alias.lower() for a in tree.find_all(exp.Alias)}
+        referenced_columns = set().union(*(self.catalog[t] for t in referenced)) if referenced else set()
+
+        for column in tree.find_all(exp.Column):
+            if isinstance(column.this, exp.Star):
+                continue
+            name = column.name.lower()
+            qualifier = column.table.lower()
+            if name in PSEUDO_COLUMNS:
+                continue
+            if qualifier:
+                table = aliases.get(qualifier)
+                if table is None:
+                    if not derived:
+                        raise SQLValidationError(f"Unknown table or alias '{column.table}' for column '{column.name}'.")
+                    continue
+                if name not in self.catalog[table]:
+                    raise SQLValidationError(
+                        f"Unknown column '{column.name}' in table '{table}'.{_suggest(name, sorted(self.catalog[table]))}"
+                    )
+            elif not derived and referenced and name not in referenced_columns and name not in output_aliases:
+                raise SQLValidationError(
+                    f"Unknown column '{column.name}' in {', '.join(sorted(referenced))}."
+                    f"{_suggest(name, sorted(referenced_columns))}"
+                )
+
+    @staticmethod
+    def _rewrite_boolean_aggregates(tree):
+        """SUM(a = b) -> SUM(CASE WHEN a = b THEN 1 ELSE 0 END); Oracle has no boolean arithmetic."""
+        changed = []
+
+        def rewrite(node):
+            if isinstance(node, (exp.Sum, exp.Avg)) and isinstance(node.this, (exp.Predicate, exp.Connector, exp.Not)):
+                changed.append(node)
+                case = exp.Case(
+                    ifs=[exp.If(this=node.this.copy(), true=exp.Literal.number(1))],
+                    default=exp.Literal.number(0)
+                )
+                return node.__class__(this=case)
+            return node
+
+        tree = tree.transform(rewrite)
+        return tree, bool(changed)
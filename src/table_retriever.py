@@ -0,0 +1,164 @@
+"""
+Hybrid table retrieval: BM25 over schema text fused with vector similarity,
+an adaptive cut-off instead of a fixed k, and foreign-key join expansion.
+
+The lexical side catches questions that name a table or column literally;
+the foreign-key graph adds bridge tables (e.g. `student_attendance` between
+`students` and `classes`) that neither side would rank on its own.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+from itertools import combinations
+
+from src import metrics
+
+TABLES_RETRIEVED = metrics.REGISTRY.histogram(
+    "dbllm_retrieved_tables", "Tables passed to the agent per question",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15)
+)
+JOIN_TABLES_ADDED = metrics.REGISTRY.counter(
+    "dbllm_retrieval_join_tables_total", "Bridge tables added by foreign-key expansion"
+)
+
+WORD = re.compile(r"[a-z0-9_]+")
+
+
+def _stem(token):
+    """Light plural folding so 'classes' matches 'class' and 'categories' matches 'category'."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("sses", "xes", "ches", "shes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Words and the parts of snake_case identifiers, stemmed; 'student_id' -> student_id, student, id."""
+    tokens = []
+    for word in WORD.findall(text.lower()):
+        parts = [p for p in word.split("_") if p]
+        if len(parts) > 1:
+            tokens.append(word)
+        tokens.extend(_stem(p) for p in parts)
+    return tokens
+
+
+def describe_table(name, meta):
+    """Text indexed for a table: its name, comment, column names and column comments."""
+    pieces = [name, meta.get("comment", "")]
+    for column, comment in meta.get("columns", []):
+        pieces.append(column)
+        if comment:
+            pieces.append(comment)
+    return " ".join(p for p in pieces if p)
+
+
+class BM25Index:
+    """Precomputed inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, documents, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_len = {}
+        for name, text in documents.items():
+            counts = Counter(tokenize(text))
+            self.doc_len[name] = sum(counts.values())
+            for token, tf in counts.items():
+                self.postings[token].append((name, tf))
+        n = len(documents)
+        self.avg_len = (sum(self.doc_len.values()) / n) if n else 0.0
+        self.idf = {
+            token: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for token, posting in self.postings.items()
+        }
+
+    def score(self, query):
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self.idf.get(token)
+            if idf is None:
+                continue
+            for name, tf in self.postings[token]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[name] / (self.avg_len or 1.0))
+                scores[name] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return dict(scores)
+
+
+class HybridTableRetriever:
+    def __init__(self, metadata, vector_weight=0.6, min_tables=1, max_tables=6,
+                 score_ratio=0.75, max_gap=0.2, max_join_tables=3):
+        """`metadata` is DBManager.get_table_metadata()."""
+        self.vector_weight = vector_weight
+        self.min_tables = min_tables
+        self.max_tables = max_tables
+        self.score_ratio = score_ratio
+        self.max_gap = max_gap
+        self.max_join_tables = max_join_tables
+
+        self.bm25 = BM25Index({name: describe_table(name, meta) for name, meta in metadata.items()})
+        # Undirected foreign-key graph
+        self.graph = defaultdict(set)
+        for name, meta in metadata.items():
+            for referred in meta.get("references", []):
+                if referred in metadata and referred != name:
+                    self.graph[name].add(referred)
+                    self.graph[referred].add(name)
+
+    def fuse(self, question, vector_scores):
+        """Returns [(table, fused score)] best first; both signals are scaled to [0, 1]."""
+        lexical = self.bm25.score(question)
+        top_lexical = max(lexical.values(), default=0.0)
+        fused = {}
+        for name in set(vector_scores) | set(lexical):
+            vector = max(vector_scores.get(name, 0.0), 0.0)
+            lex = lexical.get(name, 0.0) / top_lexical if top_lexical else 0.0
+            fused[name] = self.vector_weight * vector + (1 - self.vector_weight) * lex
+        return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+    def cut(self, ranked):
+        """Keeps tables until the score falls below a share of the best one or drops by a large gap."""
+        if not ranked:
+            return []
+        best = ranked[0][1]
+        selected = [ranked[0][0]]
+        previous = best
+        for name, score in ranked[1:self.max_tables]:
+            if len(selected) >= self.min_tables and (
+                score < best * self.score_ratio or previous - score > best * self.max_gap
+            ):
+                break
+            selected.append(name)
+            previous = score
+        return selected
+
+    def expand_joins(self, tables, ranked=None):
+        """Adds a bridge table between selected tables that share no direct foreign key."""
+        order = {name: i for i, (name, _) in enumerate(ranked or [])}
+        selected = list(tables)
+        added = 0
+        for a, b in combinations(tables, 2):
+            if added >= self.max_join_tables:
+                break
+            if b in self.graph[a]:
+                continue
+            bridges = self.graph[a] & self.graph[b]
+            if bridges & set(selected):
+                # Already joined through a selected table
+                continue
+            if bridges:
+                bridge = min(bridges, key=lambda n: (order.get(n, len(order)), n))
+                selected.append(bridge)
+                added += 1
+        if added:
+            JOIN_TABLES_ADDED.inc(added)
+        return selected
+
+    def retrieve(self, question, vector_scores):
+        ranked = self.fuse(question, vector_scores)
+        tables = self.expand_joins(self.cut(ranked), ranked)
+        TABLES_RETRIEVED.observe(len(tables))
+        return tables
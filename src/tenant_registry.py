@@ -0,0 +1,232 @@
+"""
+Several databases served by one process.
+
+Each database named in DATABASES gets its own OracleBot with its own engine
+pool (and replica routes), schema catalogue, vector collections (prefixed
+with the database name in the shared Chroma store), report set, caches and
+conversation memory. The embedding model, the LLMs and the result store are
+shared with the default bot. Bots are created on the first request for their
+database and unloaded again when idle for `idle_seconds` or when more than
+`max_loaded` are loaded (least recently used first). Requests hold their bot
+with `acquire`; an evicted bot is closed once the last holder has finished.
+"""
+import contextlib
+import re
+import threading
+import time
+
+from src import metrics
+from src.config import Config
+from src.db_manager import DBManager
+from src.logger import get_logger
+from src.oracle_bot import OracleBot
+from src.reports_manager import ReportsManager
+from src.vector_manager import VectorManager
+
+logger = get_logger("tenant_registry")
+
+# Database names become collection name prefixes, so Chroma's naming rules apply
+DATABASE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,39}")
+
+LOADED = metrics.REGISTRY.gauge(
+    "dbllm_databases_loaded", "Hosted databases with a loaded bot, including the default one"
+)
+LOADS = metrics.REGISTRY.counter(
+    "dbllm_database_loads_total", "Hosted databases loaded on demand or unloaded", ("event",)
+)
+
+
+class UnknownDatabase(KeyError):
+    """The request named a database that is not configured; maps to HTTP 404."""
+
+
+class TenantRegistry:
+    def __init__(self, default_bot, databases=None, default_name="default", max_loaded=8, idle_seconds=1800.0,
+                 sweep_seconds=60.0):
+        """
+        `databases` is {name: {"url": SQLAlchemy URL, "include_tables": [...],
+        "reports_file": path, "engines": {...}, "routes": {...}}}.
+        """
+        self.default_bot = default_bot
+        self.default_name = default_name
+        self.max_loaded = max_loaded
+        self.idle_seconds = idle_seconds
+        self.sweep_seconds = sweep_seconds
+        self.specs = {}
+        for name, spec in (databases or {}).items():
+            if name == default_name or not DATABASE_NAME.fullmatch(name) or "url" not in spec:
+                logger.warning("Ignoring database '%s': needs a 'url' and a name of letters, digits, '_' or '-'", name)
+                continue
+            self.specs[name] = spec
+        # name -> [bot, last used]
+        self._loaded = {}
+        self._loading = {}
+        # bot -> requests holding it; evicted bots still held wait in _closing (bot -> name)
+        self._in_use = {}
+        self._closing = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        LOADED.set(1)
+
+    def names(self):
+        return [self.default_name] + sorted(self.specs)
+
+    def get(self, name=None):
+        """The bot for a database, loading it on first use. Requests should hold it with `acquire` instead."""
+        return self._get(name, hold=False)
+
+    @contextlib.contextmanager
+    def acquire(self, name=None):
+        """Yields the bot for a database; eviction does not close it while it is held."""
+        bot = self._get(name, hold=True)
+        try:
+            yield bot
+        finally:
+            self._release(bot)
+
+    def _use(self, entry, hold):
+        """Marks a loaded bot as used (lock held)."""
+        entry[1] = time.time()
+        if hold:
+            self._in_use[entry[0]] = self._in_use.get(entry[0], 0) + 1
+        return entry[0]
+
+    def _get(self, name, hold):
+        if not name or name == self.default_name:
+            return self.default_bot
+        if name not in self.specs:
+            raise UnknownDatabase(name)
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                return self._use(entry, hold)
+            # Concurrent first requests for the same database wait for one load
+            loading = self._loading.setdefault(name, threading.Lock())
+        with loading:
+            with self._lock:
+                entry = self._loaded.get(name)
+                if entry is not None:
+                    return self._use(entry, hold)
+            bot = self._load(name, self.specs[name])
+            with self._lock:
+                self._loaded[name] = [bot, time.time()]
+                self._use(self._loaded[name], hold)
+                self._loading.pop(name, None)
+                evicted = self._over_capacity()
+            LOADED.set(1 + len(self._loaded))
+        for other in evicted:
+            self._unload(*other)
+        return bot
+
+    def _load(self, name, spec):
+        start = time.perf_counter()
+        db_manager = DBManager(
+            include_tables=spec.get("include_tables"),
+            engines=spec.get("engines", {}),
+            routes=spec.get("routes", {}),
+            url=spec["url"]
+        )
+        vector_manager = VectorManager(
+            db_manager,
+            embeddings=self.default_bot.vector_manager.embeddings,
+            persist_directory=self.default_bot.vector_manager.persist_directory,
+            collection_prefix=f"{name}_"
+        )
+        bot = OracleBot(
+            db_manager,
+            self.default_bot.llm_manager,
+            vector_manager=vector_manager,
+            reports_manager=ReportsManager(spec.get("reports_file", ""), database=name),
+            database=name
+        )
+        bot.llm = self.default_bot.llm
+        bot.result_store = self.default_bot.result_store
+        if Config.VALUE_INDEX:
+            bot.start_value_index()
+        if Config.REPORT_PRECOMPUTE and bot.reports_manager.reports:
+            bot.start_report_scheduler()
+        LOADS.inc(event="load")
+        logger.info("Loaded database '%s' in %.2fs", name, time.perf_counter() - start)
+        return bot
+
+    def _over_capacity(self):
+        """Removes and returns [(name, bot)] of the least recently used bots beyond max_loaded (lock held)."""
+        evicted = []
+        while len(self._loaded) > self.max_loaded:
+            name = min(self._loaded, key=lambda n: self._loaded[n][1])
+            evicted.append((name, self._loaded.pop(name)[0]))
+        return evicted
+
+    def _release(self, bot):
+        if bot is self.default_bot:
+            return
+        with self._lock:
+            self._in_use[bot] -= 1
+            if self._in_use[bot]:
+                return
+            del self._in_use[bot]
+            name = self._closing.pop(bot, None)
+        if name is not None:
+            self._close(name, bot)
+
+    def _unload(self, name, bot):
+        """Closes an evicted bot, or leaves that to the last request still holding it."""
+        with self._lock:
+            if self._in_use.get(bot):
+                self._closing[bot] = name
+                logger.info("Database '%s' evicted while in use; closing after %d request(s)", name, self._in_use[bot])
+                return
+        self._close(name, bot)
+
+    def _close(self, name, bot):
+        try:
+            bot.close()
+        except Exception as e:
+            logger.warning("Error unloading database '%s': %s", name, e)
+        LOADS.inc(event="unload")
+        logger.info("Unloaded database '%s'", name)
+
+    def evict_idle(self, now=None):
+        """Unloads bots unused for `idle_seconds`; returns their names."""
+        now = time.time() if now is None else now
+        with self._lock:
+            idle = [name for name, (_, used) in self._loaded.items() if now - used >= self.idle_seconds]
+            evicted = [(name, self._loaded.pop(name)[0]) for name in idle]
+            LOADED.set(1 + len(self._loaded))
+        for name, bot in evicted:
+            self._unload(name, bot)
+        return [name for name, _ in evicted]
+
+    def status(self):
+        """[{name, loaded, last_used}] of every configured database."""
+        with self._lock:
+            loaded = {name: used for name, (_, used) in self._loaded.items()}
+        databases = [{"name": self.default_name, "loaded": True, "last_used": None}]
+        for name in sorted(self.specs):
+            databases.append({"name": name, "loaded": name in loaded, "last_used": loaded.get(name)})
+        return databases
+
+    def _loop(self):
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                self.evict_idle()
+            except Exception:
+                logger.exception("Idle database sweep failed")
+
+    def start(self):
+        if self.specs and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="tenant-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        with self._lock:
+            loaded = list(self._loaded.items())
+            self._loaded.clear()
+            LOADED.set(1)
+        for name, (bot, _) in loaded:
+            self._unload(name, bot)
@@ -0,0 +1,294 @@
+"""
+Index of stored column values for grounding literals in questions.
+
+The agent otherwise spends iterations on `SELECT DISTINCT status ...` probes
+or guesses spellings like 'Class 10-A'. A background thread reads the
+distinct values of the string columns, a few stale columns per tick, and
+keeps those with at most `fuzzy_max_distinct` values (high-cardinality
+columns such as names are skipped). At question time words of the question
+are matched to stored values, exactly or by character-trigram fuzzy
+matching, and the exact spellings go into the prompt. Columns with at most
+`max_distinct` values are also listed in full when the question names them.
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from sqlalchemy import column, func, inspect, select, table
+from sqlalchemy.types import String
+
+from src import metrics
+from src.logger import get_logger
+
+logger = get_logger("value_index")
+
+INDEXED_VALUES = metrics.REGISTRY.gauge(
+    "dbllm_value_index_values", "Distinct column values held for literal grounding"
+)
+INDEXED_COLUMNS = metrics.REGISTRY.gauge(
+    "dbllm_value_index_columns", "String columns by cardinality class", ("cardinality",)
+)
+VALUE_MATCHES = metrics.REGISTRY.counter(
+    "dbllm_value_matches_total", "Question literals grounded to stored values", ("match",)
+)
+
+WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "all", "are", "by", "for", "from", "how", "in", "is", "list", "many",
+    "of", "on", "or", "show", "the", "to", "was", "were", "what", "which", "who", "with",
+}
+
+
+def _tokens(text):
+    return [t for t in WORD.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Snapshot:
+    """Immutable lookup structures over every indexed value; replaced as a whole after a refresh."""
+
+    def __init__(self, columns):
+        # token -> [(table, column, value, value tokens)]
+        self.postings = defaultdict(list)
+        self.trigrams = defaultdict(set)
+        self.count = 0
+        for (table_name, column_name), entry in columns.items():
+            for value in entry["values"] or ():
+                value_tokens = tuple(dict.fromkeys(_tokens(value)))
+                if not value_tokens:
+                    continue
+                self.count += 1
+                for token in value_tokens:
+                    self.postings[token].append((table_name, column_name, value, value_tokens))
+        for token in self.postings:
+            if token.isalpha() and len(token) >= 4:
+                for gram in _trigrams(token):
+                    self.trigrams[gram].add(token)
+
+
+class ValueIndex:
+    def __init__(self, db_manager, max_distinct=50, fuzzy_max_distinct=1000, refresh_seconds=3600.0,
+                 columns_per_tick=20, tick_seconds=5.0, rescan_seconds=600.0, threshold=0.8):
+        self.db_manager = db_manager
+        self.max_distinct = max_distinct
+        self.fuzzy_max_distinct = fuzzy_max_distinct
+        self.refresh_seconds = refresh_seconds
+        self.columns_per_tick = columns_per_tick
+        self.tick_seconds = tick_seconds
+        self.rescan_seconds = rescan_seconds
+        self.threshold = threshold
+        # {(table, column): {"values": [str] or None when too many, "distinct": int, "refreshed_at": float}}
+        self.columns = {}
+        self._targets = []
+        self._targets_at = None
+        self._snapshot = _Snapshot({})
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return self._snapshot.count
+
+    def string_columns(self, now=None):
+        """[(table, column)] of the string-typed columns of the usable tables, re-read every `rescan_seconds`."""
+        now = time.time() if now is None else now
+        if self._targets_at is None or now - self._targets_at >= self.rescan_seconds:
+            inspector = inspect(self.db_manager.engine_for("schema"))
+            targets = []
+            for table_name in self.db_manager.get_usable_table_names():
+                try:
+                    columns = inspector.get_columns(table_name)
+                except Exception as e:
+                    logger.warning("Could not read columns of %s: %s", table_name, e)
+                    continue
+                targets.extend((table_name, c["name"]) for c in columns if isinstance(c["type"], String))
+            self._targets = targets
+            self._targets_at = now
+            wanted = set(targets)
+            with self._lock:
+                dropped = [k for k in self.columns if k not in wanted]
+                for key in dropped:
+                    del self.columns[key]
+            if dropped:
+                self._rebuild()
+        return self._targets
+
+    def _distinct_values(self, table_name, column_name):
+        """Up to fuzzy_max_distinct + 1 distinct non-null values, most frequent first."""
+        value = column(column_name)
+        query = (
+            select(value, func.count())
+            .select_from(table(table_name))
+            .where(value.is_not(None))
+            .group_by(value)
+            .order_by(func.count().desc(), value)
+            .limit(self.fuzzy_max_distinct + 1)
+        )
+        start = time.perf_counter()
+        with self.db_manager.connect("schema") as connection:
+            rows = connection.execute(query).fetchall()
+        metrics.record_sql(time.perf_counter() - start, len(rows))
+        return [str(row[0]) for row in rows]
+
+    def refresh_column(self, table_name, column_name, now=None):
+        values = self._distinct_values(table_name, column_name)
+        entry = {
+            "values": values if len(values) <= self.fuzzy_max_distinct else None,
+            "distinct": len(values),
+            "refreshed_at": time.time() if now is None else now,
+        }
+        with self._lock:
+            self.columns[(table_name, column_name)] = entry
+        return entry
+
+    def run_once(self, now=None):
+        """
+        Re-reads up to `columns_per_tick` columns that were never read or are
+        older than `refresh_seconds`, oldest first; returns the number read.
+        """
+        now = time.time() if now is None else now
+        targets = self.string_columns(now)
+        stale = [
+            key for key in targets
+            if key not in self.columns or now - self.columns[key]["refreshed_at"] >= self.refresh_seconds
+        ]
+        stale.sort(key=lambda key: self.columns[key]["refreshed_at"] if key in self.columns else float("-inf"))
+        refreshed = 0
+        for table_name, column_name in stale[:self.columns_per_tick]:
+            if self._stop.is_set():
+                break
+            try:
+                self.refresh_column(table_name, column_name, now)
+                refreshed += 1
+            except Exception as e:
+                # Skipped until the next refresh so a failing column does not hold up the others
+                logger.warning("Could not read values of %s.%s: %s", table_name, column_name, e)
+                with self._lock:
+                    self.columns[(table_name, column_name)] = {"values": None, "distinct": 0, "refreshed_at": now}
+        if refreshed:
+            self._rebuild()
+        return refreshed
+
+    def _rebuild(self):
+        with self._lock:
+            columns = dict(self.columns)
+        self._snapshot = _Snapshot(columns)
+        INDEXED_VALUES.set(self._snapshot.count)
+        classes = defaultdict(int)
+        for entry in columns.values():
+            classes[self._cardinality(entry)] += 1
+        for cardinality in ("low", "medium", "high"):
+            INDEXED_COLUMNS.set(classes[cardinality], cardinality=cardinality)
+
+    def _cardinality(self, entry):
+        if entry["values"] is None:
+            return "high"
+        return "low" if entry["distinct"] <= self.max_distinct else "medium"
+
+    def _similar_tokens(self, snapshot, token):
+        """{indexed token: similarity} for a question word: itself, plus close spellings of longer words."""
+        similar = {token: 1.0} if token in snapshot.postings else {}
+        if not (token.isalpha() and len(token) >= 4):
+            return similar
+        grams = _trigrams(token)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in snapshot.trigrams.get(gram, ()):
+                shared[candidate] += 1
+        for candidate, n in shared.items():
+            if candidate == token or 2 * n / (len(grams) + len(_trigrams(candidate))) < self.threshold / 2:
+                continue
+            ratio = SequenceMatcher(None, token, candidate).ratio()
+            if ratio >= self.threshold:
+                similar[candidate] = max(similar.get(candidate, 0.0), ratio)
+        return similar
+
+    def match(self, question, tables=None, limit=8):
+        """
+        Stored values whose every word occurs in the question (exactly or as a
+        close spelling), as [{"table", "column", "value", "score", "match"}],
+        best first, optionally restricted to `tables`.
+        """
+        snapshot = self._snapshot
+        if not snapshot.count:
+            return []
+        allowed = set(tables) if tables else None
+        matched = {}
+        for token in set(_tokens(question)):
+            for indexed, similarity in self._similar_tokens(snapshot, token).items():
+                matched[indexed] = max(matched.get(indexed, 0.0), similarity)
+
+        found = {}
+        for token in matched:
+            for table_name, column_name, value, value_tokens in snapshot.postings[token]:
+                if allowed is not None and table_name not in allowed:
+                    continue
+                if not all(t in matched for t in value_tokens):
+                    continue
+                score = min(matched[t] for t in value_tokens)
+                found[(table_name, column_name, value)] = (score, len(value_tokens))
+
+        # Longer values covered by the question are the more specific match
+        ranked = sorted(found.items(), key=lambda item: (-item[1][0], -item[1][1], item[0]))[:limit]
+        results = []
+        for (table_name, column_name, value), (score, _) in ranked:
+            kind = "exact" if score == 1.0 else "fuzzy"
+            VALUE_MATCHES.inc(match=kind)
+            results.append({"table": table_name, "column": column_name, "value": value,
+                            "score": round(score, 3), "match": kind})
+        return results
+
+    def named_columns(self, question, tables=None):
+        """{(table, column): values} of low-cardinality columns whose name occurs in the question."""
+        words = set(_tokens(question))
+        words |= {w[:-1] for w in words if w.endswith("s")}
+        allowed = set(tables) if tables else None
+        with self._lock:
+            columns = list(self.columns.items())
+        listed = {}
+        for (table_name, column_name), entry in columns:
+            if allowed is not None and table_name not in allowed:
+                continue
+            if self._cardinality(entry) != "low":
+                continue
+            if column_name.lower() in words or set(_tokens(column_name.replace("_", " "))) <= words:
+                listed[(table_name, column_name)] = entry["values"]
+        return listed
+
+    def hints(self, question, tables=None, limit=8):
+        """Prompt text with the stored spellings of the question's literals, or None."""
+        matches = self.match(question, tables, limit)
+        listed = self.named_columns(question, tables)
+        if not matches and not listed:
+            return None
+        lines = ["Stored values for filters (use them exactly as written, no need to look them up):"]
+        for m in matches:
+            lines.append(f"- {m['table']}.{m['column']} = '{m['value']}'")
+        for (table_name, column_name), values in listed.items():
+            lines.append(f"- {table_name}.{column_name} is one of: " + ", ".join(f"'{v}'" for v in values))
+        return "\n".join(lines)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Value index refresh failed")
+            self._stop.wait(self.tick_seconds)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="value-index", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
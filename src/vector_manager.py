@@ -5,42 +5,122 @@ from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 from src.config import Config
+from src.logger import get_logger
+from src.schema_index import SchemaVectorIndex
+from src.table_retriever import HybridTableRetriever
+
+logger = get_logger("vector_manager")
 
 class VectorManager:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, embeddings=None, persist_directory="./chroma_db", collection_prefix=""):
         self.db_manager = db_manager
-        self.persist_directory = "./chroma_db"
-
-        # Use a lightweight open-source embedding model
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
-
-        # Collection for database schema
-        self.schema_db = Chroma(
-            collection_name="db_schema",
-            embedding_function=self.embeddings,
-            persist_directory=self.persist_directory
-        )
-
-        # Collection for chat history (Self-learning)
-        self.chat_db = Chroma(
-            collection_name="chat_history",
-            embedding_function=self.embeddings,
-            persist_directory=self.persist_directory
-        )
-
-        # Initialize schema if empty
-        if len(self.schema_db.get()['ids']) == 0:
-            self.refresh_schema()
+        self.persist_directory = persist_directory
+        # Each hosted database keeps its own collections in the shared store (see TenantRegistry)
+        self.collection_prefix = collection_prefix
+
+        # The embedding model and the Chroma collections are loaded on first use
+        # (or by warm_up() in the background) to keep process startup fast.
+        self._embeddings = embeddings
+        self._schema_db = None
+        self._chat_db = None
+        self._report_db = None
+        self._loaded = False
+        self._loading = False
+        self._load_lock = threading.RLock()
+
+        # Exact in-memory copy of the schema embeddings; Chroma remains the persistent store
+        self.schema_index = SchemaVectorIndex()
+        # BM25 + foreign-key graph over the schema, rebuilt on every schema sync
+        self.table_retriever = None
+        # Report names/descriptions for semantic report matching
+        self.report_index = SchemaVectorIndex()
 
         # Thread pool for background tasks
         self.executor = ThreadPoolExecutor(max_workers=2)
 
+    def warm_up(self):
+        """Loads the embedding model and opens the collections. Safe to call repeatedly."""
+        with self._load_lock:
+            if self._loaded or self._loading:
+                return
+            self._loading = True
+            try:
+                if Config.MODEL_SERVER_ADDRESS:
+                    # Multi-worker mode: the shared sidecar owns the model and Chroma
+                    from src.model_server import ModelServerClient, RemoteCollection, RemoteEmbeddings
+                    client = ModelServerClient(Config.MODEL_SERVER_ADDRESS)
+                    if self._embeddings is None:
+                        self._embeddings = RemoteEmbeddings(client)
+                    self._schema_db = RemoteCollection(client, f"{self.collection_prefix}db_schema")
+                    self._chat_db = RemoteCollection(client, f"{self.collection_prefix}chat_history")
+                    self._report_db = RemoteCollection(client, f"{self.collection_prefix}report_catalog")
+                else:
+                    if self._embeddings is None:
+                        # Use a lightweight open-source embedding model
+                        self._embeddings = HuggingFaceEmbeddings(
+                            model_name="sentence-transformers/all-MiniLM-L6-v2"
+                        )
+
+                    # Collection for database schema
+                    self._schema_db = Chroma(
+                        collection_name=f"{self.collection_prefix}db_schema",
+                        embedding_function=self._embeddings,
+                        persist_directory=self.persist_directory
+                    )
+
+                    # Collection for chat history (Self-learning)
+                    self._chat_db = Chroma(
+                        collection_name=f"{self.collection_prefix}chat_history",
+                        embedding_function=self._embeddings,
+                        persist_directory=self.persist_directory
+                    )
+
+                    # Collection for predefined report names and descriptions
+                    self._report_db = Chroma(
+                        collection_name=f"{self.collection_prefix}report_catalog",
+                        embedding_function=self._embeddings,
+                        persist_directory=self.persist_directory
+                    )
+
+                # Initialize schema if empty
+                if len(self._schema_db.get()['ids']) == 0:
+                    self.refresh_schema()
+                elif Config.SCHEMA_VECTOR_INDEX:
+                    self._load_schema_index()
+                if self.table_retriever is None:
+                    self._build_table_retriever()
+
+                self._loaded = True
+            finally:
+                self._loading = False
+
+    @property
+    def is_loaded(self):
+        return self._loaded
+
+    @property
+    def embeddings(self):
+        if not self._loaded:
+            self.warm_up()
+        return self._embeddings
+
+    @property
+    def schema_db(self):
+        if not self._loaded:
+            self.warm_up()
+        return self._schema_db
+
+    @property
+    def chat_db(self):
+        if not self._loaded:
+            self.warm_up()
+        return self._chat_db
+
     def refresh_schema(self):
         """Extracts schema from DB and populates Chroma."""
-        print("Refreshing schema in Vector DB...")
-        db = self.db_manager.get_db()
+        logger.info("Refreshing schema in Vector DB...")
+        self.db_manager.invalidate_schema_cache()
+        db = self.db_manager.get_db(workload="schema")
 
         # Get table names
         try:
@@ -60,11 +140,88 @@ class VectorManager:
                 )
                 documents.append(doc)
             except Exception as e:
-                print(f"Error extracting schema for {table_name}: {e}")
+                logger.error("Error extracting schema for %s: %s", table_name, e)
 
         if documents:
-            self.schema_db.add_documents(documents)
-            print(f"Added {len(documents)} tables to Vector DB.")
+            # Table names as ids make a refresh an upsert rather than a duplicate insert
+            ids = [d.metadata["table_name"] for d in documents]
+            self.schema_db.add_documents(documents, ids=ids)
+            logger.info("Added %d tables to Vector DB.", len(documents))
+            if Config.SCHEMA_VECTOR_INDEX:
+                self._update_schema_index(ids, table_names)
+        self._build_table_retriever()
+
+    def _build_table_retriever(self):
+        if not Config.HYBRID_RETRIEVAL:
+            return
+        try:
+            self.table_retriever = HybridTableRetriever(
+                self.db_manager.get_table_metadata(),
+                vector_weight=Config.RETRIEVAL_VECTOR_WEIGHT,
+                min_tables=Config.RETRIEVAL_MIN_TABLES,
+                max_tables=Config.RETRIEVAL_MAX_TABLES,
+                score_ratio=Config.RETRIEVAL_SCORE_RATIO,
+                max_join_tables=Config.RETRIEVAL_MAX_JOIN_TABLES
+            )
+        except Exception as e:
+            logger.warning("Hybrid table retrieval unavailable, using vector search only: %s", e)
+
+    def _schema_vectors(self, **kwargs):
+        """Reads (table names, embeddings) back from the schema collection."""
+        data = self._schema_db.get(include=["embeddings", "metadatas"], **kwargs)
+        names = [m["table_name"] for m in data["metadatas"]]
+        return names, data["embeddings"]
+
+    def _load_schema_index(self):
+        try:
+            names, vectors = self._schema_vectors()
+            self.schema_index.load(names, vectors)
+            logger.info("Loaded %d schema embeddings into the in-memory index.", len(names))
+        except Exception as e:
+            logger.warning("In-memory schema index unavailable, using Chroma search: %s", e)
+
+    def _update_schema_index(self, ids, table_names):
+        """Applies a schema sync to the in-memory index: changed tables upserted, dropped ones removed."""
+        try:
+            names, vectors = self._schema_vectors(ids=ids)
+            self.schema_index.upsert(names, vectors)
+            current = set(table_names)
+            dropped = [n for n in self.schema_index.names if n not in current]
+            if dropped:
+                self._schema_db.delete(ids=dropped)
+                self.schema_index.remove(dropped)
+                logger.info("Removed %d dropped tables from Vector DB.", len(dropped))
+        except Exception as e:
+            logger.warning("Could not update in-memory schema index: %s", e)
+
+    def index_reports(self, reports):
+        """
+        Embeds each report's name and description into the report collection
+        (only new or changed ones) and loads them into the in-memory report index.
+        """
+        if not self._loaded:
+            self.warm_up()
+        texts = {rid: f"{r.get('name', '')}. {r.get('description', '')}" for rid, r in reports.items()}
+
+        existing = self._report_db.get(include=["documents"])
+        known = dict(zip(existing["ids"], existing["documents"]))
+        changed = [rid for rid, text in texts.items() if known.get(rid) != text]
+        if changed:
+            self._report_db.add_documents(
+                [Document(page_content=texts[rid], metadata={"report_id": rid}) for rid in changed],
+                ids=changed
+            )
+        stale = [rid for rid in known if rid not in texts]
+        if stale:
+            self._report_db.delete(ids=stale)
+
+        data = self._report_db.get(include=["embeddings"])
+        self.report_index.load(data["ids"], data["embeddings"])
+        logger.info("Indexed %d reports for semantic matching (%d re-embedded).", len(texts), len(changed))
+
+    def match_report(self, embedding, k=2):
+        """Returns [(report_id, cosine similarity)] of the closest reports, best first."""
+        return self.report_index.search(embedding, k=k)
 
     def get_embedding(self, text):
         """Generates embedding for a text string once."""
@@ -80,11 +237,29 @@ class VectorManager:
         results = self.schema_db.similarity_search(query, k=k)
         return [r.metadata["table_name"] for r in results]
 
-    def get_relevant_tables_by_vector(self, embedding, k=3):
-        """Returns names of relevant tables using a pre-calculated vector."""
+    def get_relevant_tables_by_vector(self, embedding, k=3, question=None):
+        """
+        Returns names of relevant tables using a pre-calculated vector. With the
+        question text, lexical and vector scores are fused, k adapts to the score
+        distribution and foreign-key bridge tables are added.
+        """
+        if not self._loaded:
+            self.warm_up()
+        if question and self.table_retriever is not None and len(self.schema_index):
+            return self.table_retriever.retrieve(question, self.schema_index.scores(embedding))
+        if len(self.schema_index):
+            return [name for name, _ in self.schema_index.search(embedding, k=k)]
         results = self.schema_db.similarity_search_by_vector(embedding, k=k)
         return [r.metadata["table_name"] for r in results]
 
+    def get_relevant_tables_by_vectors(self, embeddings, k=3):
+        """Batched get_relevant_tables_by_vector: one matrix product for all query vectors."""
+        if not self._loaded:
+            self.warm_up()
+        if len(self.schema_index):
+            return [[name for name, _ in hits] for hits in self.schema_index.search_batch(embeddings, k=k)]
+        return [self.get_relevant_tables_by_vector(e, k=k) for e in embeddings]
+
     def add_chat_interaction(self, question, answer, sql_queries=None, session_id="default"):
         """
         Stores a chat interaction for future retrieval (self-learning).
@@ -101,9 +276,9 @@ class VectorManager:
                     metadata={"session_id": session_id, "type": "chat_interaction"}
                 )
                 self.chat_db.add_documents([doc])
-                print(f"Saved interaction to Chat Vector DB (session: {session_id}).")
+                logger.debug("Saved interaction to Chat Vector DB (session: %s).", session_id)
             except Exception as e:
-                print(f"Error saving chat interaction to Vector DB: {e}")
+                logger.error("Error saving chat interaction to Vector DB: %s", e)
 
         # Run in background via thread pool
         self.executor.submit(_save)
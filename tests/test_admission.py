@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from src.admission import AdmissionController, AdmissionRejected, Lane
+
+
+class TestAdmissionController(unittest.TestCase):
+
+    def run_async(self, coro):
+        return asyncio.run(coro)
+
+    def test_queue_then_admit(self):
+        controller = AdmissionController([Lane("ask", 1, 4, 5.0, initial_service_seconds=0.01)])
+        order = []
+
+        async def request(name, hold):
+            async with controller.slot("ask"):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        async def main():
+            first = asyncio.ensure_future(request("first", 0.05))
+            await asyncio.sleep(0)
+            await asyncio.gather(first, request("second", 0))
+
+        self.run_async(main())
+        self.assertEqual(order, ["first", "second"])
+        self.assertEqual(controller.stats()["ask"]["active"], 0)
+
+    def test_queue_full_is_shed(self):
+        controller = AdmissionController([Lane("ask", 1, 0, 5.0, initial_service_seconds=2.0)])
+
+        async def main():
+            async with controller.slot("ask"):
+                with self.assertRaises(AdmissionRejected) as ctx:
+                    async with controller.slot("ask"):
+                        pass
+                self.assertGreaterEqual(ctx.exception.retry_after, 1.0)
+
+        self.run_async(main())
+
+    def test_latency_based_shedding(self):
+        controller = AdmissionController([Lane("ask", 1, 10, 5.0, initial_service_seconds=30.0)])
+
+        async def main():
+            async with controller.slot("ask"):
+                with self.assertRaises(AdmissionRejected) as ctx:
+                    async with controller.slot("ask"):
+                        pass
+                self.assertIn("Estimated wait", str(ctx.exception))
+
+        self.run_async(main())
+
+    def test_session_limit(self):
+        controller = AdmissionController([Lane("ask", 4, 4, 5.0)], session_limit=1)
+
+        async def main():
+            async with controller.slot("ask", session_id="alice"):
+                with self.assertRaises(AdmissionRejected):
+                    async with controller.slot("ask", session_id="alice"):
+                        pass
+                # Other sessions are unaffected
+                async with controller.slot("ask", session_id="bob"):
+                    pass
+            async with controller.slot("ask", session_id="alice"):
+                pass
+
+        self.run_async(main())
+
+    def test_wait_timeout(self):
+        controller = AdmissionController([Lane("ask", 1, 4, 0.05, initial_service_seconds=0.0)])
+
+        async def main():
+            async def hold():
+                async with controller.slot("ask"):
+                    await asyncio.sleep(0.3)
+
+            holder = asyncio.ensure_future(hold())
+            await asyncio.sleep(0)
+            with self.assertRaises(AdmissionRejected):
+                async with controller.slot("ask"):
+                    pass
+            await holder
+            self.assertEqual(controller.lanes["ask"].waiting, 0)
+
+        self.run_async(main())
+
+
+if __name__ == "__main__":
+    unittest.main()
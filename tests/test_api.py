@@ -1,3 +1,4 @@
+import contextlib
 import unittest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
@@ -37,6 +38,56 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(data["answer"], "There are 10 students.")
         self.assertEqual(data["sql_queries"], ["SELECT COUNT(*) FROM students"])
 
+    @patch('src.api.bot')
+    def test_ask_overloaded(self, mock_bot):
+        from src.inference_scheduler import SchedulerRejected
+        mock_bot.ask.side_effect = SchedulerRejected("LLM queue is full", retry_after=2.5)
+
+        response = self.client.post("/ask", json={"question": "how many students?"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "3")
+
+    @patch('src.api.bot')
+    def test_ask_shed_when_lane_is_full(self, mock_bot):
+        from src.admission import AdmissionController, Lane
+        controller = AdmissionController([Lane("ask", 1, 0, 30, initial_service_seconds=4.0), Lane("reports", 1, 0, 10)])
+        controller.lanes["ask"].active = 1
+
+        with patch('src.api.admission', controller):
+            response = self.client.post("/ask", json={"question": "how many students?"})
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers["Retry-After"], "4")
+            mock_bot.ask.assert_not_called()
+
+            # Health checks have no lane and stay fast
+            self.assertEqual(self.client.get("/health").status_code, 200)
+
+    @patch('src.api.bot')
+    def test_ask_picks_database(self, mock_bot):
+        from src.tenant_registry import UnknownDatabase
+        mock_bot.ask.return_value = {"answer": "12 students.", "sql_queries": []}
+        tenant_bot = MagicMock()
+        tenant_bot.ask.return_value = {"answer": "7 invoices.", "sql_queries": []}
+        registry = MagicMock()
+
+        @contextlib.contextmanager
+        def acquire(name):
+            if name != "finance":
+                raise UnknownDatabase(name)
+            yield tenant_bot
+        registry.acquire.side_effect = acquire
+
+        with patch('src.api.registry', registry):
+            response = self.client.post("/ask", json={"question": "how many invoices?", "database": "finance"})
+            self.assertEqual(response.json()["answer"], "7 invoices.")
+            mock_bot.ask.assert_not_called()
+
+            response = self.client.post("/ask", json={"question": "how many invoices?", "database": "payroll"})
+            self.assertEqual(response.status_code, 404)
+
+            response = self.client.post("/ask", json={"question": "how many students?"})
+            self.assertEqual(response.json()["answer"], "12 students.")
+
     @patch('src.api.bot')
     def test_reports(self, mock_bot):
         mock_bot.reports_manager.reports = {"R1": {"name": "Report 1"}}
@@ -45,5 +96,76 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), {"R1": {"name": "Report 1"}})
 
+    @patch('src.api.bot')
+    def test_run_reports(self, mock_bot):
+        mock_bot.run_reports.return_value = [{"report_id": "TC2002", "columns": ["total"], "rows": [[12]]}]
+
+        response = self.client.post("/reports/run", json={
+            "reports": [{"id": "TC2002"}, {"id": "AT1202", "params": {"date": "2024-01-05"}}],
+            "max_parallel": 2
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["rows"], [[12]])
+        mock_bot.run_reports.assert_called_once_with(
+            [("TC2002", None), ("AT1202", {"date": "2024-01-05"})], max_parallel=2
+        )
+        self.assertEqual(self.client.post("/reports/run", json={"reports": []}).status_code, 400)
+
+    @patch('src.api.bot')
+    def test_result_pages(self, mock_bot):
+        from src.result_store import ResultStore
+        store = ResultStore()
+        cursor = store.register(["id", "name"], [(i, f"n{i}") for i in range(30)])
+        mock_bot.result_store = store
+
+        response = self.client.get(f"/results/{cursor['id']}", params={"offset": 25, "limit": 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rows"][0], [25, "n25"])
+        self.assertIsNone(response.json()["next_offset"])
+
+        response = self.client.get(f"/results/{cursor['id']}", params={"limit": 2, "format": "csv"})
+        self.assertEqual(response.text.splitlines(), ["id,name", "0,n0", "1,n1"])
+
+        response = self.client.get(f"/results/{cursor['id']}/download")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.text.splitlines()), 31)
+
+        self.assertEqual(self.client.get("/results/unknown").status_code, 404)
+        self.assertEqual(self.client.get("/results/unknown/download").status_code, 404)
+        self.assertEqual(self.client.get(f"/results/{cursor['id']}", params={"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.delete(f"/results/{cursor['id']}").status_code, 200)
+        self.assertEqual(self.client.get(f"/results/{cursor['id']}").status_code, 404)
+
+    @patch('src.api.bot')
+    def test_query_statistics(self, mock_bot):
+        from src.query_stats import QueryStats
+        mock_bot.db_manager.query_stats = QueryStats()
+        mock_bot.db_manager.query_stats.record("SELECT * FROM students WHERE id = 4", 0.02, rows=1)
+
+        response = self.client.get("/admin/queries")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["queries"][0]["fingerprint"], "select * from students where id = ?")
+        self.assertEqual(self.client.get("/admin/queries", params={"order_by": "name"}).status_code, 400)
+
+        self.assertEqual(self.client.delete("/admin/queries").status_code, 200)
+        self.assertEqual(self.client.get("/admin/queries").json()["fingerprints"], 0)
+
+    @patch('src.api.bot')
+    def test_ready(self, mock_bot):
+        mock_bot.is_ready.return_value = False
+        response = self.client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+
+        mock_bot.is_ready.return_value = True
+        response = self.client.get("/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ready")
+
+    def test_metrics(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("dbllm_stage_duration_seconds", response.text)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from benchmarks.common import compare_to_baseline, percentile, summarize
+from benchmarks.synthetic_db import build_schema
+
+
+class TestBenchmarkSupport(unittest.TestCase):
+
+    def test_build_schema(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.db")
+            tables = build_schema(path, tables=3, columns=5, rows=25)
+            self.assertEqual(len(tables), 3)
+
+            conn = sqlite3.connect(path)
+            try:
+                count = conn.execute(f"SELECT COUNT(*) FROM {tables[2]}").fetchone()[0]
+                fks = conn.execute(f"PRAGMA foreign_key_list({tables[1]})").fetchall()
+            finally:
+                conn.close()
+            self.assertEqual(count, 25)
+            self.assertEqual(fks[0][2], tables[0])
+
+    def test_percentiles(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.05)
+        self.assertEqual(percentile(values, 99), 0.099)
+        summary = summarize(values, wall_time=1.0)
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["throughput_rps"], 100.0)
+        self.assertEqual(summary["p95_ms"], 95.0)
+
+    def test_compare_to_baseline(self):
+        baseline = {"results": {"ask_agent": {"1": {"p95_ms": 100.0}}}}
+        current = {"results": {"ask_agent": {"1": {"p95_ms": 150.0}}}}
+        regressions = compare_to_baseline(current, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]["ratio"], 1.5)
+        self.assertEqual(compare_to_baseline(baseline, baseline), [])
+
+if __name__ == '__main__':
+    unittest.main()
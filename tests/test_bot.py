@@ -1,7 +1,15 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
+from langchain_core.language_models.fake import FakeListLLM
 from src.db_manager import DBManager
 from src.llm_manager import LLMManager
+from src.config import Config
+from src.intent_router import CHAT_EXAMPLES
 from src.oracle_bot import OracleBot
 
 class TestOracleBot(unittest.TestCase):
@@ -29,5 +37,325 @@ class TestOracleBot(unittest.TestCase):
         self.assertEqual(result["answer"], "There are 2 employees in Sales.")
         mock_agent_executor.invoke.assert_called_once()
 
+    def _bot_with_fake_embeddings(self):
+        vector_manager = MagicMock()
+        # Greetings embed close to the chat prototypes, everything else to the data ones
+        vector_manager.embeddings.embed_documents.side_effect = lambda texts: [
+            [1.0, 0.0] if i < len(CHAT_EXAMPLES) else [0.0, 1.0] for i, _ in enumerate(texts)
+        ]
+        llm_manager = MagicMock()
+        llm_manager.llm_type = "openai"
+        bot = OracleBot(MagicMock(), llm_manager, vector_manager=vector_manager)
+        bot.reports_manager = MagicMock()
+        bot.reports_manager.find_report_id.return_value = None
+        bot.reports_manager.get_snapshot.return_value = None
+        return bot, vector_manager, llm_manager
+
+    def test_coalescing_is_per_session(self):
+        bot, _, _ = self._bot_with_fake_embeddings()
+        calls = []
+        release = threading.Event()
+
+        def answer(question, format_instruction, session_id, trace):
+            calls.append(session_id)
+            release.wait(5)
+            return {"answer": f"for {session_id}", "sql_queries": []}
+
+        bot._ask = answer
+        results = {}
+        threads = [
+            threading.Thread(target=lambda n=n, s=s: results.__setitem__(n, bot.ask("How many students?", session_id=s)))
+            for n, s in enumerate(("alice", "alice", "bob"))
+        ]
+        with patch.object(Config, "COALESCE_REQUESTS", True):
+            for t in threads:
+                t.start()
+            deadline = time.time() + 5
+            while bot.single_flight.in_flight() < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.05)
+            release.set()
+            for t in threads:
+                t.join(5)
+
+        self.assertEqual(sorted(calls), ["alice", "bob"])
+        self.assertEqual([results[n]["answer"] for n in range(3)], ["for alice", "for alice", "for bob"])
+
+    @patch('src.oracle_bot.create_sql_agent')
+    def test_chit_chat_skips_agent(self, mock_create_sql_agent):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.9, 0.1]
+        bot.llm = MagicMock()
+        bot.llm.invoke.return_value = "Hello! Ask me anything about your data."
+
+        result = bot.ask("hello")
+
+        self.assertEqual(result["answer"], "Hello! Ask me anything about your data.")
+        self.assertEqual(result["sql_queries"], [])
+        mock_create_sql_agent.assert_not_called()
+        vector_manager.search_relevant_chat_by_vector.assert_not_called()
+
+    def test_agent_prompt_starts_with_primed_prefix(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "school.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE students (id INTEGER)")
+        conn.close()
+        llm_manager = MagicMock()
+        llm_manager.llm_type = "llamacpp"
+        db_manager = DBManager(url=f"sqlite:///{path}")
+        self.addCleanup(db_manager.dispose)
+        bot = OracleBot(db_manager, llm_manager, vector_manager=MagicMock())
+        bot.llm = FakeListLLM(responses=["Final Answer: 0"])
+
+        primed = bot._static_prompt_prefix(bot._create_agent_executor("__warmup__"))
+        executor = bot._create_agent_executor("s1", include_tables=["students"],
+                                              extra_context='Past query: SELECT json_object(\'a\', 1) -- {"a": 1}')
+        [prompt] = executor.agent.runnable.get_prompts()
+        sent = prompt.format(input="How many students?", chat_history="", agent_scratchpad="")
+
+        self.assertIn("RULES:", primed)
+        self.assertTrue(sent.startswith(primed))
+        self.assertIn("Relevant tables: students.", sent)
+        self.assertIn('{"a": 1}', sent)
+
+    @patch.dict(Config.LLM_TIERS, {"small": {"type": "openai", "model": "tiny"}})
+    @patch('src.oracle_bot.create_sql_agent')
+    def test_tiers_route_by_call_type(self, mock_create_sql_agent):
+        bot, vector_manager, llm_manager = self._bot_with_fake_embeddings()
+        small, large = MagicMock(), MagicMock()
+        llm_manager.get_llm_for.return_value = small
+        bot.llm = large
+
+        vector_manager.get_embedding.return_value = [0.9, 0.1]
+        bot.ask("hi")
+        small.invoke.assert_called_once()
+        llm_manager.get_llm_for.assert_called_with("small")
+
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        vector_manager.get_relevant_tables_by_vector.return_value = []
+        mock_create_sql_agent.return_value.invoke.return_value = {"output": "42", "intermediate_steps": []}
+        bot.ask("how many students")
+        self.assertIs(mock_create_sql_agent.call_args.kwargs["llm"], large)
+
+    def test_single_shot_repairs_once(self):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        bot.sql_generation_mode = "single_shot"
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        vector_manager.get_relevant_tables_by_vector.return_value = ["students"]
+        bot.db_manager.get_usable_table_names.return_value = ["students"]
+        bot.db_manager.get_db.return_value.dialect = "sqlite"
+        bot.db_manager.get_db.return_value.get_table_info.return_value = "CREATE TABLE students (id INTEGER)"
+        bot.db_manager.execute_select.return_value = (["n"], [(3,)])
+        bot.db_manager.validate_sql.side_effect = lambda sql: (sql, None)
+        bot.llm = MagicMock()
+        bot.llm.invoke.side_effect = [
+            "DELETE FROM students",
+            "```sql\nSELECT COUNT(*) AS n FROM students;\n```",
+            "There are 3 students.",
+        ]
+
+        result = bot.ask("how many students")
+
+        self.assertEqual(result["answer"], "There are 3 students.")
+        self.assertEqual(result["sql_queries"], ["SELECT COUNT(*) AS n FROM students"])
+        self.assertIn("Only SELECT queries", bot.llm.invoke.call_args_list[1].args[0])
+        bot.db_manager.execute_select.assert_called_once()
+
+    @patch('src.oracle_bot.create_sql_agent')
+    def test_value_hints_reach_the_agent(self, mock_create_sql_agent):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        vector_manager.get_relevant_tables_by_vector.return_value = ["student_attendance"]
+        bot.db_manager.get_usable_table_names.return_value = ["student_attendance"]
+        bot.value_index = MagicMock()
+        bot.value_index.hints.return_value = "Stored values for filters:\n- student_attendance.status = 'Absent'"
+        mock_create_sql_agent.return_value.invoke.return_value = {"output": "4", "intermediate_steps": []}
+
+        bot.ask("how many students were absent")
+
+        bot.value_index.hints.assert_called_once_with("how many students were absent", ["student_attendance"], limit=Config.VALUE_HINTS_MAX)
+        agent_input = mock_create_sql_agent.return_value.invoke.call_args.args[0]["input"]
+        self.assertIn("student_attendance.status = 'Absent'", agent_input)
+
+    def test_semantic_report_match(self):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        vector_manager.match_report.return_value = [("AT1202", 0.82), ("AT1201", 0.70)]
+        bot.reports_manager.get_missing_variables.return_value = []
+        bot.reports_manager.get_report.return_value = {"name": "Student Attendance Summary"}
+        bot.reports_manager.format_query.return_value = "SELECT status, COUNT(*) FROM student_attendance"
+        conn = bot.db_manager.connect.return_value.__enter__.return_value
+        conn.execute.return_value.fetchall.return_value = [("Present", 10)]
+        bot.llm = MagicMock()
+        bot.llm.invoke.return_value = "| status | total |"
+
+        result = bot.ask("attendance summary for 2024-01-05")
+
+        self.assertEqual(result["report_id"], "AT1202")
+        vector_manager.index_reports.assert_called_once()
+        bot.reports_manager.format_query.assert_called_once_with("AT1202", "attendance summary for 2024-01-05")
+
+    @patch('src.oracle_bot.create_sql_agent')
+    def test_semantic_report_needs_confidence(self, mock_create_sql_agent):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        vector_manager.get_relevant_tables_by_vector.return_value = []
+        bot.reports_manager.get_missing_variables.return_value = []
+        mock_create_sql_agent.return_value.invoke.return_value = {"output": "done", "intermediate_steps": []}
+        bot.llm = MagicMock()
+
+        # Too close to the runner-up: the agent answers instead
+        vector_manager.match_report.return_value = [("AT1202", 0.80), ("AT1201", 0.79)]
+        result = bot.ask("attendance on 2024-01-05")
+        self.assertNotIn("report_id", result)
+        mock_create_sql_agent.assert_called_once()
+
+    def test_report_served_from_snapshot(self):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        bot.reports_manager.find_report_id.return_value = "ST1001"
+        bot.reports_manager.get_missing_variables.return_value = []
+        bot.reports_manager.get_report.return_value = {"name": "All Students List"}
+        bot.reports_manager.format_query.return_value = "SELECT * FROM students"
+        bot.reports_manager.get_snapshot.return_value = {
+            "answer": "| name |", "computed_at": 100.0, "expires_at": 1000.0, "age_seconds": 12.5
+        }
+        bot.llm = MagicMock()
+
+        result = bot.ask("Run ST1001")
+
+        self.assertEqual(result["answer"], "| name |")
+        self.assertEqual(result["snapshot"]["age_seconds"], 12.5)
+        bot.db_manager.connect.assert_not_called()
+        bot.llm.invoke.assert_not_called()
+        bot.reports_manager.log_execution.assert_called_once_with("ST1001", "SELECT * FROM students")
+
+        # A format instruction needs a fresh formatting call
+        bot.reports_manager.get_snapshot.reset_mock()
+        conn = bot.db_manager.connect.return_value.__enter__.return_value
+        conn.execute.return_value.fetchall.return_value = [("Asha",)]
+        bot.llm.invoke.return_value = "Asha"
+        result = bot.ask("Run ST1001", "names only")
+        self.assertNotIn("snapshot", result)
+        bot.reports_manager.get_snapshot.assert_not_called()
+
+    def test_question_with_several_reports(self):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        vector_manager.search_relevant_chat_by_vector.return_value = ""
+        reports = {
+            "ST1001": {"name": "All Students List", "query": "SELECT * FROM students"},
+            "AT1202": {"name": "Attendance Summary", "query": "SELECT status FROM attendance WHERE d = :date"},
+        }
+        from src.reports_manager import ReportsManager
+        real = ReportsManager()
+        real.reports = reports
+        bot.reports_manager.find_report_id.return_value = "ST1001"
+        for name in ("find_report_ids", "strip_report_ids", "get_report", "get_missing_variables", "format_query"):
+            setattr(bot.reports_manager, name, getattr(real, name))
+        conn = bot.db_manager.connect.return_value.__enter__.return_value
+        conn.execute.return_value.fetchall.return_value = [("row",)]
+        bot.llm = MagicMock()
+        bot.llm.invoke.return_value = "| table |"
+
+        result = bot.ask("run ST1001 and AT1202 for 2024-01-05")
+
+        self.assertEqual(result["report_ids"], ["ST1001", "AT1202"])
+        self.assertEqual(result["sql_queries"], [
+            "SELECT * FROM students", "SELECT status FROM attendance WHERE d = '2024-01-05'"
+        ])
+        self.assertIn("### All Students List (ST1001)", result["answer"])
+        self.assertIn("### Attendance Summary (AT1202)", result["answer"])
+        self.assertEqual(bot.db_manager.connect.call_count, 2)
+        self.assertEqual(bot.reports_manager.log_execution.call_count, 2)
+
+    def test_large_report_registers_result_set(self):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        vector_manager.search_relevant_chat_by_vector.return_value = ""
+        bot.reports_manager.find_report_id.return_value = "ST1001"
+        bot.reports_manager.get_missing_variables.return_value = []
+        bot.reports_manager.get_report.return_value = {"name": "All Students List"}
+        bot.reports_manager.format_query.return_value = "SELECT id, name FROM students"
+        result = bot.db_manager.connect.return_value.__enter__.return_value.execute.return_value
+        result.fetchall.return_value = [(i, f"student {i}") for i in range(120)]
+        result.keys.return_value = ["id", "name"]
+        bot.llm = MagicMock()
+        bot.llm.invoke.return_value = "| id | name |"
+
+        response = bot.ask("Run ST1001")
+
+        cursor = response["result_set"]
+        self.assertEqual(cursor["total_rows"], 120)
+        self.assertIn(f"/results/{cursor['id']}/download", response["answer"])
+        # The formatting prompt gets a digest and a sample, not every row
+        prompt = bot.llm.invoke.call_args.args[0]
+        self.assertIn("Rows: 120", prompt)
+        self.assertIn("max 119", prompt)
+        self.assertNotIn("student 119", prompt)
+        page = bot.result_store.page(cursor["id"], offset=100, limit=50)
+        self.assertEqual(page["rows"][-1], [119, "student 119"])
+        self.assertEqual(bot.db_manager.connect.call_count, 1)
+
+    def test_precomputed_report_keeps_its_rows(self):
+        bot, vector_manager, _ = self._bot_with_fake_embeddings()
+        vector_manager.get_embedding.return_value = [0.1, 0.9]
+        from src.report_scheduler import ReportScheduler
+        from src.reports_manager import ReportsManager
+        real = ReportsManager()
+        real.reports = {"ST1001": {"name": "All Students List", "query": "SELECT id, name FROM students",
+                                   "precompute": True}}
+        real.log_execution = MagicMock()
+        real.hot_bindings = MagicMock(return_value=[])
+        bot.reports_manager = real
+        result = bot.db_manager.connect.return_value.__enter__.return_value.execute.return_value
+        result.fetchall.return_value = [(i, f"student {i}") for i in range(200)]
+        result.keys.return_value = ["id", "name"]
+        bot.llm = MagicMock()
+        bot.llm.invoke.return_value = "200 students"
+
+        real.scheduler = ReportScheduler(real, bot._precompute_report)
+        self.assertEqual(real.scheduler.run_once(), 1)
+
+        response = bot.ask("Run ST1001")
+        self.assertIn("snapshot", response)
+        cursor = response["result_set"]
+        self.assertIn(f"/results/{cursor['id']}/download", response["answer"])
+        self.assertEqual(bot.result_store.page(cursor["id"], offset=150, limit=50)["rows"][-1], [199, "student 199"])
+        self.assertEqual(bot.db_manager.connect.call_count, 1)
+
+        # Several reports in one question: each keeps its result set
+        real.reports["AT1202"] = {"name": "Attendance Summary", "query": "SELECT id, name FROM attendance"}
+        response = bot.ask("run ST1001 and AT1202")
+        self.assertEqual(set(response["result_sets"]), {"ST1001", "AT1202"})
+        self.assertEqual(response["result_sets"]["ST1001"]["id"], cursor["id"])
+        self.assertIn(f"/results/{response['result_sets']['AT1202']['id']}/download", response["answer"])
+
+    def test_run_reports(self):
+        bot, _, _ = self._bot_with_fake_embeddings()
+        from src.reports_manager import ReportsManager
+        real = ReportsManager()
+        real.reports = {"AT1202": {"name": "Attendance Summary", "query": "SELECT status FROM a WHERE d = :date"}}
+        bot.reports_manager.get_report = real.get_report
+        bot.reports_manager.required_variables = real.required_variables
+        bot.reports_manager.bind_parameters = real.bind_parameters
+        result = bot.db_manager.connect.return_value.__enter__.return_value.execute.return_value
+        result.fetchall.return_value = [("Present", 10)]
+        result.keys.return_value = ["status", "total"]
+
+        results = bot.run_reports([
+            ("AT1202", {"date": "2024-01-05"}),
+            ("AT1202", {}),
+            ("XX0000", {}),
+        ], max_parallel=2)
+
+        self.assertEqual(results[0]["rows"], [["Present", 10]])
+        self.assertEqual(results[0]["columns"], ["status", "total"])
+        self.assertEqual(results[0]["sql"], "SELECT status FROM a WHERE d = '2024-01-05'")
+        self.assertIn("requires: date", results[1]["error"])
+        self.assertIn("Unknown report", results[2]["error"])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.config import Config
+from src.db_manager import DBManager
+
+
+def _sqlite_file(path, name, lag=None):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE marker (name TEXT)")
+    conn.execute("INSERT INTO marker VALUES (?)", (name,))
+    if lag is not None:
+        conn.execute("CREATE TABLE replica_status (lag_seconds REAL)")
+        conn.execute("INSERT INTO replica_status VALUES (?)", (lag,))
+    conn.commit()
+    conn.close()
+
+
+class TestEngineRouting(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name in ("primary", "replica", "reporting"):
+            self.paths[name] = os.path.join(self.tmp.name, f"{name}.db")
+            _sqlite_file(self.paths[name], name, lag=0 if name == "replica" else None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _db_manager(self, engines, routes):
+        with patch.object(Config, "SQLITE_PATH", self.paths["primary"]):
+            return DBManager(db_type="sqlite", engines=engines, routes=routes)
+
+    def _served_by(self, db_manager, workload):
+        return db_manager.execute_select("SELECT name FROM marker", workload=workload)[1][0][0]
+
+    def test_workloads_go_to_their_engines(self):
+        db_manager = self._db_manager(
+            {
+                "replica": {"url": f"sqlite:///{self.paths['replica']}"},
+                "reporting": f"sqlite:///{self.paths['reporting']}",
+            },
+            {"agent": "replica", "report": ["reporting", "replica"], "schema": "schema"},
+        )
+
+        self.assertEqual(self._served_by(db_manager, "agent"), "replica")
+        self.assertEqual(self._served_by(db_manager, "report"), "reporting")
+        # Unknown engine names and workloads without a route use the primary
+        self.assertEqual(self._served_by(db_manager, "schema"), "primary")
+        self.assertEqual(self._served_by(db_manager, "default"), "primary")
+
+        agent_db = db_manager.get_db(include_tables=["marker"], workload="agent")
+        self.assertEqual(agent_db.run("SELECT name FROM marker"), "[('replica',)]")
+        self.assertIs(db_manager.get_db(), db_manager.db)
+
+    def test_unreachable_engine_fails_over(self):
+        db_manager = self._db_manager(
+            {
+                "broken": f"sqlite:///{os.path.join(self.tmp.name, 'missing', 'x.db')}",
+                "replica": f"sqlite:///{self.paths['replica']}",
+            },
+            {"report": ["broken", "replica"], "agent": "broken"},
+        )
+
+        self.assertEqual(self._served_by(db_manager, "report"), "replica")
+        self.assertEqual(self._served_by(db_manager, "agent"), "primary")
+        self.assertFalse(db_manager.router.status()["broken"]["healthy"])
+
+    def test_lagging_replica_is_skipped_until_it_catches_up(self):
+        db_manager = self._db_manager(
+            {"replica": {
+                "url": f"sqlite:///{self.paths['replica']}",
+                "lag_query": "SELECT lag_seconds FROM replica_status",
+                "max_lag_seconds": 30,
+            }},
+            {"agent": "replica"},
+        )
+        router = db_manager.router
+        router.health_check_seconds = router.cooldown_seconds = 0
+
+        self.assertEqual(self._served_by(db_manager, "agent"), "replica")
+
+        conn = sqlite3.connect(self.paths["replica"])
+        conn.execute("UPDATE replica_status SET lag_seconds = 120")
+        conn.commit()
+        self.assertEqual(self._served_by(db_manager, "agent"), "primary")
+        self.assertIn("lag", router.status()["replica"]["error"])
+
+        conn.execute("UPDATE replica_status SET lag_seconds = 2")
+        conn.commit()
+        conn.close()
+        self.assertEqual(self._served_by(db_manager, "agent"), "replica")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from src.hf_batching import BatchingGenerator
+
+
+class _Encoding(dict):
+    def to(self, device):
+        return self
+
+
+class _FakeTokenizer:
+    pad_token = None
+    eos_token = "</s>"
+    pad_token_id = 0
+    chat_template = None
+
+    def __call__(self, prompts, **kwargs):
+        width = max(len(p.split()) for p in prompts)
+        return _Encoding(input_ids=[[1] * width for _ in prompts])
+
+    def decode(self, tokens, skip_special_tokens=True):
+        return " ".join(tokens)
+
+
+class _FakeModel:
+    device = "cpu"
+    config = SimpleNamespace(is_encoder_decoder=False)
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.use_cache = []
+
+    def generate(self, input_ids, **kwargs):
+        self.batch_sizes.append(len(input_ids))
+        self.use_cache.append(kwargs.get("use_cache"))
+        return [row + ["answer", "Observation:", "ignored"] for row in input_ids]
+
+
+class TestBatchingGenerator(unittest.TestCase):
+
+    def test_concurrent_prompts_share_a_batch(self):
+        model = _FakeModel()
+        generator = BatchingGenerator(model, _FakeTokenizer(), max_batch_size=4, max_wait_ms=500)
+        try:
+            futures = [generator.submit(f"question {i}", stop=["Observation:"]) for i in range(4)]
+            results = [f.result(timeout=5) for f in futures]
+        finally:
+            generator.close()
+
+        self.assertEqual(results, ["answer "] * 4)
+        self.assertEqual(model.batch_sizes, [4])
+        self.assertEqual(model.use_cache, [True])
+
+    def test_errors_reach_every_caller(self):
+        model = _FakeModel()
+        model.generate = lambda **kwargs: (_ for _ in ()).throw(RuntimeError("boom"))
+        generator = BatchingGenerator(model, _FakeTokenizer(), max_batch_size=2, max_wait_ms=50)
+        try:
+            future = generator.submit("question")
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+        finally:
+            generator.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import threading
+import time
+import unittest
+from src.inference_scheduler import InferenceScheduler, SchedulerRejected, priority_scope
+
+
+class TestInferenceScheduler(unittest.TestCase):
+
+    def test_interactive_runs_before_batch(self):
+        scheduler = InferenceScheduler(max_parallel=1, max_queue=10, sla_seconds=1000)
+        order = []
+        started = scheduler.acquire("interactive")
+
+        def worker(priority):
+            with scheduler.slot(priority):
+                order.append(priority)
+
+        batch = threading.Thread(target=worker, args=("batch",))
+        batch.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=worker, args=("interactive",))
+        interactive.start()
+        time.sleep(0.05)
+
+        scheduler.release(started)
+        batch.join(timeout=5)
+        interactive.join(timeout=5)
+        self.assertEqual(order, ["interactive", "batch"])
+
+    def test_rejects_when_sla_would_be_exceeded(self):
+        scheduler = InferenceScheduler(max_parallel=1, max_queue=10, sla_seconds=2, initial_service_seconds=5)
+        started = scheduler.acquire()
+        try:
+            with self.assertRaises(SchedulerRejected) as ctx:
+                scheduler.acquire("interactive")
+            self.assertGreater(ctx.exception.retry_after, 2)
+        finally:
+            scheduler.release(started)
+
+    def test_rejects_when_queue_is_full(self):
+        scheduler = InferenceScheduler(max_parallel=1, max_queue=0, sla_seconds=1000)
+        started = scheduler.acquire()
+        try:
+            with self.assertRaises(SchedulerRejected):
+                scheduler.acquire()
+        finally:
+            scheduler.release(started)
+
+    def test_priority_scope_is_default(self):
+        scheduler = InferenceScheduler(max_parallel=2)
+        with priority_scope("report"):
+            with scheduler.slot():
+                self.assertEqual(scheduler.stats()["active"], 1)
+        self.assertEqual(scheduler.stats()["active"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
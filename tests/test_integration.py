@@ -110,6 +110,32 @@ class TestManagers(unittest.TestCase):
         )
         mock_llamacpp.assert_called()
 
+    def test_llm_manager_lazy_imports(self):
+        import src.llm_manager as llm_module
+        with patch.object(llm_module, 'ChatOpenAI', None), \
+                patch.object(llm_module, 'torch', None), \
+                patch('src.llm_manager.importlib.import_module') as mock_import:
+            llm_module._ensure_backend_imports("openai")
+            imported = [c.args[0] for c in mock_import.call_args_list]
+            self.assertEqual(imported, ["langchain_openai"])
+            self.assertIsNone(llm_module.torch)
+
+    @patch('src.vector_manager.Chroma')
+    @patch('src.vector_manager.HuggingFaceEmbeddings')
+    def test_bot_defers_model_loading(self, mock_embeddings, mock_chroma):
+        mock_db_manager = MagicMock()
+        mock_llm_manager = MagicMock()
+
+        bot = OracleBot(mock_db_manager, mock_llm_manager)
+        mock_llm_manager.get_llm.assert_not_called()
+        mock_embeddings.assert_not_called()
+        self.assertFalse(bot.is_ready())
+
+        bot.warm_up()
+        mock_llm_manager.get_llm.assert_called_once()
+        mock_embeddings.assert_called_once()
+        self.assertTrue(bot.is_ready())
+
     @patch('src.oracle_bot.SQLDatabase')
     @patch('src.oracle_bot.VectorManager')
     @patch('src.oracle_bot.create_sql_agent')
@@ -149,11 +175,12 @@ class TestManagers(unittest.TestCase):
         }
         mock_rm_instance.format_query.return_value = "SELECT * FROM test"
         mock_rm_instance.get_missing_variables.return_value = []
+        mock_rm_instance.get_snapshot.return_value = None
 
         bot = OracleBot(mock_db_manager, mock_llm_manager)
 
         # Mock DB response for predefined report (raw engine)
-        mock_conn = mock_db_manager.engine.connect.return_value.__enter__.return_value
+        mock_conn = mock_db_manager.connect.return_value.__enter__.return_value
         mock_conn.execute.return_value.fetchall.return_value = [('data',)]
 
         # Mock LLM response for formatting
@@ -183,11 +210,12 @@ class TestManagers(unittest.TestCase):
         }
         mock_rm_instance.format_query.return_value = "SELECT * FROM test"
         mock_rm_instance.get_missing_variables.return_value = []
+        mock_rm_instance.get_snapshot.return_value = None
 
         bot = OracleBot(mock_db_manager, mock_llm_manager)
 
         # Mock DB response as empty
-        mock_conn = mock_db_manager.engine.connect.return_value.__enter__.return_value
+        mock_conn = mock_db_manager.connect.return_value.__enter__.return_value
         mock_conn.execute.return_value.fetchall.return_value = []
 
         result = bot.ask("I want AT1201 reports")
@@ -281,5 +309,34 @@ class TestManagers(unittest.TestCase):
         missing_none = rm.get_missing_variables("AT1201", "AT1201 for 2024-01-01")
         self.assertEqual(missing_none, [])
 
+    def test_reports_manager_multiple_ids(self):
+        from src.reports_manager import ReportsManager
+        rm = ReportsManager()
+
+        rm.reports = {
+            "AT1202": {"query": "SELECT * FROM t WHERE d = :date"},
+            "ST1001": {"query": "SELECT * FROM students"},
+            "ST1002": {"query": "SELECT * FROM students WHERE class_id = :class_id"},
+        }
+
+        question = "run ST1001 and AT1202 for 2024-01-05"
+        self.assertEqual(rm.find_report_ids(question), ["ST1001", "AT1202"])
+        # The digits of the other ID are not taken for a parameter
+        text = rm.strip_report_ids("run ST1002 and ST1001")
+        self.assertEqual(rm.get_missing_variables("ST1002", text), ["class_id"])
+
+    def test_reports_manager_bind_parameters(self):
+        from src.reports_manager import ReportsManager
+        rm = ReportsManager()
+
+        rm.reports = {
+            "AT1202": {"query": "SELECT * FROM t WHERE d = :date AND c = :class_id"}
+        }
+
+        query = rm.bind_parameters("AT1202", {"date": "2024-09-01", "class_id": 7})
+        self.assertEqual(query, "SELECT * FROM t WHERE d = '2024-09-01' AND c = 7")
+        with self.assertRaises(ValueError):
+            rm.bind_parameters("AT1202", {"date": "2024-09-01' OR '1'='1", "class_id": 7})
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from src.intent_router import IntentClassifier
+
+GREETING_WORDS = ("hi", "hello", "hey", "morning", "evening", "thanks", "thank", "how are you",
+                  "who are you", "what can you do", "bye", "see you", "ok")
+DATA_WORDS = ("how many", "show", "list", "total", "which", "average", "records", "count")
+
+
+def fake_embed(text):
+    text = text.lower()
+    return [
+        float(any(w in text for w in GREETING_WORDS)),
+        float(any(w in text for w in DATA_WORDS)),
+        0.1,
+    ]
+
+
+class TestIntentClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def embed_documents(texts):
+            self.calls.append(len(texts))
+            return [fake_embed(t) for t in texts]
+
+        self.classifier = IntentClassifier(embed_documents, threshold=0.6)
+
+    def test_greeting_is_chat(self):
+        intent, score = self.classifier.classify(fake_embed("Hello there!"))
+        self.assertEqual(intent, "chat")
+        self.assertGreater(score, 0.6)
+
+    def test_data_question_is_data(self):
+        intent, _ = self.classifier.classify(fake_embed("How many students joined in 2024?"))
+        self.assertEqual(intent, "data")
+
+    def test_ambiguous_prefers_data(self):
+        # Equally close to both sides: never skip the SQL path
+        intent, _ = self.classifier.classify(fake_embed("hi, show me the total sales"))
+        self.assertEqual(intent, "data")
+
+    def test_prototypes_embedded_once(self):
+        self.classifier.classify(fake_embed("hi"))
+        self.classifier.classify(fake_embed("list teachers"))
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+import pytest
+
+pytest.importorskip("llama_cpp")
+
+from src.llama_cache import PrefixStateCache
+
+
+def _state(tokens, size=100):
+    state = MagicMock()
+    state.input_ids = np.array(tokens)
+    state.llama_state_size = size
+    return state
+
+
+class TestPrefixStateCache(unittest.TestCase):
+
+    def test_longest_prefix_is_restored(self):
+        cache = PrefixStateCache(capacity_bytes=1000)
+        cache[[1, 2, 3]] = _state([1, 2, 3])
+        cache[[1, 2, 3, 4, 5]] = _state([1, 2, 3, 4, 5])
+
+        state = cache[[1, 2, 3, 4, 5, 6, 7]]
+        self.assertEqual(state.input_ids.tolist(), [1, 2, 3, 4, 5])
+
+        with self.assertRaises(KeyError):
+            cache[[9, 9]]
+
+    def test_lru_eviction_by_ram_budget(self):
+        cache = PrefixStateCache(capacity_bytes=250)
+        cache[[1]] = _state([1])
+        cache[[2]] = _state([2])
+        cache[[3]] = _state([3])
+        self.assertLessEqual(cache.cache_size, 250)
+        with self.assertRaises(KeyError):
+            cache[[1, 0]]
+
+    def test_prime(self):
+        cache = PrefixStateCache(capacity_bytes=1000)
+        llama = MagicMock()
+        llama.tokenize.return_value = [5, 6, 7]
+        llama.save_state.return_value = _state([5, 6, 7])
+
+        self.assertEqual(cache.prime(llama, "static rules"), 3)
+        llama.eval.assert_called_once_with([5, 6, 7])
+        self.assertEqual(cache[[5, 6, 7, 8]].input_ids.tolist(), [5, 6, 7])
+
+if __name__ == '__main__':
+    unittest.main()
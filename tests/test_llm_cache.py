@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from typing import Any, List, Optional
+from unittest.mock import patch
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import Generation
+from src.config import Config
+from src.inference_scheduler import InferenceScheduler, ScheduledLLM
+from src.llm_cache import CompletionCache
+from src.llm_manager import LLMManager
+from src.model_server import RemoteLLM
+
+
+class _LocalModel(LLM):
+    """Stands in for LlamaCpp: answers with the file it was loaded from."""
+    model_path: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "llamacpp"
+
+    @property
+    def _identifying_params(self):
+        return {"model_path": self.model_path}
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        return f"{self.model_path}: {prompt}"
+
+
+class TestCompletionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "llm_cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_and_miss(self):
+        cache = CompletionCache(self.path)
+        self.assertIsNone(cache.lookup("prompt", "model-a"))
+
+        cache.update("prompt", "model-a", [Generation(text="answer")])
+        self.assertEqual(cache.lookup("prompt", "model-a")[0].text, "answer")
+        # Different model or params is a different entry
+        self.assertIsNone(cache.lookup("prompt", "model-b"))
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_survives_restart(self):
+        CompletionCache(self.path).update("prompt", "model-a", [Generation(text="answer")])
+        self.assertEqual(CompletionCache(self.path).lookup("prompt", "model-a")[0].text, "answer")
+
+    def test_lru_eviction(self):
+        probe = CompletionCache(os.path.join(self.tmp.name, "probe.sqlite3"))
+        probe.update("p0", "m", [Generation(text="x" * 100)])
+        entry_size = probe.stats()["bytes"]
+
+        cache = CompletionCache(self.path, max_bytes=entry_size * 2)
+        cache.update("p1", "m", [Generation(text="x" * 100)])
+        cache.update("p2", "m", [Generation(text="x" * 100)])
+        cache.lookup("p1", "m")  # p2 becomes least recently used
+        cache.update("p3", "m", [Generation(text="x" * 100)])
+
+        self.assertIsNotNone(cache.lookup("p1", "m"))
+        self.assertIsNone(cache.lookup("p2", "m"))
+        self.assertIsNotNone(cache.lookup("p3", "m"))
+        self.assertLessEqual(cache.stats()["bytes"], entry_size * 2)
+
+    def test_hits_are_written_in_batches(self):
+        cache = CompletionCache(self.path)
+        cache.update("prompt", "m", [Generation(text="answer")])
+        for _ in range(3):
+            cache.lookup("prompt", "m")
+
+        other = CompletionCache(self.path)
+        hits = lambda: other._conn.execute("SELECT hits FROM completions").fetchone()[0]
+        self.assertEqual(hits(), 0)
+        cache.stats()
+        self.assertEqual(hits(), 3)
+
+    def test_budget_is_shared_between_processes(self):
+        probe = CompletionCache(os.path.join(self.tmp.name, "probe.sqlite3"))
+        probe.update("p0", "m", [Generation(text="x" * 100)])
+        entry_size = probe.stats()["bytes"]
+
+        # Two workers on one file: each one's writes count against the other's budget
+        first = CompletionCache(self.path, max_bytes=entry_size * 2)
+        second = CompletionCache(self.path, max_bytes=entry_size * 2)
+        first.update("p1", "m", [Generation(text="x" * 100)])
+        second.update("p2", "m", [Generation(text="x" * 100)])
+        first.update("p3", "m", [Generation(text="x" * 100)])
+
+        self.assertEqual(second.stats()["entries"], 2)
+        self.assertIsNone(second.lookup("p1", "m"))
+
+    def test_only_greedy_backends_are_cached(self):
+        class _Endpoint(_LocalModel):
+            temperature: float = 0.1
+
+        class _Greedy(_LocalModel):
+            temperature: float = 0
+
+        def build(llm):
+            manager = LLMManager(llm_type="huggingface_api", model_name="m")
+            with patch.object(manager, "_create_llm", return_value=llm):
+                return manager.get_llm()
+
+        with patch.object(Config, "LLM_CACHE_PATH", self.path), patch.object(Config, "LLM_CACHE_SAMPLED", False):
+            self.assertIsNone(build(_Endpoint(model_path="m")).cache)
+            self.assertIsInstance(build(_Greedy(model_path="m")).cache, CompletionCache)
+            with patch.object(Config, "LLM_CACHE_SAMPLED", True):
+                self.assertIsInstance(build(_Endpoint(model_path="m")).cache, CompletionCache)
+
+    def test_models_do_not_share_entries(self):
+        cache = CompletionCache(self.path)
+        answers = []
+        for path in ("qwen-1.5b.gguf", "qwen-7b.gguf"):
+            llm = ScheduledLLM(inner=_LocalModel(model_path=path), scheduler=InferenceScheduler())
+            llm.cache = cache
+            answers.append(llm.invoke("How many students?"))
+        self.assertEqual(answers, ["qwen-1.5b.gguf: How many students?", "qwen-7b.gguf: How many students?"])
+        self.assertEqual(cache.stats()["entries"], 2)
+
+        # LangChain builds the cache key from dict(): identifying params plus the type
+        self.assertNotEqual(RemoteLLM(model_name="qwen-1.5b.gguf").dict(), RemoteLLM(model_name="qwen-7b.gguf").dict())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from src import llm_manager
+from src.config import Config
+from src.llm_manager import LLMManager
+
+
+class TestModelTiers(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.multiple(Config, LLM_SCHEDULER=True, LLM_CACHE_PATH="", MODEL_SERVER_ADDRESS=None,
+                                 LOCAL_MODEL_PATH="", HF_GGUF_REPO="org/base-GGUF", HF_GGUF_FILE="base.gguf",
+                                 LLAMACPP_PREFIX_CACHE_MB=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.llama = MagicMock(side_effect=lambda **kwargs: MagicMock(model_path=kwargs["model_path"]))
+        self.download = MagicMock(side_effect=lambda repo_id, filename, token: f"/models/{repo_id}/{filename}")
+        patcher = patch.multiple(llm_manager, LlamaCpp=self.llama, hf_hub_download=self.download)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_llamacpp_tier_loads_its_own_model(self):
+        tiers = {"small": {"type": "llamacpp", "model": "org/small-GGUF/small.gguf"}}
+        manager = LLMManager(llm_type="llamacpp")
+        with patch.object(Config, "LLM_TIERS", tiers):
+            base, small = manager.get_llm(), manager.get_llm_for("small")
+
+        self.assertEqual(base.inner.model_path, "/models/org/base-GGUF/base.gguf")
+        self.assertEqual(small.inner.model_path, "/models/org/small-GGUF/small.gguf")
+        self.assertIsNot(base.scheduler, small.scheduler)
+
+    def test_tiers_resolving_to_the_same_model_share_it(self):
+        tiers = {"small": {"type": "llamacpp"}, "tiny": {"type": "llamacpp", "model": "org/base-GGUF/base.gguf"}}
+        manager = LLMManager(llm_type="llamacpp")
+        with patch.object(Config, "LLM_TIERS", tiers):
+            base = manager.get_llm()
+            self.assertIs(manager.get_llm_for("small"), base)
+            self.assertIs(manager.get_llm_for("tiny"), base)
+        self.llama.assert_called_once()
+
+    def test_tier_loads_do_not_block_each_other(self):
+        tiers = {"slow": {"type": "openai", "model": "slow"}, "fast": {"type": "openai", "model": "fast"}}
+        started = threading.Event()
+        release = threading.Event()
+
+        def create(manager):
+            if manager.model_name == "slow":
+                started.set()
+                release.wait(5)
+            return MagicMock(name=manager.model_name)
+
+        manager = LLMManager(llm_type="openai")
+        with patch.object(Config, "LLM_TIERS", tiers), \
+                patch.object(LLMManager, "_create_llm", autospec=True, side_effect=create) as created:
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(manager.get_llm_for("slow"))) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            self.assertTrue(started.wait(5))
+            start = time.perf_counter()
+            manager.get_llm_for("fast")
+            self.assertLess(time.perf_counter() - start, 1)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertIs(results[0], results[1])
+        self.assertEqual(created.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from src import logger as app_logger
+from src.config import Config
+from src.reports_manager import ReportsManager
+
+
+def _wait_for_content(path, retries=20):
+    while retries > 0:
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            return True
+        time.sleep(0.05)
+        retries -= 1
+    return False
+
+
+class TestLogging(unittest.TestCase):
+
+    def test_request_log_is_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "requests.jsonl")
+            original = Config.REQUEST_LOG_PATH
+            Config.REQUEST_LOG_PATH = path
+            try:
+                app_logger.log_request(question_hash="abc", route="agent", total_ms=12.5, sql_queries=["SELECT 1"])
+                self.assertTrue(_wait_for_content(path))
+            finally:
+                Config.REQUEST_LOG_PATH = original
+
+            with open(path) as f:
+                entry = json.loads(f.readline())
+            self.assertEqual(entry["question_hash"], "abc")
+            self.assertEqual(entry["route"], "agent")
+            self.assertEqual(entry["sql_queries"], ["SELECT 1"])
+            self.assertIn("ts", entry)
+
+    def test_report_execution_log(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report_execution.log")
+            rm = ReportsManager()
+            rm.reports = {"AT1201": {"name": "Attendance", "query": "SELECT 1"}}
+            rm.log_execution("AT1201", "SELECT 1", log_file=path)
+            self.assertTrue(_wait_for_content(path))
+
+            with open(path) as f:
+                content = f.read()
+            self.assertIn("Report ID: AT1201", content)
+            self.assertIn("Report Name: Attendance", content)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from src import metrics
+from src.config import Config
+from src.oracle_bot import OracleBot
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_registry_render(self):
+        registry = metrics.MetricsRegistry()
+        counter = registry.counter("test_requests_total", "Requests", ("route",))
+        counter.inc(route="agent")
+        counter.inc(2, route="report")
+        histogram = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+        histogram.observe(0.5)
+
+        output = registry.render()
+        self.assertIn('test_requests_total{route="agent"} 1', output)
+        self.assertIn('test_requests_total{route="report"} 2', output)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 0', output)
+        self.assertIn('test_latency_seconds_bucket{le="1.0"} 1', output)
+        self.assertIn('test_latency_seconds_count 1', output)
+
+    def test_span_is_noop_without_trace(self):
+        self.assertIs(metrics.span("embed"), metrics.NULL_SPAN)
+
+    def test_trace_records_spans(self):
+        trace, token = metrics.start_trace()
+        try:
+            with metrics.span("embed"):
+                pass
+            metrics.record_sql(0.01, 5)
+        finally:
+            metrics.end_trace(trace, token)
+
+        timings = trace.to_dict()
+        self.assertEqual([s["name"] for s in timings["spans"]], ["embed", "sql_execute"])
+        self.assertEqual(timings["sql_rows"], 5)
+        self.assertIsNone(metrics.current_trace())
+
+    @patch('src.oracle_bot.VectorManager')
+    def test_ask_includes_timings(self, mock_vector_manager):
+        Config.METRICS_ENABLED = True
+        mock_db_manager = MagicMock()
+        mock_db_manager.get_usable_table_names.return_value = ["students"]
+        mock_llm_manager = MagicMock()
+        mock_vector_manager.return_value.get_relevant_tables_by_vector.return_value = ["students"]
+        mock_vector_manager.return_value.search_relevant_chat_by_vector.return_value = ""
+
+        bot = OracleBot(mock_db_manager, mock_llm_manager)
+        bot.reports_manager.reports = {}
+
+        mock_executor = MagicMock()
+        mock_executor.invoke.return_value = {"output": "Result", "intermediate_steps": []}
+
+        with patch.object(bot, '_create_agent_executor', return_value=mock_executor):
+            result = bot.ask("how many students?", include_timings=True)
+
+        self.assertEqual(result["answer"], "Result")
+        timings = result["timings"]
+        self.assertEqual(timings["route"], "agent")
+        stages = [s["name"] for s in timings["spans"]]
+        for stage in ["embed", "chat_retrieval", "report_match", "table_retrieval", "executor_build", "agent"]:
+            self.assertIn(stage, stages)
+
+if __name__ == '__main__':
+    unittest.main()
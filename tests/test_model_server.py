@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from multiprocessing import AuthenticationError
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from src.hf_batching import BatchedHuggingFaceLLM, BatchingGenerator
+from src.inference_scheduler import InferenceScheduler, ScheduledLLM
+from src.config import Config
+from src.model_server import ModelServer, ModelServerClient, ModelServerError, RemoteCollection, RemoteEmbeddings
+
+
+class _FakeEmbeddings:
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+class _Encoding(dict):
+    def to(self, device):
+        return self
+
+
+class _FakeTokenizer:
+    pad_token = "<pad>"
+    pad_token_id = 0
+    chat_template = None
+
+    def __call__(self, prompts, **kwargs):
+        return _Encoding(input_ids=[[p] for p in prompts])
+
+    def decode(self, tokens, skip_special_tokens=True):
+        return " ".join(tokens)
+
+
+class _FakeModel:
+    device = "cpu"
+    config = SimpleNamespace(is_encoder_decoder=False)
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def generate(self, input_ids, **kwargs):
+        self.batch_sizes.append(len(input_ids))
+        return [row + [f"answer to {row[0]}"] for row in input_ids]
+
+
+class TestModelServer(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(Config, "MODEL_SERVER_AUTHKEY", "test-key")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.address = os.path.join(self.tmp.name, "models.sock")
+        self.server = ModelServer(self.address)
+        self.server._embeddings = _FakeEmbeddings()
+        self.collection = MagicMock()
+        self.collection.get.return_value = {"ids": ["students"]}
+        self.server._collections["db_schema"] = self.collection
+        self.server._llm = MagicMock()
+        self.server._llm.invoke.return_value.content = "Hello"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = ModelServerClient(self.address)
+        self.client.wait_until_ready(timeout=10)
+
+    def tearDown(self):
+        self.server.close()
+        self.tmp.cleanup()
+
+    def test_embeddings_roundtrip(self):
+        embeddings = RemoteEmbeddings(self.client)
+        self.assertEqual(embeddings.embed_query("abc"), [3.0, 1.0])
+        self.assertEqual(embeddings.embed_documents(["a", "ab"]), [[1.0, 1.0], [2.0, 1.0]])
+
+    def test_collection_and_generate(self):
+        collection = RemoteCollection(self.client, "db_schema")
+        self.assertEqual(collection.get(), {"ids": ["students"]})
+        self.assertEqual(self.client.call("generate", prompt="hi", stop=None), "Hello")
+
+    def test_concurrent_generations_share_a_batch(self):
+        model = _FakeModel()
+        generator = BatchingGenerator(model, _FakeTokenizer(), max_batch_size=2, max_wait_ms=2000)
+        self.server._llm = ScheduledLLM(inner=BatchedHuggingFaceLLM(generator=generator),
+                                        scheduler=InferenceScheduler(max_parallel=2))
+        results = {}
+
+        def ask(prompt):
+            results[prompt] = ModelServerClient(self.address).call("generate", prompt=prompt, stop=None)
+
+        try:
+            threads = [threading.Thread(target=ask, args=(p,)) for p in ("q1", "q2")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+        finally:
+            generator.close()
+
+        self.assertEqual(results, {"q1": "answer to q1", "q2": "answer to q2"})
+        self.assertEqual(model.batch_sizes, [2])
+
+    def test_requires_an_authkey(self):
+        with patch.object(Config, "MODEL_SERVER_AUTHKEY", None):
+            with self.assertRaises(RuntimeError):
+                ModelServerClient(self.address).call("embed_query", text="abc")
+        with patch.object(Config, "MODEL_SERVER_AUTHKEY", "other-key"):
+            with self.assertRaises(AuthenticationError):
+                ModelServerClient(self.address).call("embed_query", text="abc")
+        # The server keeps serving clients with the right key
+        self.assertEqual(ModelServerClient(self.address).call("embed_query", text="abc"), [3.0, 1.0])
+
+    def test_importing_the_server_does_not_import_torch(self):
+        code = "import sys, src.model_server; sys.exit('torch' in sys.modules)"
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], cwd=root).returncode, 0)
+
+    def test_errors_are_forwarded(self):
+        with self.assertRaises(ModelServerError):
+            self.client.call("collection", name="db_schema", method="drop_everything")
+
+if __name__ == '__main__':
+    unittest.main()
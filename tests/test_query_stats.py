@@ -0,0 +1,87 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from src.db_manager import DBManager
+from src.index_advisor import IndexAdvisor
+from src.query_stats import QueryStats, fingerprint
+
+
+class TestQueryStats(unittest.TestCase):
+
+    def test_fingerprint_removes_literals(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM students -- latest\nWHERE name = 'O''Brien' AND class_id IN (1, 2, 3);"),
+            "select * from students where name = ? and class_id in (?)"
+        )
+        self.assertEqual(fingerprint("select count(*) from t where x > 7.5"),
+                         fingerprint("SELECT   COUNT(*) FROM t WHERE x > -2"))
+        # Digits inside identifiers stay
+        self.assertEqual(fingerprint("SELECT col1 FROM t2 LIMIT 10"), "select col1 from t2 limit ?")
+
+    def test_statistics_per_fingerprint(self):
+        stats = QueryStats(max_fingerprints=2)
+        for i in range(1, 21):
+            stats.record(f"SELECT * FROM t WHERE id = {i}", i / 100, rows=1, workload="agent")
+        stats.record("SELECT * FROM t WHERE id = 'x'", 0.5, error=True, workload="report")
+
+        [entry] = stats.top()
+        self.assertEqual(entry["count"], 21)
+        self.assertEqual(entry["errors"], 1)
+        self.assertEqual(entry["rows"], 20)
+        self.assertEqual(entry["max_seconds"], 0.5)
+        self.assertEqual(entry["p95_seconds"], 0.2)
+        self.assertEqual(entry["workloads"], ["agent", "report"])
+        self.assertEqual(stats.example(entry["fingerprint"]), "SELECT * FROM t WHERE id = 'x'")
+
+        # Beyond max_fingerprints the least recently seen shape is dropped
+        stats.record("SELECT name FROM u", 0.01)
+        stats.record("SELECT name FROM v", 0.01)
+        self.assertEqual(len(stats), 2)
+        self.assertEqual({e["fingerprint"] for e in stats.top(order_by="last_seen")},
+                         {"select name from u", "select name from v"})
+        with self.assertRaises(ValueError):
+            stats.top(order_by="rows; drop table t")
+
+
+class TestIndexAdvisor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "school.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE classes (id INTEGER PRIMARY KEY, class_name TEXT)")
+        conn.execute("CREATE TABLE attendance (id INTEGER PRIMARY KEY, class_id INTEGER, status TEXT, day TEXT)")
+        conn.executemany("INSERT INTO attendance (class_id, status, day) VALUES (?, ?, ?)",
+                         [(i % 5, "Present", f"2024-01-{i % 28 + 1:02d}") for i in range(200)])
+        conn.commit()
+        conn.close()
+        self.db_manager = DBManager(url=f"sqlite:///{self.path}")
+
+    def tearDown(self):
+        self.db_manager.dispose()
+        self.tmp.cleanup()
+
+    def test_suggests_index_for_scanned_filter_columns(self):
+        for day in ("2024-01-05", "2024-01-09"):
+            self.db_manager.execute_select(
+                f"SELECT a.day, count(*) FROM attendance a WHERE a.status = 'Present' AND a.day >= '{day}' "
+                "GROUP BY a.day", workload="agent"
+            )
+        self.db_manager.execute_query("SELECT class_name FROM classes WHERE id = 1")
+
+        [advice] = [a for a in IndexAdvisor(self.db_manager).advise() if a["suggestions"]]
+        self.assertEqual(advice["count"], 2)
+        self.assertEqual(advice["full_scans"], ["attendance"])
+        self.assertEqual(advice["suggestions"][0]["statement"],
+                         "CREATE INDEX ix_attendance_status_day ON attendance (status, day)")
+
+        with self.db_manager.connect() as connection:
+            connection.exec_driver_sql(advice["suggestions"][0]["statement"])
+            connection.commit()
+        self.assertEqual(IndexAdvisor(self.db_manager).analyse(self.db_manager.query_stats.example(
+            advice["fingerprint"]))["suggestions"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.report_scheduler import ReportScheduler
+from src.reports_manager import ReportsManager
+
+
+def _log_entry(report_id, query, database=None):
+    return (
+        "Timestamp: 2024-01-05T10:00:00\n"
+        f"Report ID: {report_id}\n"
+        "Report Name: Test\n"
+        + (f"Database: {database}\n" if database else "")
+        + f"Query: {query}\n"
+        f"{'-'*40}\n"
+    )
+
+
+class TestReportScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.rm = ReportsManager()
+        self.rm.reports = {
+            "ST1001": {"name": "All Students", "query": "SELECT * FROM students;", "precompute": True},
+            "TC2002": {"name": "Teacher Count", "query": "SELECT COUNT(*) FROM teachers;", "refresh_interval": 60},
+            "LV3001": {"name": "Leaves", "query": "SELECT * FROM leaves;"},
+            "ST1002": {"name": "Students by Class", "query": "SELECT * FROM students WHERE class_id = :class_id;"},
+        }
+
+    def test_precompute_targets_include_hot_bindings(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "report_execution.log")
+            with open(log_file, "w") as f:
+                for _ in range(4):
+                    f.write(_log_entry("ST1002", "SELECT * FROM students WHERE class_id = 7;"))
+                f.write(_log_entry("ST1002", "SELECT * FROM students WHERE class_id = 9;"))
+                for _ in range(5):
+                    f.write(_log_entry("LV3001", "SELECT * FROM leaves;"))
+
+            targets = self.rm.precompute_targets(log_file)
+
+        queries = {query: (report_id, interval) for report_id, query, interval in targets}
+        self.assertEqual(queries["SELECT COUNT(*) FROM teachers;"], ("TC2002", 60))
+        self.assertIn("SELECT * FROM students;", queries)
+        self.assertEqual(queries["SELECT * FROM students WHERE class_id = 7;"][0], "ST1002")
+        # Below the minimum count, and reports that did not opt in
+        self.assertNotIn("SELECT * FROM students WHERE class_id = 9;", queries)
+        self.assertNotIn("SELECT * FROM leaves;", queries)
+
+    def test_hot_bindings_are_counted_per_database(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "report_execution.log")
+            with open(log_file, "w") as f:
+                for _ in range(4):
+                    f.write(_log_entry("ST1002", "SELECT * FROM students WHERE class_id = 7;", database="finance"))
+                for _ in range(3):
+                    f.write(_log_entry("ST1002", "SELECT * FROM students WHERE class_id = 9;"))
+
+            finance = ReportsManager(database="finance")
+            finance.reports = self.rm.reports
+            self.assertEqual(finance.hot_bindings(log_file),
+                             [("ST1002", "SELECT * FROM students WHERE class_id = 7;")])
+            self.assertEqual(self.rm.hot_bindings(log_file),
+                             [("ST1002", "SELECT * FROM students WHERE class_id = 9;")])
+
+    def test_refreshes_ahead_of_expiry(self):
+        runner = MagicMock(side_effect=lambda report_id, query: f"answer for {report_id}")
+        self.rm.precompute_targets = MagicMock(return_value=[("TC2002", "SELECT COUNT(*) FROM teachers;", 100)])
+        scheduler = ReportScheduler(self.rm, runner, refresh_ahead=0.8)
+
+        self.assertEqual(scheduler.run_once(now=0), 1)
+        snapshot = scheduler.snapshots["SELECT COUNT(*) FROM teachers;"]
+        computed_at = snapshot["computed_at"]
+        self.assertEqual(snapshot["answer"], "answer for TC2002")
+
+        # Fresh: nothing to do; 80% into the interval: refreshed while still valid
+        self.assertEqual(scheduler.run_once(now=computed_at + 50), 0)
+        served = scheduler.get("SELECT COUNT(*) FROM teachers;", now=computed_at + 50)
+        self.assertEqual(served["age_seconds"], 50)
+        self.assertEqual(scheduler.run_once(now=computed_at + 85), 1)
+        self.assertEqual(runner.call_count, 2)
+
+    def test_expired_or_failed_snapshots_are_not_served(self):
+        runner = MagicMock(side_effect=RuntimeError("db down"))
+        self.rm.precompute_targets = MagicMock(return_value=[("TC2002", "SELECT COUNT(*) FROM teachers;", 100)])
+        scheduler = ReportScheduler(self.rm, runner)
+
+        self.assertEqual(scheduler.run_once(now=0), 0)
+        self.assertIsNone(scheduler.get("SELECT COUNT(*) FROM teachers;"))
+
+        scheduler.snapshots["SELECT COUNT(*) FROM teachers;"] = {
+            "report_id": "TC2002", "answer": "old", "computed_at": 0.0, "expires_at": 100.0
+        }
+        self.assertIsNone(scheduler.get("SELECT COUNT(*) FROM teachers;", now=150))
+
+    def test_reports_manager_snapshot_lookup(self):
+        self.assertIsNone(self.rm.get_snapshot("SELECT * FROM students;"))
+        self.rm.precompute_targets = MagicMock(return_value=[("ST1001", "SELECT * FROM students;", 900)])
+        scheduler = self.rm.start_scheduler(lambda report_id, query: "| id | name |")
+        try:
+            scheduler.run_once()
+            self.assertEqual(self.rm.get_snapshot("SELECT * FROM students;")["answer"], "| id | name |")
+        finally:
+            scheduler.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import date
+from src.result_store import ResultSetNotFound, ResultStore
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spill_dir = os.path.join(self.tmp.name, "spill")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pages_through_rows(self):
+        store = ResultStore(spill_dir=self.spill_dir)
+        rows = [(i, f"name {i}", date(2024, 1, 1)) for i in range(95)]
+        cursor = store.register(["id", "name", "joined"], rows, sql="SELECT ...", page_size=40)
+
+        self.assertEqual(cursor["total_rows"], 95)
+        self.assertEqual(cursor["next_offset"], 40)
+        page = store.page(cursor["id"], offset=80, limit=40)
+        self.assertEqual(page["rows"][0], [80, "name 80", "2024-01-01"])
+        self.assertEqual(len(page["rows"]), 15)
+        self.assertIsNone(page["next_offset"])
+        self.assertEqual(store.page(cursor["id"], offset=200, limit=10)["rows"], [])
+
+    def test_spills_beyond_memory_budget(self):
+        store = ResultStore(memory_mb=0.001, spill_dir=self.spill_dir)
+        cursor = store.register(["n", "text"], [(i, "x" * 50) for i in range(100)])
+
+        self.assertTrue(os.listdir(self.spill_dir))
+        self.assertEqual(store.page(cursor["id"], offset=10, limit=2)["rows"], [[10, "x" * 50], [11, "x" * 50]])
+
+        store.delete(cursor["id"])
+        self.assertEqual(os.listdir(self.spill_dir), [])
+
+    def test_row_cap_and_expiry(self):
+        store = ResultStore(ttl_seconds=0.05, max_rows=10, spill_dir=self.spill_dir)
+        cursor = store.register(["n"], [(i,) for i in range(25)])
+        self.assertEqual(cursor["total_rows"], 10)
+        self.assertTrue(cursor["truncated"])
+
+        # A longer initial lifetime (report snapshots) is not cut short by reads
+        kept = store.register(["n"], [(1,)], ttl_seconds=60)
+        store.page(kept["id"])
+
+        time.sleep(0.1)
+        with self.assertRaises(ResultSetNotFound):
+            store.page(cursor["id"])
+        self.assertEqual(store.page(kept["id"])["rows"], [[1]])
+        self.assertEqual(len(store), 1)
+
+    def test_csv_export_streams_every_row(self):
+        store = ResultStore(spill_dir=self.spill_dir)
+        cursor = store.register(["n"], [(i,) for i in range(25)])
+
+        chunks = list(store.iter_csv(cursor["id"], chunk_rows=10))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks).splitlines(), ["n"] + [str(i) for i in range(25)])
+
+    def test_render_formats(self):
+        store = ResultStore(spill_dir=self.spill_dir)
+        cursor = store.register(["id", "name"], [(1, "Asha"), (2, "Ravi")])
+        page = store.page(cursor["id"])
+
+        self.assertEqual(store.render(page, "csv").splitlines(), ["id,name", "1,Asha", "2,Ravi"])
+        self.assertIn("| 2 | Ravi |", store.render(page, "markdown"))
+        with self.assertRaises(ValueError):
+            store.render(page, "xml")
+
+if __name__ == '__main__':
+    unittest.main()
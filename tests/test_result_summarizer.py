@@ -0,0 +1,72 @@
+import datetime
+import unittest
+from decimal import Decimal
+from src.result_summarizer import compact_observation, render_digest, summarize
+
+
+def _rows(n):
+    statuses = ["Present", "Absent", "Leave"]
+    return [
+        (i, statuses[i % 3], float(i % 100), datetime.date(2024, 1, 1) + datetime.timedelta(days=i % 30), f"name {i}")
+        for i in range(n)
+    ]
+
+
+class TestResultSummarizer(unittest.TestCase):
+    COLUMNS = ["id", "status", "amount", "day", "name"]
+
+    def test_column_statistics(self):
+        digest = summarize(self.COLUMNS, _rows(300))
+        stats = {c["name"]: c for c in digest["columns"]}
+
+        self.assertEqual(stats["amount"]["type"], "numeric")
+        self.assertEqual(stats["amount"]["max"], 99.0)
+        self.assertAlmostEqual(stats["amount"]["mean"], 49.5)
+        self.assertEqual(stats["amount"]["percentiles"][50], 49.5)
+        self.assertEqual(stats["status"]["top"][0][1], 100)
+        self.assertEqual(stats["day"]["type"], "date")
+        # Unique text has a distinct count but no top values
+        self.assertEqual(stats["name"]["distinct"], 300)
+        self.assertNotIn("top", stats["name"])
+
+    def test_group_by_lowest_cardinality_text_column(self):
+        rows = [(None, "A", 1.0), (None, "B", 5.0), (None, "A", 2.0), (None, "B", None)]
+        digest = summarize(["x", "grp", "v"], rows)
+
+        groups = digest["group_by"][0]
+        self.assertEqual(groups["by"], "grp")
+        self.assertEqual(groups["groups"][0][0], "B")
+        self.assertEqual(groups["groups"][0][1], 5.0)
+        self.assertEqual(groups["groups"][1][1:], (3.0, 1.5, 2))
+
+    def test_digest_size_does_not_grow_with_rows(self):
+        small = render_digest(summarize(self.COLUMNS, _rows(1000), sample_rows=5))
+        large = render_digest(summarize(self.COLUMNS, _rows(100000), sample_rows=5))
+
+        self.assertIn("Rows: 100000", large)
+        self.assertLess(len(large), len(small) * 1.2)
+
+    def test_compact_observation(self):
+        observation = str([(i, "x") for i in range(200)])
+        compact = compact_observation(observation, min_rows=50, sample_rows=3)
+        self.assertIn("Rows: 200", compact)
+        self.assertLess(len(compact), len(observation))
+
+        self.assertEqual(compact_observation("[(3,)]"), "[(3,)]")
+        self.assertTrue(compact_observation("x" * 5000, max_chars=100).endswith("5000 characters in total]"))
+
+    def test_compact_observation_with_decimals_and_dates(self):
+        observation = str([(Decimal(f"{i}.50"), datetime.date(2024, 1, i % 28 + 1),
+                            datetime.datetime(2024, 1, 1, 8, i % 60, tzinfo=datetime.timezone.utc), -i)
+                           for i in range(1, 121)])
+        compact = compact_observation(observation, min_rows=50, sample_rows=3)
+        self.assertIn("Rows: 120", compact)
+        self.assertIn("max 120.5", compact)
+        self.assertIn("from 2024-01-01 to 2024-01-28", compact)
+
+        # Anything but literals and row value constructors stays text
+        self.assertEqual(compact_observation("[(__import__('os'),)]" * 30, min_rows=1, max_chars=10000),
+                         "[(__import__('os'),)]" * 30)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from src.schema_index import SchemaVectorIndex
+
+
+class TestSchemaVectorIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SchemaVectorIndex()
+        self.index.load(["students", "classes", "teachers"], [[1, 0, 0], [0, 1, 0], [0, 0, 2]])
+
+    def test_exact_top_k(self):
+        hits = self.index.search([0.9, 0.1, 0.0], k=2)
+        self.assertEqual([name for name, _ in hits], ["students", "classes"])
+        self.assertAlmostEqual(hits[0][1], 0.9 / np.linalg.norm([0.9, 0.1]), places=5)
+
+    def test_k_larger_than_index(self):
+        self.assertEqual(len(self.index.search([1, 1, 1], k=10)), 3)
+
+    def test_batch_matches_single(self):
+        queries = [[0, 0, 1], [0, 1, 0.2], [1, 0, 0]]
+        batched = self.index.search_batch(queries, k=1)
+        self.assertEqual([hits[0][0] for hits in batched], ["teachers", "classes", "students"])
+        self.assertEqual(batched[1], self.index.search(queries[1], k=1))
+
+    def test_incremental_update(self):
+        self.index.upsert(["classes", "attendance"], [[0, 0, 1], [1, 1, 0]])
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.search([0, 1, 0], k=1)[0][0], "attendance")
+
+        self.index.remove(["teachers"])
+        self.assertEqual(self.index.names, ["students", "classes", "attendance"])
+        self.assertEqual(self.index.search([0, 0, 1], k=1)[0][0], "classes")
+
+    def test_empty_index(self):
+        self.assertEqual(SchemaVectorIndex().search([1, 0], k=3), [])
+        empty = SchemaVectorIndex()
+        empty.upsert(["a"], [[3, 4]])
+        self.assertEqual(empty.search([3, 4])[0][0], "a")
+
+
+if __name__ == "__main__":
+    unittest.main()
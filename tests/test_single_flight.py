@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+import unittest
+from src.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_duplicates_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {"answer": 42}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("q", compute))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        deadline = time.time() + 5
+        while flight.in_flight() == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r[0] for r in results], [{"answer": 42}] * 5)
+        self.assertEqual(sum(1 for _, leader in results if leader), 1)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_exception_reaches_followers_and_key_is_released(self):
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def fail():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("q", fail)
+            except ValueError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(errors, ["boom", "boom"])
+        self.assertEqual(flight.do("q", lambda: "ok"), ("ok", True))
+
+    def test_async_and_sync_callers_coalesce(self):
+        flight = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "answer"
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do_async("q", compute))
+            await asyncio.sleep(0.05)
+            follower = flight.do_async("q", compute)
+            sync_follower = asyncio.get_running_loop().run_in_executor(None, flight.do, "q", compute)
+            return await asyncio.gather(leader, follower, sync_follower)
+
+        results = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r[0] for r in results], ["answer"] * 3)
+        self.assertEqual([r[1] for r in results], [True, False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
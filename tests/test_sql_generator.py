@@ -0,0 +1,38 @@
+import unittest
+from src.sql_generator import build_sql_prompt, check_read_only, extract_sql, format_rows_markdown
+
+
+class TestSqlGenerator(unittest.TestCase):
+
+    def test_prompt_puts_schema_before_question(self):
+        prompt = build_sql_prompt("CREATE TABLE students (id INTEGER)", "sqlite", "How many students?")
+        self.assertLess(prompt.index("CREATE TABLE"), prompt.index("Question:"))
+        self.assertTrue(prompt.endswith("SQL:"))
+
+    def test_repair_prompt_keeps_prefix(self):
+        first = build_sql_prompt("schema", "oracle", "q")
+        repair = build_sql_prompt("schema", "oracle", "q", previous_sql="SELECT x", error="ORA-00904")
+        self.assertTrue(repair.startswith(first[:-len("SQL:")]))
+        self.assertIn("ORA-00904", repair)
+
+    def test_extract_sql(self):
+        self.assertEqual(extract_sql("```sql\nSELECT 1;\n```"), "SELECT 1")
+        self.assertEqual(extract_sql("Here is the query: SELECT a FROM t; -- done"), "SELECT a FROM t")
+        self.assertEqual(extract_sql("WITH x AS (SELECT 1) SELECT * FROM x"), "WITH x AS (SELECT 1) SELECT * FROM x")
+
+    def test_read_only(self):
+        self.assertIsNone(check_read_only("SELECT 1"))
+        self.assertIsNotNone(check_read_only("DELETE FROM students"))
+        self.assertIsNotNone(check_read_only(""))
+
+    def test_format_rows(self):
+        table = format_rows_markdown(["name", "age"], [("Ann", 20), ("Bob", None), ("Cy", 3)], max_rows=2)
+        self.assertIn("| name | age |", table)
+        self.assertIn("| Bob |  |", table)
+        self.assertNotIn("Cy", table)
+        self.assertIn("first 2 rows", table)
+        self.assertEqual(format_rows_markdown(["a"], []), "No records found.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.sql_validator import VALIDATIONS, SQLValidationError, SQLValidator
+
+CATALOG = {
+    "students": {"id", "name", "class_id", "active"},
+    "classes": {"id", "title"},
+}
+
+
+class TestSQLValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.sqlite = SQLValidator("sqlite", CATALOG)
+        self.oracle = SQLValidator("oracle", CATALOG)
+
+    def assertRejected(self, validator, sql, message):
+        with self.assertRaises(SQLValidationError) as ctx:
+            validator.validate(sql)
+        self.assertIn(message, str(ctx.exception))
+
+    def test_valid_query_is_unchanged(self):
+        sql = "SELECT s.name, c.title FROM students s JOIN classes c ON s.class_id = c.id;"
+        self.assertEqual(self.sqlite.validate(sql), sql.rstrip(";"))
+
+    def test_unknown_table_suggests_match(self):
+        self.assertRejected(self.sqlite, "SELECT * FROM student", "Did you mean: students")
+
+    def test_unknown_columns(self):
+        self.assertRejected(self.sqlite, "SELECT s.nam FROM students s", "Unknown column 'nam' in table 'students'")
+        self.assertRejected(self.sqlite, "SELECT title FROM students", "Unknown column 'title'")
+
+    def test_aliases_and_ctes_are_allowed(self):
+        self.sqlite.validate("SELECT COUNT(*) AS n FROM students ORDER BY n")
+        self.sqlite.validate("WITH t AS (SELECT class_id, COUNT(*) AS n FROM students GROUP BY class_id) SELECT t.n FROM t")
+
+    def test_read_only(self):
+        self.assertRejected(self.sqlite, "DELETE FROM students", "read-only")
+        self.assertRejected(self.sqlite, "DROP TABLE students", "read-only")
+        self.assertRejected(self.sqlite, "SELECT 1; DELETE FROM students", "one statement")
+        self.assertRejected(self.sqlite, "SELECT * FROM students FOR UPDATE", "read-only")
+        self.assertRejected(self.oracle, "SELECT * FROM students WHERE id = 1 FOR UPDATE", "read-only")
+
+    def test_limit_becomes_fetch_first_on_oracle(self):
+        sql = self.oracle.validate("SELECT name FROM students LIMIT 5")
+        self.assertIn("FETCH FIRST 5 ROWS ONLY", sql.upper())
+        self.assertNotIn("LIMIT", sql.upper())
+
+    def test_fetch_first_becomes_limit_on_sqlite(self):
+        sql = self.sqlite.validate("SELECT name FROM students FETCH FIRST 5 ROWS ONLY")
+        self.assertIn("LIMIT 5", sql.upper())
+
+    def test_boolean_sum_on_oracle(self):
+        sql = self.oracle.validate("SELECT SUM(active = 1) FROM students")
+        self.assertIn("CASE WHEN", sql.upper())
+
+
+class TestDBManagerValidation(unittest.TestCase):
+
+    def test_agent_gets_error_without_db_round_trip(self):
+        from src.config import Config
+        from src.db_manager import DBManager
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "v.db")
+            conn = sqlite3.connect(path)
+            conn.execute("CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.commit()
+            conn.close()
+
+            with patch.object(Config, "SQLITE_PATH", path):
+                db_manager = DBManager(db_type="sqlite")
+                db = db_manager.get_db(include_tables=["students"])
+                # The catalogue is read once; validating a query afterwards needs no connection
+                db_manager.get_schema_catalog()
+                rejected = VALIDATIONS.value(result="rejected")
+                with patch.object(db_manager.engine, "connect") as connect:
+                    self.assertIn("Unknown table 'studnts'", db.run_no_throw("SELECT * FROM studnts"))
+                    connect.assert_not_called()
+                # run_no_throw goes through run: one validation per query
+                self.assertEqual(VALIDATIONS.value(result="rejected"), rejected + 1)
+                self.assertEqual(db.run_no_throw("SELECT COUNT(*) FROM students"), "[(0,)]")
+            db_manager.engine.dispose()
+
+    def test_catalogue_failure_is_retried(self):
+        from src.config import Config
+        from src.db_manager import DBManager
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch.object(Config, "SQLITE_PATH", os.path.join(tmp, "v.db")):
+                db_manager = DBManager(db_type="sqlite")
+            with patch.object(db_manager, "get_schema_catalog", side_effect=RuntimeError("db not ready")):
+                self.assertEqual(db_manager.validate_sql("SELECT * FROM studnts"), ("SELECT * FROM studnts", None))
+            # Within the backoff the catalogue is not read again
+            with patch.object(db_manager, "get_schema_catalog", return_value=CATALOG) as catalog:
+                self.assertIsNone(db_manager.validate_sql("SELECT * FROM studnts")[1])
+                catalog.assert_not_called()
+                with patch("src.db_manager.time.time", return_value=db_manager._validator_retry_at):
+                    self.assertIn("Unknown table", db_manager.validate_sql("SELECT * FROM studnts")[1])
+            db_manager.engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from src.table_retriever import BM25Index, HybridTableRetriever, tokenize
+
+METADATA = {
+    "students": {"comment": "", "columns": [("id", ""), ("full_name", ""), ("birth_date", "")], "references": []},
+    "classes": {"comment": "School classes", "columns": [("id", ""), ("title", ""), ("room_number", "")],
+                "references": []},
+    "student_attendance": {"comment": "", "columns": [("student_id", ""), ("class_id", ""), ("status", "")],
+                           "references": ["students", "classes"]},
+    "invoices": {"comment": "", "columns": [("id", ""), ("amount", "")], "references": []},
+}
+
+
+class TestTableRetriever(unittest.TestCase):
+
+    def setUp(self):
+        self.retriever = HybridTableRetriever(METADATA, max_tables=4)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("room_number of Classes"), ["room_number", "room", "number", "of", "class"])
+        self.assertIn("category", tokenize("categories"))
+
+    def test_bm25_prefers_literal_column(self):
+        scores = BM25Index({"a": "orders amount", "b": "classes room_number"}).score("show room_number")
+        self.assertEqual(max(scores, key=scores.get), "b")
+
+    def test_lexical_signal_rescues_weak_vector(self):
+        tables = self.retriever.retrieve("room_number of every class", {"invoices": 0.5, "classes": 0.3})
+        self.assertEqual(tables[0], "classes")
+
+    def test_adaptive_cut(self):
+        ranked = [("a", 1.0), ("b", 0.95), ("c", 0.4), ("d", 0.39)]
+        self.assertEqual(self.retriever.cut(ranked), ["a", "b"])
+        self.assertEqual(self.retriever.cut([]), [])
+
+    def test_bridge_table_added(self):
+        tables = self.retriever.expand_joins(["students", "classes"])
+        self.assertEqual(tables, ["students", "classes", "student_attendance"])
+        # Directly joined tables need no bridge
+        self.assertEqual(self.retriever.expand_joins(["students", "student_attendance"]),
+                         ["students", "student_attendance"])
+
+    def test_no_bridge_when_already_joined_through_selected_table(self):
+        metadata = dict(METADATA, enrolments={"comment": "", "columns": [("student_id", ""), ("class_id", "")],
+                                              "references": ["students", "classes"]})
+        retriever = HybridTableRetriever(metadata, max_tables=4)
+        self.assertEqual(retriever.expand_joins(["students", "classes", "student_attendance"]),
+                         ["students", "classes", "student_attendance"])
+        self.assertEqual(len(retriever.expand_joins(["students", "classes"])), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from src.config import Config
+from src.tenant_registry import TenantRegistry, UnknownDatabase
+
+
+class TestTenantRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.databases = {}
+        for name in ("school", "finance"):
+            path = os.path.join(self.tmp.name, f"{name}.db")
+            conn = sqlite3.connect(path)
+            conn.execute(f"CREATE TABLE {name}_things (id INTEGER)")
+            conn.close()
+            self.databases[name] = {"url": f"sqlite:///{path}"}
+        reports_file = os.path.join(self.tmp.name, "school_reports.json")
+        with open(reports_file, "w") as f:
+            json.dump({"SC1001": {"name": "Things", "query": "SELECT * FROM school_things;"}}, f)
+        self.databases["school"]["reports_file"] = reports_file
+
+        self.default_bot = MagicMock()
+        self.default_bot.vector_manager.persist_directory = os.path.join(self.tmp.name, "chroma")
+        patcher = patch.multiple(Config, VALUE_INDEX=False, REPORT_PRECOMPUTE=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_loads_isolated_bots_on_first_use(self):
+        registry = TenantRegistry(self.default_bot, self.databases)
+
+        self.assertIs(registry.get(None), self.default_bot)
+        self.assertIs(registry.get("default"), self.default_bot)
+        with self.assertRaises(UnknownDatabase):
+            registry.get("payroll")
+
+        school = registry.get("school")
+        self.assertIs(registry.get("school"), school)
+        finance = registry.get("finance")
+        self.assertEqual(school.db_manager.get_usable_table_names(), ["school_things"])
+        self.assertEqual(finance.db_manager.get_usable_table_names(), ["finance_things"])
+        self.assertEqual(school.vector_manager.collection_prefix, "school_")
+        self.assertEqual(list(school.reports_manager.reports), ["SC1001"])
+        self.assertEqual(finance.reports_manager.reports, {})
+        # Models and the result store are shared with the default bot
+        self.assertIs(school.llm, self.default_bot.llm)
+        self.assertIs(school.vector_manager._embeddings, self.default_bot.vector_manager.embeddings)
+        self.assertIs(finance.result_store, self.default_bot.result_store)
+
+    def test_unloads_least_recently_used_and_idle_bots(self):
+        registry = TenantRegistry(self.default_bot, self.databases, max_loaded=1, idle_seconds=60)
+
+        school = registry.get("school")
+        with patch.object(school, "close", wraps=school.close) as close:
+            registry.get("finance")
+            close.assert_called_once()
+        loaded = {d["name"]: d["loaded"] for d in registry.status()}
+        self.assertEqual(loaded, {"default": True, "finance": True, "school": False})
+
+        self.assertEqual(registry.evict_idle(now=time.time() + 30), [])
+        self.assertEqual(registry.evict_idle(now=time.time() + 61), ["finance"])
+        # Unloaded databases load again on the next request
+        self.assertIsNot(registry.get("school"), school)
+
+    def test_evicted_bot_closes_after_last_request(self):
+        registry = TenantRegistry(self.default_bot, self.databases, max_loaded=1)
+
+        school = registry.get("school")
+        with patch.object(school, "close") as close:
+            with registry.acquire("school"), registry.acquire("school"):
+                registry.get("finance")
+                self.assertFalse({d["name"]: d["loaded"] for d in registry.status()}["school"])
+                close.assert_not_called()
+            close.assert_called_once()
+
+        with registry.acquire(None) as default:
+            self.assertIs(default, self.default_bot)
+        with self.assertRaises(UnknownDatabase):
+            with registry.acquire("payroll"):
+                pass
+
+    def test_ignores_invalid_names(self):
+        databases = {"bad name": {"url": "sqlite://"}, "default": {"url": "sqlite://"}, "nourl": {}}
+        registry = TenantRegistry(self.default_bot, databases)
+        self.assertEqual(registry.names(), ["default"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from src.value_index import ValueIndex
+
+
+def _db_manager():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE classes (id INTEGER PRIMARY KEY, class_name TEXT)"))
+        connection.execute(text(
+            "CREATE TABLE student_attendance (id INTEGER PRIMARY KEY, student TEXT, status VARCHAR(10), class_id INTEGER)"
+        ))
+        connection.execute(text("INSERT INTO classes (class_name) VALUES ('Class 10-A'), ('Class 9-B'), ('Science Lab')"))
+        for i in range(60):
+            status = ("Present", "Absent", "Leave")[i % 3]
+            connection.execute(text(f"INSERT INTO student_attendance (student, status, class_id) VALUES ('student {i}', '{status}', 1)"))
+    db_manager = MagicMock()
+    db_manager.engine_for.return_value = engine
+    db_manager.connect.side_effect = lambda workload: engine.connect()
+    db_manager.get_usable_table_names.return_value = ["classes", "student_attendance"]
+    return db_manager, engine
+
+
+class TestValueIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.db_manager, self.engine = _db_manager()
+        self.index = ValueIndex(self.db_manager, max_distinct=5, fuzzy_max_distinct=20)
+
+    def test_reads_string_columns_incrementally(self):
+        self.index.columns_per_tick = 2
+        self.assertEqual(self.index.run_once(now=0), 2)
+        self.assertEqual(self.index.run_once(now=1), 1)
+        self.assertEqual(self.index.run_once(now=2), 0)
+
+        # Integer columns are not read; too many distinct values marks a column as skipped
+        self.assertEqual(set(self.index.columns), {
+            ("classes", "class_name"), ("student_attendance", "student"), ("student_attendance", "status")
+        })
+        self.assertIsNone(self.index.columns[("student_attendance", "student")]["values"])
+        self.assertEqual(self.index.columns[("student_attendance", "status")]["distinct"], 3)
+
+        # Stale columns are read again, oldest first
+        self.index.refresh_seconds = 100
+        self.assertEqual(self.index.run_once(now=101), 2)
+
+    def test_matches_exact_and_misspelled_values(self):
+        self.index.run_once(now=0)
+
+        matches = self.index.match("how many students were absent in class 10 a")
+        values = {(m["column"], m["value"]): m["match"] for m in matches}
+        self.assertEqual(values[("status", "Absent")], "exact")
+        self.assertEqual(values[("class_name", "Class 10-A")], "exact")
+        self.assertNotIn(("class_name", "Class 9-B"), values)
+
+        fuzzy = self.index.match("attendance in the sceince lab")
+        self.assertEqual([(m["value"], m["match"]) for m in fuzzy], [("Science Lab", "fuzzy")])
+
+        self.assertEqual(self.index.match("absent students", tables=["classes"]), [])
+
+    def test_hints_list_named_low_cardinality_columns(self):
+        self.index.run_once(now=0)
+
+        hints = self.index.hints("attendance by status", tables=["student_attendance"])
+        self.assertIn("student_attendance.status is one of: 'Absent', 'Leave', 'Present'", hints)
+        self.assertIsNone(self.index.hints("average salary"))
+
+    def test_dropped_tables_leave_the_index(self):
+        self.index.run_once(now=0)
+        self.db_manager.get_usable_table_names.return_value = ["classes"]
+        self.index.run_once(now=self.index.rescan_seconds)
+
+        self.assertEqual(list(self.index.columns), [("classes", "class_name")])
+        self.assertEqual(self.index.match("absent"), [])
+
+if __name__ == '__main__':
+    unittest.main()